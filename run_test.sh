@@ -1,16 +1,13 @@
 #!/bin/bash
 
-# Define the module name
-module_name="src.test_cases.0.data_frame"
+# Define the test case
+case_name="0/data_frame"
 
 # List of num_records values to try
 num_records_list=(100 500 1000 10000 100000 200000 500000 1000000 2000000)
 
-# Loop through each num_records value
-for num_records in "${num_records_list[@]}"; do
-    # Run the Python command
-    python3 -m "$module_name" --num_records "$num_records"
+# Identifier of this sweep, pass a previous one as the first argument to resume it
+sweep_name=${1:-$(date +%Y%m%d_%H%M%S)}
 
-    # Ask for user input to continue
-    read -p "Press Enter to continue..."
-done
+# Run every num_records value along with the profiler, reading each one from a dataset built once
+python3 -m src.orchestrator.orchestrator --sweep_name "$sweep_name" --cases "$case_name" --num_records "${num_records_list[@]}" --precompute
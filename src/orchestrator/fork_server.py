@@ -0,0 +1,219 @@
+"""
+Fork server running each test case in a fresh child of a pre-warmed process.
+
+Starting a test case with python -m imports pandas, NumPy and psutil and sets up logging before
+the case does anything, which the profiler records as CPU and memory noise. The fork server
+imports these modules once, then forks a child for each run, which executes the case module as
+__main__ with the modules already loaded. The children are separate processes, so the profiler
+and the resource usage returned by wait4 account each run on its own.
+
+Start the fork server with:
+
+    python3 -m src.orchestrator.fork_server
+
+and send it "run" messages with src.util.sockets.Client (the orchestrator does it with --fork_server).
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import resource
+import runpy
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Dict, List
+
+from src.util.logger import setup_logging
+from src.util.sockets.protocol import MessageDecoder, encode_message
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Address of the fork server
+FORK_SERVER_HOST = "127.0.0.1"
+FORK_SERVER_PORT = 8890
+
+# Modules imported by the fork server, so the children find them loaded
+PRELOAD_MODULES = ["numpy", "pandas", "psutil", "src.util.cache_data", "src.util.measurement", "src.util.serializers",
+                   "src.util.sockets", "src.util.spans", "src.test_cases.util", "src.test_cases.dataset",
+                   "src.test_cases.dataset_server", "src.test_cases.registry", "src.test_cases.runner"]
+
+# Fields of the resource usage of a child reported with its outcome
+RUSAGE_FIELDS = ["ru_utime", "ru_stime", "ru_maxrss", "ru_minflt", "ru_majflt", "ru_inblock", "ru_oublock",
+                 "ru_nvcsw", "ru_nivcsw"]
+
+class ForkServer:
+    def __init__(self, host: str = FORK_SERVER_HOST, port: int = FORK_SERVER_PORT, preload_modules: List[str] = None):
+        """
+        Initializes the ForkServer class.
+
+        This class serves a connection at a time from a single thread, since forking a process with
+        other threads may leave their locks held in the child. The messages are:
+            - run: Forks a child running the module with the arguments argv and the environment variables
+                   env, waits for it and answers its return code and resource usage. The child is killed
+                   after timeout seconds if given.
+            - ping: Answers an acknowledgement, to wait for the server to be ready.
+
+        Parameters:
+            host (str): The IP address of the server.
+            port (int): The port on which the server listens.
+            preload_modules (List[str]): Modules imported before forking the children.
+        """
+        self._host = host
+        self._port = port
+        self._preload_modules = PRELOAD_MODULES if preload_modules is None else preload_modules
+        self._server_socket = None
+
+    def _preload(self):
+        """
+        Imports the modules shared by the children.
+        """
+        start_time = time.perf_counter()
+        for module in self._preload_modules:
+            importlib.import_module(module)
+
+        # The objects of the modules are moved out of the collected generations, so the collections of
+        # the children do not write to their pages and copy them
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Preloaded {len(self._preload_modules)} modules in {time.perf_counter() - start_time:.2f} s.")
+
+    def _run_child(self, connection: socket.socket, module: str, argv: List[str], env: Dict[str, str]):
+        """
+        Runs a module as __main__ in the forked child and exits with its code. It never returns.
+
+        Parameters:
+            connection (socket.socket): The connection of the parent, closed in the child.
+            module (str): Name of the module.
+            argv (List[str]): Arguments of the module.
+            env (Dict[str, str]): Environment variables set for the module.
+        """
+        # The sockets and the signal handlers of the server belong to the parent
+        connection.close()
+        self._server_socket.close()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        os.environ.update(env)
+        sys.argv = [module, *argv]
+
+        exit_code = 0
+        try:
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+        except SystemExit as excep:
+            if isinstance(excep.code, int) or excep.code is None:
+                exit_code = excep.code or 0
+            else:
+                print(excep.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+        # Exit without running the cleanup of the parent, such as its atexit handlers
+        os._exit(exit_code)
+
+    def _run(self, connection: socket.socket, message: Dict) -> Dict:
+        """
+        Forks a child running a module and waits for it.
+
+        Parameters:
+            connection (socket.socket): The connection the message was received from.
+            message (Dict): The run message.
+
+        Returns:
+            Dict: The outcome of the run, with its return code, duration and resource usage.
+        """
+        timeout = message.get("timeout")
+        start_time = time.perf_counter()
+
+        pid = os.fork()
+        if pid == 0:
+            self._run_child(connection=connection, module=message["module"], argv=message.get("argv", []),
+                            env=message.get("env", {}))
+
+        # Poll the child, so it can be killed once the timeout expires
+        is_timeout = False
+        while True:
+            wait_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+            if wait_pid != 0:
+                break
+            if timeout is not None and time.perf_counter() - start_time > timeout:
+                is_timeout = True
+                os.kill(pid, signal.SIGKILL)
+                _, status, rusage = os.wait4(pid, 0)
+                break
+            time.sleep(0.005)
+
+        return {"type": "finished", "pid": pid, "returncode": os.waitstatus_to_exitcode(status), "timeout": is_timeout,
+                "duration": time.perf_counter() - start_time,
+                "rusage": {field: getattr(rusage, field) for field in RUSAGE_FIELDS},
+                # The children start with the memory of the server, counted in their maximum resident set size
+                "server_maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+    def _serve_connection(self, connection: socket.socket):
+        """
+        Answers the messages of a connection until it is closed.
+
+        Parameters:
+            connection (socket.socket): The connection.
+        """
+        decoder = MessageDecoder()
+        while True:
+            data = connection.recv(4096)
+            if not data:
+                return
+
+            for message in decoder.feed(data):
+                if message.get("type") == "run":
+                    logger.info(f"Running {message['module']} {' '.join(message.get('argv', []))}...")
+                    response = self._run(connection=connection, message=message)
+                else:
+                    response = {"type": "ack"}
+                connection.sendall(encode_message(response))
+
+    def run(self):
+        """
+        Serves the connections until the server is interrupted.
+        """
+        self._preload()
+
+        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_socket.bind((self._host, self._port))
+        self._server_socket.listen(5)
+        logger.info(f"Fork server listening on {self._host}:{self._port}.")
+
+        try:
+            while True:
+                connection, _ = self._server_socket.accept()
+                with connection:
+                    try:
+                        self._serve_connection(connection=connection)
+                    except (OSError, ValueError) as excep:
+                        logger.error(f"Closing a connection of the fork server: {excep}")
+        except KeyboardInterrupt:
+            logger.info("Stopping the fork server...")
+        finally:
+            self._server_socket.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the test cases in children of a pre-warmed process.")
+    parser.add_argument("--host", default=FORK_SERVER_HOST, help="IP address of the server.")
+    parser.add_argument("--port", type=int, default=FORK_SERVER_PORT, help="Port of the server.")
+    parser.add_argument("--preload_modules", nargs="*", default=None,
+                        help="Modules imported before forking the children. Default is PRELOAD_MODULES.")
+
+    args = parser.parse_args()
+
+    # Stop gracefully on SIGTERM as well
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    ForkServer(host=args.host, port=args.port, preload_modules=args.preload_modules).run()
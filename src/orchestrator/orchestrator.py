@@ -0,0 +1,390 @@
+import argparse
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.test_cases.dataset import materialize_dataset
+from src.test_cases.dataset_server import DATASET_SERVER_ENV, DATASET_SERVER_HOST, DATASET_SERVER_PORT
+from src.test_cases.synthetic import parse_synthetic_options
+from src.orchestrator.fork_server import FORK_SERVER_HOST, FORK_SERVER_PORT
+from src.util.logger import setup_logging
+from src.util.sockets.client import Client
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Address of the control server of the profiler
+PROFILER_HOST = "127.0.0.1"
+PROFILER_PORT = 8888
+
+# Folder containing the test cases, each case is named "<group>/<module>"
+TEST_CASES_FOLDER = Path(__file__).resolve().parents[1] / "test_cases"
+
+# Folder of the manifests recording the finished runs of each sweep
+SWEEPS_FOLDER = "results/sweeps"
+
+def discover_cases() -> list:
+    """
+    Lists the test cases available in the test cases folder.
+
+    Returns:
+        list: Names of the test cases ("<group>/<module>") sorted by name.
+    """
+    return sorted(f"{path.parent.name}/{path.stem}" for path in TEST_CASES_FOLDER.glob("*/*.py"))
+
+
+def case_to_module(case: str) -> str:
+    """
+    Converts the name of a test case to the name of its module.
+
+    Parameters:
+        case (str): Name of the test case ("<group>/<module>").
+
+    Returns:
+        str: Name of the module, to be run with python -m.
+    """
+    return "src.test_cases." + case.replace("/", ".")
+
+
+class SweepOrchestrator:
+    def __init__(self, sweep_name: str, cases: list, num_records_list: list, repetitions: int = 1, warmup: int = 0,
+                 repeat: int = 1, run_timeout: float = 600, ready_timeout: float = 30, profiler_args: list = None,
+                 use_profiler: bool = True, source: str = "json", precompute: bool = False,
+                 use_dataset_server: bool = False, use_fork_server: bool = False, synthetic_options: dict = None):
+        """
+        Initializes the SweepOrchestrator class.
+
+        This class runs every combination of cases, number of records and repetitions of a sweep.
+        For each run, a profiler is started and the case is launched only once the profiler answers
+        on its control socket, so the case does not race the profiler to connect. Each run is bounded
+        by a timeout and its outcome is appended to the manifest of the sweep, so an interrupted sweep
+        resumes by skipping the combinations that already finished.
+
+        Parameters:
+            sweep_name (str): Name of the sweep, it identifies its manifest.
+            cases (list): Names of the test cases ("<group>/<module>").
+            num_records_list (list): Numbers of records to run each case with.
+            repetitions (int): Number of runs of each combination, each one in a new process.
+            warmup (int): Number of warmup repetitions of the operation inside each run.
+            repeat (int): Number of measured repetitions of the operation inside each run.
+            run_timeout (float): Maximum duration of a run in seconds.
+            ready_timeout (float): Maximum time to wait for the profiler to be ready in seconds.
+            profiler_args (list): Additional arguments of the profiler.
+            use_profiler (bool): Whether to profile the runs.
+            source (str): Source of the user data of the test cases ("json" or "synthetic").
+            precompute (bool): Whether to materialize the dataset of the largest number of records before
+                               the runs, so every run reads a prefix of it (see src.test_cases.dataset).
+            use_dataset_server (bool): Whether to share the users with the runs through a dataset server, so
+                                       the runs of a number of records attach to them instead of loading them
+                                       (see src.test_cases.dataset_server).
+            use_fork_server (bool): Whether to run the cases in children forked from a process that already
+                                    imported pandas, instead of starting a new interpreter for each run
+                                    (see src.orchestrator.fork_server).
+            synthetic_options (dict): Options of generate_users passed to the cases, for the synthetic source.
+        """
+        self._sweep_name = sweep_name
+        self._cases = cases
+        self._num_records_list = num_records_list
+        self._repetitions = repetitions
+        self._warmup = warmup
+        self._repeat = repeat
+        self._run_timeout = run_timeout
+        self._ready_timeout = ready_timeout
+        self._profiler_args = profiler_args or []
+        self._use_profiler = use_profiler
+        self._source = source
+        self._precompute = precompute
+        self._use_dataset_server = use_dataset_server
+        self._use_fork_server = use_fork_server
+        self._synthetic_options = synthetic_options
+        self._case_env = {}
+        self._fork_client = None
+        self._manifest_path = os.path.join(SWEEPS_FOLDER, f"{sweep_name}.jsonl")
+
+    def _load_finished_runs(self) -> set:
+        """
+        Reads the manifest of the sweep to find the runs that already finished.
+
+        Returns:
+            set: Set of the run identifiers whose status is "ok".
+        """
+        finished_runs = set()
+        if not os.path.exists(self._manifest_path):
+            return finished_runs
+
+        with open(self._manifest_path, "r") as manifest_file:
+            for line in manifest_file:
+                # A sweep interrupted while writing may leave a truncated last line
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("status") == "ok":
+                    finished_runs.add(entry["run_id"])
+
+        return finished_runs
+
+    def _record_run(self, entry: dict):
+        """
+        Appends the outcome of a run to the manifest of the sweep.
+
+        Parameters:
+            entry (dict): Outcome of the run.
+        """
+        os.makedirs(SWEEPS_FOLDER, exist_ok=True)
+        with open(self._manifest_path, "a") as manifest_file:
+            manifest_file.write(json.dumps(entry) + "\n")
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+
+    def _start_profiler(self, profiled_file: str) -> subprocess.Popen:
+        """
+        Starts a profiler and waits until its control server answers.
+
+        Parameters:
+            profiled_file (str): Name of the profiled file, used to name the samples file.
+
+        Returns:
+            subprocess.Popen: The process of the profiler.
+        """
+        command = [sys.executable, "-m", "src.profiler.profiler", "--profiled_file", profiled_file,
+                   "--exit_after_program", *self._profiler_args]
+        profiler_process = subprocess.Popen(command)
+        self._wait_until_ready(process=profiler_process, host=PROFILER_HOST, port=PROFILER_PORT, name="profiler")
+        return profiler_process
+
+    def _wait_until_ready(self, process: subprocess.Popen, host: str, port: int, name: str):
+        """
+        Waits until a server started by the orchestrator answers a ping, stopping it if it does not.
+
+        Parameters:
+            process (subprocess.Popen): The process of the server.
+            host (str): The IP address of the server.
+            port (int): The port of the server.
+            name (str): Name of the server, used in the errors.
+        """
+        # Wait for the server to answer a ping instead of giving the case a fixed time to connect
+        deadline = time.monotonic() + self._ready_timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"The {name} exited with code {process.returncode} before being ready.")
+            try:
+                client = Client(host, port)
+                try:
+                    client.send_message(message={"type": "ping"})
+                finally:
+                    client.close()
+                return
+            except OSError:
+                time.sleep(0.1)
+
+        self._stop_process(process)
+        raise TimeoutError(f"The {name} was not ready after {self._ready_timeout} seconds.")
+
+    def _start_dataset_server(self) -> subprocess.Popen:
+        """
+        Starts a dataset server sharing the users with the cases of the sweep.
+
+        Returns:
+            subprocess.Popen: The process of the dataset server.
+        """
+        command = [sys.executable, "-m", "src.test_cases.dataset_server", "--host", DATASET_SERVER_HOST,
+                   "--port", str(DATASET_SERVER_PORT)]
+        server_process = subprocess.Popen(command)
+        self._wait_until_ready(process=server_process, host=DATASET_SERVER_HOST, port=DATASET_SERVER_PORT,
+                               name="dataset server")
+        return server_process
+
+    def _start_fork_server(self) -> subprocess.Popen:
+        """
+        Starts a fork server running the cases of the sweep and connects to it.
+
+        Returns:
+            subprocess.Popen: The process of the fork server.
+        """
+        command = [sys.executable, "-m", "src.orchestrator.fork_server", "--host", FORK_SERVER_HOST,
+                   "--port", str(FORK_SERVER_PORT)]
+        server_process = subprocess.Popen(command)
+        self._wait_until_ready(process=server_process, host=FORK_SERVER_HOST, port=FORK_SERVER_PORT,
+                               name="fork server")
+        self._fork_client = Client(FORK_SERVER_HOST, FORK_SERVER_PORT)
+        return server_process
+
+    @staticmethod
+    def _stop_process(process: subprocess.Popen, grace_period: float = 10):
+        """
+        Stops a process, first with SIGINT so it can write its outputs, then with SIGKILL.
+
+        Parameters:
+            process (subprocess.Popen): The process.
+            grace_period (float): Time to wait for the process to exit after SIGINT in seconds.
+        """
+        if process.poll() is not None:
+            return
+
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def _run_case(self, case: str, num_records: int, repetition: int, run_id: str) -> dict:
+        """
+        Runs a combination of the sweep along with its profiler.
+
+        Parameters:
+            case (str): Name of the test case.
+            num_records (int): Number of records.
+            repetition (int): Index of the repetition of the combination.
+            run_id (str): Identifier of the run.
+
+        Returns:
+            dict: Outcome of the run.
+        """
+        entry = {"run_id": run_id, "case": case, "num_records": num_records, "repetition": repetition,
+                 "start": datetime.now().isoformat(timespec="seconds")}
+        profiled_file = f"{case.replace('/', '_')}_{num_records}_{repetition}"
+
+        profiler_process = None
+        if self._use_profiler:
+            try:
+                profiler_process = self._start_profiler(profiled_file=profiled_file)
+            except (RuntimeError, TimeoutError) as excep:
+                logger.error(f"Could not start the profiler for {run_id}: {excep}")
+                return {**entry, "status": "profiler_error", "error": str(excep)}
+
+        case_args = ["--num_records", str(num_records), "--run_id", run_id, "--warmup", str(self._warmup),
+                     "--repeat", str(self._repeat), "--source", self._source]
+        if self._synthetic_options is not None:
+            case_args += ["--synthetic_options", json.dumps(self._synthetic_options)]
+        start_time = time.perf_counter()
+        if self._fork_client is not None:
+            # The fork server kills the case itself when the timeout expires
+            try:
+                outcome = self._fork_client.send_message(message={"type": "run", "module": case_to_module(case),
+                                                                  "argv": case_args, "env": self._case_env,
+                                                                  "timeout": self._run_timeout})
+            except OSError as excep:
+                logger.error(f"The fork server could not run {run_id}: {excep}")
+                outcome = {"timeout": False, "returncode": None, "error": str(excep)}
+
+            if outcome["timeout"]:
+                logger.error(f"The run {run_id} exceeded the timeout of {self._run_timeout} seconds.")
+                status = "timeout"
+            else:
+                status = "ok" if outcome["returncode"] == 0 else "failed"
+                entry["returncode"] = outcome["returncode"]
+            for key in ("error", "rusage", "server_maxrss"):
+                if key in outcome:
+                    entry[key] = outcome[key]
+        else:
+            command = [sys.executable, "-m", case_to_module(case), *case_args]
+            try:
+                case_process = subprocess.run(command, timeout=self._run_timeout, env={**os.environ, **self._case_env})
+                status = "ok" if case_process.returncode == 0 else "failed"
+                entry["returncode"] = case_process.returncode
+            except subprocess.TimeoutExpired:
+                # subprocess.run kills the case when the timeout expires
+                logger.error(f"The run {run_id} exceeded the timeout of {self._run_timeout} seconds.")
+                status = "timeout"
+        entry["duration"] = time.perf_counter() - start_time
+
+        if profiler_process is not None:
+            # The profiler stops by itself once the case finished, unless the case never attached to it
+            try:
+                profiler_process.wait(timeout=self._ready_timeout)
+            except subprocess.TimeoutExpired:
+                self._stop_process(profiler_process)
+
+        return {**entry, "status": status}
+
+    def run(self):
+        """
+        Runs the combinations of the sweep that did not finish yet.
+        """
+        finished_runs = self._load_finished_runs()
+        combinations = list(itertools.product(self._cases, self._num_records_list, range(self._repetitions)))
+        logger.info(f"Sweep {self._sweep_name}: {len(combinations)} runs, {len(finished_runs)} already finished.")
+
+        if self._precompute:
+            # The records are written as well when a test case works on dictionaries
+            materialize_dataset(num_records=max(self._num_records_list), source=self._source,
+                                synthetic_options=self._synthetic_options,
+                                records=any(case.endswith("dictionary") for case in self._cases))
+
+        server_processes = []
+        summary = {}
+        try:
+            if self._use_dataset_server:
+                server_processes.append(self._start_dataset_server())
+                self._case_env[DATASET_SERVER_ENV] = f"{DATASET_SERVER_HOST}:{DATASET_SERVER_PORT}"
+            if self._use_fork_server:
+                server_processes.append(self._start_fork_server())
+
+            for case, num_records, repetition in combinations:
+                run_id = f"{self._sweep_name}_{case.replace('/', '_')}_{num_records}_{repetition}"
+                if run_id in finished_runs:
+                    logger.info(f"Skipping {run_id}, it already finished.")
+                    continue
+
+                logger.info(f"Running {run_id}...")
+                entry = self._run_case(case=case, num_records=num_records, repetition=repetition, run_id=run_id)
+                self._record_run(entry=entry)
+                summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+        finally:
+            if self._fork_client is not None:
+                self._fork_client.close()
+                self._fork_client = None
+            # The dataset server removes its shared memory when it stops
+            for server_process in server_processes:
+                self._stop_process(server_process)
+
+        logger.info(f"Sweep {self._sweep_name} finished: {summary or 'nothing to run'}. "
+                    f"Results in results/execution_times.csv, runs in {self._manifest_path}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a sweep of test cases along with the profiler.")
+    parser.add_argument("--sweep_name", default=datetime.now().strftime("%Y%m%d_%H%M%S"),
+                        help="Name of the sweep. Reuse it to resume an interrupted sweep.")
+    parser.add_argument("--cases", nargs="+", default=None,
+                        help="Test cases to run (\"<group>/<module>\"). Default is every test case.")
+    parser.add_argument("--num_records", type=int, nargs="+",
+                        default=[100, 500, 1000, 10000, 100000, 200000, 500000, 1000000, 2000000],
+                        help="Numbers of records to run each case with.")
+    parser.add_argument("--repetitions", type=int, default=1, help="Number of runs of each combination.")
+    parser.add_argument("--warmup", type=int, default=0, help="Number of warmup repetitions inside each run.")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of measured repetitions inside each run.")
+    parser.add_argument("--run_timeout", type=float, default=600, help="Maximum duration of a run in seconds.")
+    parser.add_argument("--ready_timeout", type=float, default=30, help="Maximum time to wait for the profiler in seconds.")
+    parser.add_argument("--source", default="json", choices=["json", "synthetic"], help="Source of the user data.")
+    parser.add_argument("--synthetic_options", type=parse_synthetic_options, default=None,
+                        help="Options of generate_users for the synthetic source as a JSON object, "
+                             "such as '{\"skew\": \"zipf\", \"cardinalities\": {\"city\": 50000}}'.")
+    parser.add_argument("--precompute", action="store_true",
+                        help="Materialize the dataset of the largest number of records once before the runs.")
+    parser.add_argument("--dataset_server", action="store_true",
+                        help="Share the users with the runs through a dataset server instead of loading them in each run.")
+    parser.add_argument("--fork_server", action="store_true",
+                        help="Run the cases in children of a process that already imported pandas.")
+    parser.add_argument("--no_profiler", action="store_true", help="Run the cases without the profiler.")
+    parser.add_argument("--profiler_args", nargs=argparse.REMAINDER, default=[],
+                        help="Additional arguments of the profiler, must be the last option.")
+
+    args = parser.parse_args()
+
+    orchestrator = SweepOrchestrator(sweep_name=args.sweep_name, cases=args.cases or discover_cases(),
+                                     num_records_list=args.num_records, repetitions=args.repetitions,
+                                     warmup=args.warmup, repeat=args.repeat, run_timeout=args.run_timeout,
+                                     ready_timeout=args.ready_timeout, profiler_args=args.profiler_args,
+                                     use_profiler=not args.no_profiler, source=args.source,
+                                     precompute=args.precompute, use_dataset_server=args.dataset_server,
+                                     use_fork_server=args.fork_server, synthetic_options=args.synthetic_options)
+    orchestrator.run()
@@ -0,0 +1,570 @@
+import os
+import time
+
+import psutil
+
+from src.util.logger import setup_logging
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Order of the values returned by get_process_stats
+PROCESS_STATS = (
+    "rss", "uss", "pss", "cpu_user", "cpu_system", "num_threads", "ctx_switches_voluntary",
+    "ctx_switches_involuntary", "minor_faults", "major_faults", "read_bytes", "write_bytes"
+)
+
+# Bytes in a gigabyte
+GB = 1024 ** 3
+
+class PsutilBackend:
+    """
+    Sampler backend based on psutil.
+
+    This backend is portable and reports every stat, but each call allocates psutil named tuples
+    and makes several system calls.
+    """
+
+    name = "psutil"
+
+    def __init__(self):
+        """
+        Initializes the PsutilBackend class.
+        """
+        self._process = None
+
+    def get_num_cpu_cores(self) -> int:
+        """
+        Retrieves the number of logical CPU cores.
+
+        Returns:
+            int: Number of logical CPU cores.
+        """
+        return psutil.cpu_count(logical=True)
+
+    def get_cpu_usage_per_core(self) -> list:
+        """
+        Retrieves the CPU usage percentage for each core since the previous call without blocking.
+
+        Returns:
+            list: List of CPU usage percentages for each core.
+        """
+        return psutil.cpu_percent(interval=None, percpu=True)
+
+    def get_memory_usage(self) -> tuple:
+        """
+        Retrieves RAM and swap memory usage information.
+
+        Returns:
+            tuple: Tuple containing RAM usage percentage, used RAM in GB, swap usage percentage and used swap in GB.
+        """
+        ram = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        return ram.percent, ram.used / GB, swap.percent, swap.used / GB
+
+    def attach_process(self, pid: int):
+        """
+        Starts tracking a process.
+
+        Parameters:
+            pid (int): PID of the process.
+
+        Raises:
+            ProcessLookupError: If the process does not exist.
+        """
+        try:
+            self._process = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            raise ProcessLookupError(f"No process with PID {pid}")
+
+    def detach_process(self):
+        """
+        Stops tracking the process.
+        """
+        self._process = None
+
+    def is_process_running(self) -> bool:
+        """
+        Checks whether the tracked process is still running.
+
+        Returns:
+            bool: True if the process is running, False otherwise.
+        """
+        try:
+            return self._process.is_running() and self._process.status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
+
+    def get_process_stats(self):
+        """
+        Retrieves the stats of the tracked process.
+
+        Returns:
+            tuple: Values of the stats in the order of PROCESS_STATS, or None if unavailable.
+        """
+        process = self._process
+        try:
+            with process.oneshot():
+                memory = process.memory_full_info()
+                cpu_times = process.cpu_times()
+                num_threads = process.num_threads()
+                ctx_switches = process.num_ctx_switches()
+                try:
+                    io_counters = process.io_counters()
+                except (psutil.AccessDenied, AttributeError):
+                    io_counters = None
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            # The process finished between the running check and the measurement
+            return None
+        except psutil.AccessDenied:
+            logger.warning(f"Access denied to the stats of the process with PID {process.pid}")
+            return None
+
+        minor_faults, major_faults = self._get_page_faults(pid=process.pid)
+
+        return (
+            memory.rss / GB,
+            getattr(memory, "uss", 0) / GB,
+            getattr(memory, "pss", 0) / GB,
+            cpu_times.user,
+            cpu_times.system,
+            num_threads,
+            ctx_switches.voluntary,
+            ctx_switches.involuntary,
+            minor_faults,
+            major_faults,
+            io_counters.read_bytes if io_counters else None,
+            io_counters.write_bytes if io_counters else None
+        )
+
+    def _get_page_faults(self, pid: int):
+        """
+        Retrieves the page faults of a process from /proc/<pid>/stat.
+
+        psutil does not expose page faults on Linux, so they are read directly from procfs.
+
+        Parameters:
+            pid (int): PID of the process.
+
+        Returns:
+            tuple: Tuple containing the minor and major page faults, or (None, None) if unavailable.
+        """
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            return None, None
+
+        # The process name may contain spaces, so the fields are split after its closing parenthesis
+        fields = stat[stat.rfind(b")") + 2:].split()
+        return int(fields[7]), int(fields[9])
+
+    def close(self):
+        """
+        Releases the resources of the backend.
+        """
+        self.detach_process()
+
+
+class ProcfsBackend:
+    """
+    Sampler backend reading procfs directly (Linux only).
+
+    The files are opened once and re-read with os.preadv into preallocated buffers, so a sample
+    costs one system call per file and no psutil objects. The unique and proportional set size
+    require walking the page tables of the process, so they are only reported by the psutil backend.
+
+    The CPU times and /proc/<pid>/stat|statm are read on every sample. /proc/meminfo and
+    /proc/<pid>/status|io are the most expensive to parse and change slowly, so they are re-read
+    at most every slow_interval seconds and their last values are repeated in between.
+    """
+
+    name = "procfs"
+
+    # Size of the buffers, increased automatically if a file does not fit
+    BUFFER_SIZE = 64 * 1024
+
+    # Minimum time between two reads of the slowly sampled files in seconds
+    SLOW_INTERVAL = 0.01
+
+    def __init__(self, slow_interval: float = SLOW_INTERVAL):
+        """
+        Initializes the ProcfsBackend class.
+
+        Parameters:
+            slow_interval (float): Minimum time between two reads of /proc/meminfo and /proc/<pid>/status|io
+                                   in seconds. 0 reads them on every sample.
+        """
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._slow_interval = slow_interval
+
+        self._files = {}
+        self._buffers = {}
+        self._open_file("stat", "/proc/stat")
+        self._open_file("meminfo", "/proc/meminfo")
+
+        # Last values of the slowly sampled files and the time they were read at
+        self._memory_usage = None
+        self._memory_usage_time = None
+        self._process_slow_stats = None
+        self._process_slow_stats_time = None
+
+        # Fields of /proc/<pid>/stat read by is_process_running, reused by the next get_process_stats
+        self._process_stat_fields = None
+
+        # CPU times of the previous call to compute the usage deltas
+        self._last_cpu_times = self._read_cpu_times()
+
+    def _open_file(self, key: str, path: str):
+        """
+        Opens a procfs file and allocates its read buffer.
+
+        Parameters:
+            key (str): Key used to refer to the file.
+            path (str): Path of the file.
+        """
+        self._files[key] = os.open(path, os.O_RDONLY)
+        self._buffers[key] = bytearray(self.BUFFER_SIZE)
+
+    def _close_file(self, key: str):
+        """
+        Closes a procfs file opened with _open_file.
+
+        Parameters:
+            key (str): Key used to refer to the file.
+        """
+        file_descriptor = self._files.pop(key, None)
+        self._buffers.pop(key, None)
+        if file_descriptor is not None:
+            os.close(file_descriptor)
+
+    def _read_file(self, key: str) -> tuple:
+        """
+        Re-reads the whole content of a procfs file into its buffer.
+
+        The content is not copied out of the buffer: the parsers search it within the bounds of the
+        content and only copy the fields they convert.
+
+        Parameters:
+            key (str): Key used to refer to the file.
+
+        Returns:
+            tuple: Tuple containing the buffer and the number of bytes of the content at its start. The
+                   buffer is overwritten by the next read of the file.
+        """
+        buffer = self._buffers[key]
+        num_bytes = os.preadv(self._files[key], [buffer], 0)
+
+        # The file may not fit in the buffer, grow it and read again
+        while num_bytes == len(buffer):
+            buffer = self._buffers[key] = bytearray(2 * len(buffer))
+            num_bytes = os.preadv(self._files[key], [buffer], 0)
+
+        return buffer, num_bytes
+
+    @staticmethod
+    def _parse_field(content: tuple, key: bytes):
+        """
+        Parses the integer value following a key in the content of a procfs file.
+
+        Looking the key up directly avoids splitting the whole file into lines on every sample.
+
+        Parameters:
+            content (tuple): Buffer and number of bytes of the content of the file, as returned by _read_file.
+            key (bytes): Key preceding the value, including the leading newline so that it only matches
+                         at the beginning of a line.
+
+        Returns:
+            int: Value of the field, or None if the key is not in the content.
+        """
+        buffer, size = content
+
+        # The first line of the file is not preceded by a newline
+        if buffer.startswith(key[1:], 0, size):
+            start = len(key) - 1
+        else:
+            start = buffer.find(key, 0, size)
+            if start == -1:
+                return None
+            start += len(key)
+
+        end = buffer.find(b"\n", start, size)
+        return int(buffer[start:end if end != -1 else size].split()[0])
+
+    def _is_slow_read_due(self, last_time: float) -> bool:
+        """
+        Checks whether a slowly sampled file should be read again.
+
+        Parameters:
+            last_time (float): Time of the previous read (time.perf_counter), or None if it was never read.
+
+        Returns:
+            bool: True if the file was never read or slow_interval elapsed since the previous read.
+        """
+        return last_time is None or time.perf_counter() - last_time >= self._slow_interval
+
+    def _read_cpu_times(self) -> list:
+        """
+        Reads the busy and total CPU times of each core from /proc/stat.
+
+        Returns:
+            list: List of tuples containing the busy and total times of each core.
+        """
+        stat, size = self._read_file("stat")
+
+        # Skip the aggregated "cpu " line, the per core lines "cpuN ..." follow it. The lines after them
+        # (such as the long "intr" line) are not split.
+        cpu_times = []
+        start = stat.find(b"\n", 0, size) + 1
+        while stat.startswith(b"cpu", start, size):
+            end = stat.find(b"\n", start, size)
+
+            # user nice system idle iowait irq softirq steal, guest times are already included in user and nice
+            times = [int(value) for value in stat[start:end].split()[1:9]]
+            total = sum(times)
+            cpu_times.append((total - times[3] - times[4], total))
+            start = end + 1
+
+        return cpu_times
+
+    def get_num_cpu_cores(self) -> int:
+        """
+        Retrieves the number of logical CPU cores.
+
+        Returns:
+            int: Number of logical CPU cores.
+        """
+        return len(self._last_cpu_times)
+
+    def get_cpu_usage_per_core(self) -> list:
+        """
+        Retrieves the CPU usage percentage for each core since the previous call without blocking.
+
+        Returns:
+            list: List of CPU usage percentages for each core.
+        """
+        cpu_times = self._read_cpu_times()
+
+        cpu_percentages = []
+        for (busy, total), (last_busy, last_total) in zip(cpu_times, self._last_cpu_times):
+            total_delta = total - last_total
+            cpu_percentages.append(round(100 * (busy - last_busy) / total_delta, 1) if total_delta > 0 else 0.0)
+
+        self._last_cpu_times = cpu_times
+        return cpu_percentages
+
+    def get_memory_usage(self) -> tuple:
+        """
+        Retrieves RAM and swap memory usage information from /proc/meminfo, read at most every slow_interval.
+
+        The values are computed in the same way as psutil does on Linux.
+
+        Returns:
+            tuple: Tuple containing RAM usage percentage, used RAM in GB, swap usage percentage and used swap in GB.
+        """
+        if not self._is_slow_read_due(self._memory_usage_time):
+            return self._memory_usage
+
+        self._memory_usage_time = time.perf_counter()
+        self._memory_usage = self._read_memory_usage()
+        return self._memory_usage
+
+    def _read_memory_usage(self) -> tuple:
+        """
+        Reads RAM and swap memory usage information from /proc/meminfo.
+
+        Returns:
+            tuple: Tuple containing RAM usage percentage, used RAM in GB, swap usage percentage and used swap in GB.
+        """
+        meminfo = self._read_file("meminfo")
+        ram_total = self._parse_field(meminfo, b"\nMemTotal:")
+        ram_free = self._parse_field(meminfo, b"\nMemFree:")
+        ram_available = self._parse_field(meminfo, b"\nMemAvailable:")
+        ram_buffers = self._parse_field(meminfo, b"\nBuffers:") or 0
+        ram_cached = (self._parse_field(meminfo, b"\nCached:") or 0) + (self._parse_field(meminfo, b"\nSReclaimable:") or 0)
+        swap_total = self._parse_field(meminfo, b"\nSwapTotal:") or 0
+        swap_free = self._parse_field(meminfo, b"\nSwapFree:") or 0
+
+        # The values are in kB
+        if ram_available is None:
+            ram_available = ram_free
+        ram_used = ram_total - ram_free - ram_buffers - ram_cached
+        if ram_used < 0:
+            ram_used = ram_total - ram_free
+        ram_percent = round(100 * (ram_total - ram_available) / ram_total, 1)
+
+        swap_used = swap_total - swap_free
+        swap_percent = round(100 * swap_used / swap_total, 1) if swap_total > 0 else 0.0
+
+        return ram_percent, ram_used * 1024 / GB, swap_percent, swap_used * 1024 / GB
+
+    def attach_process(self, pid: int):
+        """
+        Starts tracking a process by opening its procfs files.
+
+        The open descriptors keep referring to the same process, so a reused PID is never mistaken for it.
+
+        Parameters:
+            pid (int): PID of the process.
+
+        Raises:
+            ProcessLookupError: If the process does not exist.
+        """
+        self.detach_process()
+        try:
+            self._open_file("pid_stat", f"/proc/{pid}/stat")
+            self._open_file("pid_statm", f"/proc/{pid}/statm")
+            self._open_file("pid_status", f"/proc/{pid}/status")
+        except FileNotFoundError:
+            self.detach_process()
+            raise ProcessLookupError(f"No process with PID {pid}")
+
+        # The I/O counters are only readable by the owner of the process
+        try:
+            self._open_file("pid_io", f"/proc/{pid}/io")
+        except OSError:
+            logger.warning(f"The I/O counters of the process with PID {pid} are not available")
+
+    def detach_process(self):
+        """
+        Stops tracking the process and closes its procfs files.
+        """
+        for key in ("pid_stat", "pid_statm", "pid_status", "pid_io"):
+            self._close_file(key)
+
+        self._process_slow_stats = None
+        self._process_slow_stats_time = None
+        self._process_stat_fields = None
+
+    def _read_process_stat(self):
+        """
+        Reads the fields of /proc/<pid>/stat after the process name.
+
+        Returns:
+            list: Fields of the file starting with the state, or None if the process finished.
+        """
+        try:
+            stat, size = self._read_file("pid_stat")
+        except (OSError, KeyError):
+            return None
+
+        if size == 0:
+            return None
+
+        # The process name may contain spaces, so the fields are split after its closing parenthesis
+        return stat[stat.rfind(b")", 0, size) + 2:size].split()
+
+    def is_process_running(self) -> bool:
+        """
+        Checks whether the tracked process is still running.
+
+        Returns:
+            bool: True if the process is running, False otherwise.
+        """
+        fields = self._read_process_stat()
+
+        # The sampler reads the stats right after checking the process, so the fields are kept for them
+        self._process_stat_fields = fields
+        return fields is not None and fields[0] != b"Z"
+
+    def _read_process_slow_stats(self) -> tuple:
+        """
+        Reads the context switches from /proc/<pid>/status and the I/O counters from /proc/<pid>/io.
+
+        Returns:
+            tuple: Tuple containing the voluntary and involuntary context switches and the read and written
+                   bytes (None if the I/O counters are not available).
+
+        Raises:
+            OSError: If the process finished.
+        """
+        status = self._read_file("pid_status")
+        ctx_switches_voluntary = self._parse_field(status, b"\nvoluntary_ctxt_switches:")
+        ctx_switches_involuntary = self._parse_field(status, b"\nnonvoluntary_ctxt_switches:")
+
+        read_bytes = write_bytes = None
+        if "pid_io" in self._files:
+            io = self._read_file("pid_io")
+            read_bytes = self._parse_field(io, b"\nread_bytes:")
+            write_bytes = self._parse_field(io, b"\nwrite_bytes:")
+
+        return ctx_switches_voluntary, ctx_switches_involuntary, read_bytes, write_bytes
+
+    def get_process_stats(self):
+        """
+        Retrieves the stats of the tracked process.
+
+        The context switches and the I/O counters are read at most every slow_interval.
+
+        Returns:
+            tuple: Values of the stats in the order of PROCESS_STATS, or None if unavailable.
+        """
+        fields = self._process_stat_fields
+        self._process_stat_fields = None
+        if fields is None:
+            fields = self._read_process_stat()
+        if fields is None:
+            return None
+
+        try:
+            statm, size = self._read_file("pid_statm")
+            resident_pages = int(statm[:size].split()[1])
+
+            if self._is_slow_read_due(self._process_slow_stats_time):
+                self._process_slow_stats_time = time.perf_counter()
+                self._process_slow_stats = self._read_process_slow_stats()
+        except (OSError, KeyError):
+            # The process finished between the reads
+            return None
+        ctx_switches_voluntary, ctx_switches_involuntary, read_bytes, write_bytes = self._process_slow_stats
+
+        # Fields of /proc/<pid>/stat are numbered from 1, the list starts at field 3 (state)
+        return (
+            resident_pages * self._page_size / GB,
+            None,
+            None,
+            int(fields[11]) / self._clock_ticks,
+            int(fields[12]) / self._clock_ticks,
+            int(fields[17]),
+            ctx_switches_voluntary,
+            ctx_switches_involuntary,
+            int(fields[7]),
+            int(fields[9]),
+            read_bytes,
+            write_bytes
+        )
+
+    def close(self):
+        """
+        Closes every procfs file of the backend.
+        """
+        for key in list(self._files):
+            self._close_file(key)
+
+
+# Available backends by name
+BACKENDS = {
+    PsutilBackend.name: PsutilBackend,
+    ProcfsBackend.name: ProcfsBackend,
+}
+
+def create_backend(name: str = "auto"):
+    """
+    Creates a sampler backend.
+
+    Parameters:
+        name (str): Name of the backend ("auto", "procfs" or "psutil"). "auto" selects procfs
+                    when it is available and falls back to psutil otherwise.
+
+    Returns:
+        The sampler backend.
+    """
+    if name == "auto":
+        name = ProcfsBackend.name if os.path.isfile("/proc/stat") and hasattr(os, "preadv") else PsutilBackend.name
+
+    if name not in BACKENDS:
+        raise ValueError(f"Invalid backend '{name}'. Please choose one of: auto, {', '.join(BACKENDS)}.")
+
+    logger.info(f"Using the {name} sampler backend")
+    return BACKENDS[name]()
@@ -1,19 +1,38 @@
 import argparse
 import csv
 import os
-import psutil
 import time
 
 from datetime import datetime
 
+from src.profiler.backends import create_backend
+from src.profiler.sampler import FixedRateSampler
+from src.profiler.storage import SAMPLES_EXTENSION, SampleRingBuffer, export_to_csv
 from src.util.logger import setup_logging
 from src.util.sockets import Server
+from src.util.sockets.protocol import CONNECTED_MESSAGE, DISCONNECTED_MESSAGE
 
 # Set up the logging configuration
 logger = setup_logging()
 
+# File where the execution times reported by the profiled programs are appended
+EXECUTION_TIMES_FILE_PATH = "results/execution_times.csv"
+# Statistics of the repetitions reported along with the execution time
+EXECUTION_STATISTICS = ["repeat", "outliers", "min", "median", "iqr", "ci_low", "ci_high", "cpu_median",
+                        "per_record_ns"]
+# Columns of the execution times file
+EXECUTION_TIMES_HEADER = ["filename", "records", "time", "run_id", "case"] + EXECUTION_STATISTICS
+# Fields required by each type of control message, with their accepted types
+REQUIRED_FIELDS = {
+    "start": {"pid": int},
+    "phase": {"name": str, "start_ns": int, "end_ns": int},
+    "result": {"execution_time_ns": (int, float)}
+}
+
 class SystemStatsCollector:
-    def __init__(self, csv_file_path: str, file_profiled: str):
+    def __init__(self, csv_file_path: str, file_profiled: str, per_process: bool = False, sample_rate: float = 10,
+                 active_sample_rate: float = 100, backend: str = "auto", export_csv: bool = False,
+                 exit_after_program: bool = False, tail_duration: float = 1.0):
         """
         Initializes the SystemStatsCollector class.
 
@@ -22,15 +41,55 @@ class SystemStatsCollector:
             - CPU usage per core (%)
             - Usage of physical RAM (%, GB)
             - Usage of swap memory (%, GB)
+
+        When per_process is enabled, the stats of the profiled process are also measured:
+            - Resident, unique and proportional set size (GB)
+            - User and system CPU time (s)
+            - Number of threads
+            - Voluntary and involuntary context switches
+            - Minor and major page faults
+            - Read and written bytes
+
+        The stats are sampled from a background thread at sample_rate, which switches to
+        active_sample_rate while the profiled program is running. The samples are stored in a
+        binary file that can be loaded with src.profiler.storage.load_samples or exported to CSV.
+
+        Parameters:
+            csv_file_path (str): Prefix of the file for storing the stats.
+            file_profiled (str): Name of the program to profile.
+            per_process (bool): Whether to also measure the stats of the profiled process.
+            sample_rate (float): Sampling rate in Hz while the profiled program is not running.
+            active_sample_rate (float): Sampling rate in Hz while the profiled program is running.
+            backend (str): Name of the backend used to read the stats ("auto", "procfs" or "psutil").
+            export_csv (bool): Whether to export the samples to a CSV file when the profiler stops.
+            exit_after_program (bool): Whether to stop profiling once the profiled program finishes.
+            tail_duration (float): Time to keep profiling after the profiled program finishes in seconds,
+                                   when exit_after_program is enabled.
         """
         # Get the current date and time as a string
         current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        self._start_time = time.time()
-        self._csv_file_name = f"{csv_file_path}_{file_profiled}_{current_datetime}"
-        self._csv_file_path = f"results/{self._csv_file_name}.csv"
-        self._num_cpu_cores = psutil.cpu_count(logical=False)
+        self._start_time = time.perf_counter()
+        self._file_name = f"{csv_file_path}_{file_profiled}_{current_datetime}"
+        self._samples_file_path = f"results/{self._file_name}{SAMPLES_EXTENSION}"
+        self._export_csv = export_csv
+        self._exit_after_program = exit_after_program
+        self._tail_duration = tail_duration
+        self._stop_time = None
+        self._backend = create_backend(name=backend)
+        # The per core usage is reported for each logical core
+        self._num_cpu_cores = self._backend.get_num_cpu_cores()
         self._file_profiled = file_profiled
+        self._per_process = per_process
+        self._profiled_pid = None
+        self._run_id = None
+        self._case = None
+        self._num_records = None
+        self._last_state = False
+        self._samples = None
+        self._sampler = FixedRateSampler(sample_function=self._take_sample, sample_rate=sample_rate,
+                                         active_sample_rate=active_sample_rate,
+                                         is_active=lambda: self._profiled_pid is not None)
         self._socket_server = Server("127.0.0.1", 8888)
 
         # Constants
@@ -42,175 +101,338 @@ class SystemStatsCollector:
         self._col_name_disk_swap_usage = "disk_swap_usage"
         self._col_name_disk_swap_used = "disk_swap_used"
         self._col_name_program_running = "program_running"
-
-    def is_program_running(self, program_name: str, last_state: bool) -> bool:
+        self._col_name_process_rss = "process_rss"
+        self._col_name_process_uss = "process_uss"
+        self._col_name_process_pss = "process_pss"
+        self._col_name_process_cpu_user = "process_cpu_user"
+        self._col_name_process_cpu_system = "process_cpu_system"
+        self._col_name_process_num_threads = "process_num_threads"
+        self._col_name_process_ctx_switches_voluntary = "process_ctx_switches_voluntary"
+        self._col_name_process_ctx_switches_involuntary = "process_ctx_switches_involuntary"
+        self._col_name_process_minor_faults = "process_minor_faults"
+        self._col_name_process_major_faults = "process_major_faults"
+        self._col_name_process_read_bytes = "process_read_bytes"
+        self._col_name_process_write_bytes = "process_write_bytes"
+        self._col_name_process = [
+            self._col_name_process_rss, self._col_name_process_uss, self._col_name_process_pss,
+            self._col_name_process_cpu_user, self._col_name_process_cpu_system, self._col_name_process_num_threads,
+            self._col_name_process_ctx_switches_voluntary, self._col_name_process_ctx_switches_involuntary,
+            self._col_name_process_minor_faults, self._col_name_process_major_faults,
+            self._col_name_process_read_bytes, self._col_name_process_write_bytes
+        ]
+        self._col_names = [self._col_name_timestamp, self._col_name_cpu_usage] + self._col_name_cpu_cores + [
+            self._col_name_ram_usage, self._col_name_ram_used, self._col_name_disk_swap_usage, self._col_name_disk_swap_used,
+            self._col_name_program_running
+        ]
+        if self._per_process:
+            self._col_names += self._col_name_process
+
+    def is_program_running(self, last_state: bool) -> bool:
         """
-        Check if a program with a specific name is currently running.
+        Check if the profiled program is currently running.
+
+        The profiled program announces itself by sending a start message with its PID through the socket.
+        Once received, the process is tracked through the sampler backend, so checking whether it is
+        still running does not require scanning the process table.
 
         Parameters:
-            program_name (str): The name of the program to check.
             last_state (bool): Last state of the program execution detection.
 
         Returns:
             bool: True if the program is running, False otherwise.
         """
-        is_running = False
-
-        # Iterate through the list of processes and retrieve their PIDs and names
-        for process in psutil.process_iter(["pid", "name"]):
-            cmd_arguments = process.cmdline()
-            # Check if the process has command line arguments
-            if len(cmd_arguments) > 0:
-                # Check if the process is a Python script
-                is_python = cmd_arguments[0].find("python") != -1
-
-                if is_python:
-                    # Extract the script name if it"s a Python script
-                    if cmd_arguments[1] == "-m":
-                        script_name = cmd_arguments[2]
-                    else:
-                        script_name = cmd_arguments[1]
-
-                    # Check if the script name matches the specified program name
-                    if script_name.find(program_name) != -1:
-                        is_running = True
-                        if last_state == False:
-                            logger.info(f"The program {program_name} was detected...")
-                            self._socket_server.wait_for_message(expected_message="start")
-                            self._socket_server.stop_server()
+        if self._profiled_pid is None:
+            return False
+
+        # Check the tracked process
+        is_running = self._backend.is_process_running()
+
+        if not is_running:
+            if last_state:
+                logger.info(f"The program {self._file_profiled} finished...")
+            if self._exit_after_program:
+                self._stop_time = time.perf_counter() + self._tail_duration
+            self._backend.detach_process()
+            self._profiled_pid = None
 
         return is_running
-    
-    def _get_overall_cpu_usage(self):
+
+    def _process_control_messages(self):
+        """
+        Handles the messages received by the control server since the previous sample.
+
+        Every message is recorded as an event on the timeline of the samples. The start message
+        is acknowledged once the program is attached, so the program does not start its operation
+        before the profiler tracks it.
+        """
+        for timestamp, connection_id, message in self._socket_server.get_messages():
+            # Messages that are not objects are recorded without their content
+            if not isinstance(message, dict):
+                self._samples.append_event(timestamp=timestamp - self._start_time, connection=connection_id,
+                                           type="invalid")
+                self._send_error(connection_id=connection_id, error=f"The message is not an object: {message!r}")
+                continue
+
+            message_type = message.get("type")
+            # The timestamp and connection of the event are set by the profiler
+            fields = {key: value for key, value in message.items() if key not in ("timestamp", "connection")}
+            self._samples.append_event(timestamp=timestamp - self._start_time, connection=connection_id, **fields)
+
+            if message_type in (CONNECTED_MESSAGE, DISCONNECTED_MESSAGE):
+                continue
+
+            error = self._validate_message(message=message)
+            if error is None:
+                if message_type == "ping":
+                    # Used by the orchestrator to wait until the profiler is ready
+                    pass
+                elif message_type == "start":
+                    error = self._attach_to_program(message=message)
+                elif message_type == "phase":
+                    self._record_phase(message=message)
+                elif message_type == "result":
+                    error = self._write_execution_time(message=message)
+                else:
+                    error = "Unexpected message."
+
+            if error is not None:
+                self._send_error(connection_id=connection_id, error=error)
+                continue
+
+            self._socket_server.send(connection_id=connection_id, message={"type": "ack"})
+
+    @staticmethod
+    def _validate_message(message: dict):
         """
-        Retrieves the overall CPU usage percentage.
+        Checks that a control message has the fields required by its type.
+
+        Parameters:
+            message (dict): The control message.
 
         Returns:
-            float: Overall CPU usage percentage.
+            str: The error found in the message, or None if it is valid.
+        """
+        for field, field_type in REQUIRED_FIELDS.get(message.get("type"), {}).items():
+            value = message.get(field)
+            # Booleans are integers in Python, but never a valid PID or time
+            if not isinstance(value, field_type) or isinstance(value, bool):
+                return f"The {message['type']} message requires the field {field!r}, got {value!r}."
+
+        return None
+
+    def _send_error(self, connection_id, error: str):
+        """
+        Logs an error of a control message and sends it back to the client, so it does not wait for an ack.
+
+        Parameters:
+            connection_id: The connection of the client.
+            error (str): The error.
         """
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        return cpu_percent
+        logger.warning(error)
+        self._socket_server.send(connection_id=connection_id, message={"type": "error", "error": error})
 
-    def _get_cpu_usage_per_core(self):
+    def _attach_to_program(self, message: dict):
         """
-        Retrieves the CPU usage percentage for each core.
+        Attaches the collector to the process announced in the start message.
+
+        Parameters:
+            message (dict): Start message with the PID of the program and optionally the run ID,
+                            the name of the test case and the number of records.
 
         Returns:
-            list: List of CPU usage percentages for each core.
+            str: The error if the program could not be attached, or None once it is attached.
+        """
+        pid = message["pid"]
+        self._run_id = message.get("run_id")
+        self._case = message.get("case")
+        self._num_records = message.get("num_records")
+
+        try:
+            self._backend.attach_process(pid=pid)
+            self._profiled_pid = pid
+            logger.info(f"The program {self._file_profiled} was detected with PID {pid} (run ID: {self._run_id})...")
+        except (ProcessLookupError, PermissionError) as error:
+            return f"The program {self._file_profiled} with PID {pid} could not be attached: {error!r}"
+
+        return None
+
+    def _record_phase(self, message: dict):
         """
-        cpu_percentages = psutil.cpu_percent(interval=0.1, percpu=True)
-        return cpu_percentages
+        Records the boundaries of a phase of the profiled program as events on the timeline of the samples.
+
+        The boundaries are taken with time.perf_counter_ns by the program, which uses the same clock as the profiler.
+
+        Parameters:
+            message (dict): Phase message with the name of the phase, its boundaries in nanoseconds and
+                            optionally additional metrics.
+        """
+        self._samples.append_event(timestamp=message["start_ns"] / 1e9 - self._start_time, type="phase_start",
+                                   name=message["name"])
+
+        # The additional metrics of the phase are known once it ends
+        metrics = {key: value for key, value in message.items()
+                   if key not in ("type", "name", "start_ns", "end_ns", "timestamp")}
+        self._samples.append_event(timestamp=message["end_ns"] / 1e9 - self._start_time, type="phase_end",
+                                   name=message["name"], **metrics)
 
-    def _get_ram_usage(self):
+    def _write_execution_time(self, message: dict):
         """
-        Retrieves RAM usage information.
+        Appends the execution time reported by the profiled program to "results/execution_times.csv".
+
+        A file written with other columns, e.g. by an older version of the profiler, is not appended
+        to. It is renamed with the time of its last modification and a new file is started.
+
+        Parameters:
+            message (dict): Result message with the execution time in nanoseconds and optionally
+                            the statistics of its repetitions.
 
         Returns:
-            tuple: Tuple containing RAM usage percentage and used RAM in bytes.
+            str: The error if the execution time could not be written, or None once it is written.
         """
-        ram = psutil.virtual_memory()
-        return ram.percent, ram.used / (1024 ** 3)
+        execution_time = message["execution_time_ns"] / 1e9
+        logger.info(f"The program {self._file_profiled} reported an execution time of {execution_time} seconds")
+
+        try:
+            self._rotate_execution_times()
+            is_file_empty = not os.path.isfile(EXECUTION_TIMES_FILE_PATH) or os.path.getsize(EXECUTION_TIMES_FILE_PATH) == 0
+
+            with open(EXECUTION_TIMES_FILE_PATH, mode="a", newline="") as exec_times_file:
+                exec_times_writer = csv.writer(exec_times_file)
+
+                # If the file doesn't exist or is empty, write header
+                if is_file_empty:
+                    exec_times_writer.writerow(EXECUTION_TIMES_HEADER)
 
-    def _get_disk_usage(self):
+                # Write the data
+                exec_times_writer.writerow([self._file_name, self._num_records, execution_time, self._run_id,
+                                            self._case] + [message.get(statistic) for statistic in EXECUTION_STATISTICS])
+        except OSError as error:
+            return f"The execution time could not be written to {EXECUTION_TIMES_FILE_PATH}: {error!r}"
+
+        return None
+
+    @staticmethod
+    def _rotate_execution_times():
+        """
+        Renames the execution times file if its header is not EXECUTION_TIMES_HEADER.
+        """
+        if not os.path.isfile(EXECUTION_TIMES_FILE_PATH):
+            return
+
+        with open(EXECUTION_TIMES_FILE_PATH, newline="") as exec_times_file:
+            header = next(csv.reader(exec_times_file), None)
+
+        # An empty file only gets the header
+        if header is None or header == EXECUTION_TIMES_HEADER:
+            return
+
+        modified_time = datetime.fromtimestamp(os.path.getmtime(EXECUTION_TIMES_FILE_PATH)).strftime("%Y%m%d_%H%M%S")
+        root, extension = os.path.splitext(EXECUTION_TIMES_FILE_PATH)
+        rotated_file_path = f"{root}_{modified_time}{extension}"
+        os.replace(EXECUTION_TIMES_FILE_PATH, rotated_file_path)
+        logger.warning(f"{EXECUTION_TIMES_FILE_PATH} has other columns, it was moved to {rotated_file_path}")
+
+    def _get_process_stats(self):
         """
-        Retrieves disk usage information.
+        Retrieves the stats of the profiled process.
 
         Returns:
-            tuple: Tuple containing disk usage percentage and used disk space in bytes.
+            tuple: Values of the process stats in the order of their columns. None if no process is being profiled.
         """
-        disk = psutil.swap_memory()
-        return disk.percent, disk.used / (1024 ** 3)
+        process_stats = None
+        if self._profiled_pid is not None:
+            process_stats = self._backend.get_process_stats()
+
+        if process_stats is None:
+            return (None,) * len(self._col_name_process)
 
-    def measure_and_write_stats_to_csv(self):
+        return process_stats
+
+    def _take_sample(self):
+        """
+        Measures the system statistics once and appends them to the samples buffer.
+        """
+        # Handle the control messages and verify if program is running
+        self._process_control_messages()
+        is_running = self.is_program_running(last_state=self._last_state)
+        self._last_state = is_running
+        # Get system statistics
+        cpu_usage_per_core = self._backend.get_cpu_usage_per_core()
+        overall_cpu_usage = sum(cpu_usage_per_core) / len(cpu_usage_per_core)
+        ram_percent, ram_used, disk_percent, disk_used = self._backend.get_memory_usage()
+        timestamp = time.perf_counter() - self._start_time
+
+        # Build the row data in the order of the columns
+        row_data = [timestamp, overall_cpu_usage]
+        row_data += cpu_usage_per_core
+        row_data += [ram_percent, ram_used, disk_percent, disk_used, is_running]
+
+        # Add the stats of the profiled process next to the system ones
+        if self._per_process:
+            row_data += self._get_process_stats()
+
+        self._samples.append(row_data)
+
+        # Stop once the tail after the profiled program is recorded
+        if self._stop_time is not None and time.perf_counter() >= self._stop_time:
+            logger.info("Stopping the profiler after the program finished...")
+            self._sampler.request_stop()
+
+    def measure_and_write_stats(self):
         """
-        Measures system statistics and writes them to a CSV file.
+        Measures system statistics and writes them to a binary samples file.
         """
         logger.info("Profiling system state before program execution...")
-        with open(self._csv_file_path, mode="w", newline="") as csv_file:
-            # Combine all column names into a single list for fieldnames
-            fieldnames = [self._col_name_timestamp, self._col_name_cpu_usage] + self._col_name_cpu_cores + [
-                self._col_name_ram_usage, self._col_name_ram_used, self._col_name_disk_swap_usage, self._col_name_disk_swap_used,
-                self._col_name_program_running
-            ]
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-
-            try:
-                last_state = False
-                while True:
-                    # Verify if program is running
-                    is_running = self.is_program_running(program_name=self._file_profiled, last_state=last_state)
-                    last_state = is_running
-                    # Get system statistics
-                    overall_cpu_usage = self._get_overall_cpu_usage()
-                    cpu_usage_per_core = self._get_cpu_usage_per_core()
-                    ram_percent, ram_used = self._get_ram_usage()
-                    disk_percent, disk_used = self._get_disk_usage()
-                    timestamp = round(time.time() - self._start_time, 2)
-
-                    # Create a dictionary for the row data
-                    row_data = {
-                        self._col_name_timestamp: timestamp,
-                        self._col_name_cpu_usage: overall_cpu_usage,
-                        self._col_name_ram_usage: ram_percent,
-                        self._col_name_ram_used: ram_used,
-                        self._col_name_disk_swap_usage: disk_percent,
-                        self._col_name_disk_swap_used: disk_used,
-                        self._col_name_program_running: is_running
-                    }
-
-                    # Populate CPU core data dynamically based on the number of cores
-                    for idx, cpu_core in enumerate(cpu_usage_per_core):
-                        row_data[self._col_name_cpu_cores[idx]] = cpu_core
-
-                    # Write the row to the CSV file
-                    writer.writerow(row_data)
-
-                    logger.debug(f"Execution time: {timestamp} seconds")
-
-            except KeyboardInterrupt:
-                self._socket_server.stop_server()
-
-            finally:
-                # Log total execution time
-                end_time = time.time()
-                total_execution_time = end_time - self._start_time
-                logger.info(f"\nTotal Execution Time: {total_execution_time:.2f} seconds")
-
-                # Ask the user for execution time of the program
-                execution_time_input = input("Enter execution time (in seconds): ")
-                num_records = input("Enter the number of records used: ")
-                
-                # Validate the user input
-                try:
-                    execution_time = float(execution_time_input)
-                except ValueError:
-                    logger.error("Invalid input. Please enter a valid number.")
-                    execution_time = 0.0
-                
-                # Create or append execution time information to "execution_times.csv"
-                exec_times_file_path = "results/execution_times.csv"
-                is_file_exists = os.path.isfile(exec_times_file_path)
-
-                with open(exec_times_file_path, mode="a", newline="") as exec_times_file:
-                    exec_times_writer = csv.writer(exec_times_file)
-
-                    # If the file doesn't exist, write header
-                    if not is_file_exists:
-                        exec_times_writer.writerow(["filename", "records", "time"])
-
-                    # Write the data
-                    exec_times_writer.writerow([self._csv_file_name, num_records, execution_time])
+        self._samples = SampleRingBuffer(file_path=self._samples_file_path, columns=self._col_names)
+
+        try:
+            # Initialize the CPU times used as reference by the first sample
+            self._backend.get_cpu_usage_per_core()
+
+            # Sample in the background until the user stops the profiler
+            self._samples.start()
+            self._socket_server.start()
+            self._sampler.start()
+            while self._sampler.is_alive():
+                self._sampler.join(timeout=0.5)
+
+        except KeyboardInterrupt:
+            self._sampler.stop()
+
+        finally:
+            # Log total execution time
+            end_time = time.perf_counter()
+            total_execution_time = end_time - self._start_time
+            logger.info(f"\nTotal Execution Time: {total_execution_time:.2f} seconds")
+            logger.info(f"Samples taken: {self._sampler.num_samples}, missed ticks: {self._sampler.num_missed_ticks}")
+            self._socket_server.stop_server()
+            self._backend.close()
+
+            # Write the remaining samples
+            self._samples.close()
+            logger.info(f"Samples written to {self._samples_file_path}")
+            if self._export_csv:
+                export_to_csv(file_path=self._samples_file_path)
 
 # -----------------
 # Main
 # -----------------
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Collect system stats and write them to a CSV file.")
-    parser.add_argument("--csv_prefix", default="system_stats", help="Path to the CSV file for storing system stats.")
+    parser = argparse.ArgumentParser(description="Collect system stats and write them to a binary samples file.")
+    parser.add_argument("--csv_prefix", default="system_stats", help="Prefix of the file for storing system stats.")
     parser.add_argument("--profiled_file", help="Name of the program to profile.")
+    parser.add_argument("--per_process", action="store_true", help="Also record the stats of the profiled process.")
+    parser.add_argument("--sample_rate", type=float, default=10, help="Sampling rate in Hz while the profiled program is not running.")
+    parser.add_argument("--active_sample_rate", type=float, default=100, help="Sampling rate in Hz while the profiled program is running.")
+    parser.add_argument("--backend", default="auto", choices=["auto", "procfs", "psutil"], help="Backend used to read the stats.")
+    parser.add_argument("--export_csv", action="store_true", help="Export the samples to a CSV file when the profiler stops.")
+    parser.add_argument("--exit_after_program", action="store_true", help="Stop profiling once the profiled program finishes.")
+    parser.add_argument("--tail_duration", type=float, default=1.0, help="Time to keep profiling after the program finishes in seconds.")
 
     args = parser.parse_args()
 
-    stats_collector = SystemStatsCollector(args.csv_prefix, args.profiled_file)
-    stats_collector.measure_and_write_stats_to_csv()
+    stats_collector = SystemStatsCollector(args.csv_prefix, args.profiled_file, per_process=args.per_process,
+                                           sample_rate=args.sample_rate, active_sample_rate=args.active_sample_rate,
+                                           backend=args.backend, export_csv=args.export_csv,
+                                           exit_after_program=args.exit_after_program, tail_duration=args.tail_duration)
+    stats_collector.measure_and_write_stats()
@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import Callable
+
+from src.util.logger import setup_logging
+
+# Set up the logging configuration
+logger = setup_logging()
+
+class FixedRateSampler:
+    def __init__(self, sample_function: Callable[[], None], sample_rate: float, active_sample_rate: float = None,
+                 is_active: Callable[[], bool] = None):
+        """
+        Initializes the FixedRateSampler class.
+
+        This class calls a sample function from a background thread at a fixed rate. The ticks are
+        scheduled on the monotonic clock from the previous deadline rather than from the end of the
+        previous sample, so the time spent sampling does not make the rate drift. Ticks that could not
+        be taken on time are skipped and counted instead of being taken in a burst.
+
+        Parameters:
+            sample_function (Callable[[], None]): Function called on each tick.
+            sample_rate (float): Sampling rate in Hz.
+            active_sample_rate (float): Sampling rate in Hz used while is_active returns True.
+                                        Default is sample_rate.
+            is_active (Callable[[], bool]): Function telling whether the active sampling rate must be used.
+        """
+        if sample_rate <= 0 or (active_sample_rate is not None and active_sample_rate <= 0):
+            raise ValueError("The sampling rates must be greater than zero.")
+
+        self._sample_function = sample_function
+        self._sample_period = 1 / sample_rate
+        self._active_sample_period = 1 / active_sample_rate if active_sample_rate is not None else self._sample_period
+        self._is_active = is_active
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+        self.num_samples = 0
+        self.num_missed_ticks = 0
+        self.exception = None
+
+    def _get_period(self) -> float:
+        """
+        Retrieves the period of the next tick according to the state of the sampler.
+
+        Returns:
+            float: Period in seconds.
+        """
+        if self._is_active is not None and self._is_active():
+            return self._active_sample_period
+        return self._sample_period
+
+    def _run(self):
+        """
+        Sampling loop of the background thread.
+        """
+        next_tick = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                self._sample_function()
+                self.num_samples += 1
+
+                # Schedule the next tick from the previous deadline to avoid drifting
+                period = self._get_period()
+                next_tick += period
+                now = time.monotonic()
+
+                # Skip the ticks that were missed because the sample took longer than the period
+                if next_tick < now:
+                    num_missed_ticks = int((now - next_tick) / period) + 1
+                    self.num_missed_ticks += num_missed_ticks
+                    next_tick += num_missed_ticks * period
+
+                self._stop_event.wait(next_tick - now)
+        except Exception as excep:
+            self.exception = excep
+            logger.error(f"Error when sampling: {excep}")
+
+    def start(self):
+        """
+        Starts the sampling thread.
+        """
+        self._thread.start()
+
+    def request_stop(self):
+        """
+        Asks the sampling thread to stop after the current sample without waiting for it.
+
+        Unlike stop, it can be called from the sample function.
+        """
+        self._stop_event.set()
+
+    def stop(self):
+        """
+        Stops the sampling thread and waits for the current sample to finish.
+        """
+        self._stop_event.set()
+        self._thread.join()
+
+    def is_alive(self) -> bool:
+        """
+        Checks whether the sampling thread is running.
+
+        Returns:
+            bool: True if the sampling thread is running, False otherwise.
+        """
+        return self._thread.is_alive()
+
+    def join(self, timeout: float = None):
+        """
+        Waits for the sampling thread to finish.
+
+        Parameters:
+            timeout (float): Maximum time to wait in seconds.
+        """
+        self._thread.join(timeout)
@@ -0,0 +1,231 @@
+import argparse
+import json
+import threading
+from collections import deque
+
+import numpy as np
+
+from src.util.logger import setup_logging
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Extension of the binary samples file, its header is stored next to it with the extension .json
+SAMPLES_EXTENSION = ".samples"
+# Extension added to the samples file path for the events file, which stores one JSON object per line
+EVENTS_EXTENSION = ".events"
+
+class SampleRingBuffer:
+    def __init__(self, file_path: str, columns: list, capacity: int = 4096, flush_interval: float = 1.0):
+        """
+        Initializes the SampleRingBuffer class.
+
+        This class stores samples in a preallocated NumPy array with one column per metric and flushes
+        them in batches from a background thread to an append-only binary file. The file holds the rows
+        as raw float64 values, so it can be memory-mapped back with load_samples. Events, such as the
+        control messages of the profiled program, are stored next to it on the same timeline.
+
+        Parameters:
+            file_path (str): Path of the binary samples file.
+            columns (list): Names of the metrics of each sample.
+            capacity (int): Number of samples the buffer holds before they have to be flushed.
+            flush_interval (float): Time between flushes of the background thread in seconds.
+        """
+        self._file_path = file_path
+        self._columns = list(columns)
+        self._capacity = capacity
+        self._flush_interval = flush_interval
+        self._buffer = np.full((capacity, len(self._columns)), np.nan)
+
+        # Total number of samples appended and flushed, the positions in the buffer are taken modulo the capacity
+        self._num_appended = 0
+        self._num_flushed = 0
+        # Events appended by the sampler and drained by the flusher, deque.append and deque.popleft are atomic
+        self._events = deque()
+
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_thread = threading.Thread(target=self._run, name="sample_flusher", daemon=True)
+
+        # Write the header describing the layout of the file
+        with open(f"{file_path}.json", "w") as header_file:
+            json.dump({"columns": self._columns, "dtype": self._buffer.dtype.str}, header_file)
+
+        self._file = open(file_path, "wb")
+        self._events_file = open(f"{file_path}{EVENTS_EXTENSION}", "w")
+
+    def append(self, values):
+        """
+        Appends a sample to the buffer.
+
+        Parameters:
+            values: Values of the sample in the order of the columns. None is stored as NaN.
+        """
+        # The flusher thread fell behind, flush synchronously to avoid overwriting samples
+        if self._num_appended - self._num_flushed >= self._capacity:
+            self.flush()
+
+        self._buffer[self._num_appended % self._capacity] = values
+        self._num_appended += 1
+
+    def append_event(self, timestamp: float, **data):
+        """
+        Appends an event to the buffer.
+
+        Parameters:
+            timestamp (float): Time of the event on the same timeline as the samples.
+            **data: Data of the event, it must be serializable to JSON.
+        """
+        self._events.append({"timestamp": timestamp, **data})
+
+    def flush(self):
+        """
+        Writes the samples and events appended since the last flush to their files.
+        """
+        with self._flush_lock:
+            # Drain the events one at a time, the ones appended meanwhile are written as well or by the next flush
+            while self._events:
+                self._events_file.write(json.dumps(self._events.popleft()) + "\n")
+            self._events_file.flush()
+
+            num_appended = self._num_appended
+            start = self._num_flushed % self._capacity
+            end = num_appended % self._capacity
+
+            if num_appended - self._num_flushed == 0:
+                return
+
+            # The pending samples may wrap around the end of the buffer
+            if start < end:
+                self._buffer[start:end].tofile(self._file)
+            else:
+                self._buffer[start:].tofile(self._file)
+                self._buffer[:end].tofile(self._file)
+
+            self._file.flush()
+            self._num_flushed = num_appended
+
+    def _run(self):
+        """
+        Flushing loop of the background thread.
+        """
+        while not self._stop_event.wait(self._flush_interval):
+            self.flush()
+
+    def start(self):
+        """
+        Starts the background flushing thread.
+        """
+        self._flush_thread.start()
+
+    def close(self):
+        """
+        Stops the background flushing thread, flushes the remaining samples and closes the file.
+        """
+        self._stop_event.set()
+        if self._flush_thread.is_alive():
+            self._flush_thread.join()
+
+        self.flush()
+        self._file.close()
+        self._events_file.close()
+
+    @property
+    def num_samples(self) -> int:
+        """
+        Number of samples appended to the buffer.
+        """
+        return self._num_appended
+
+
+def load_samples(file_path: str):
+    """
+    Memory-maps a binary samples file written by SampleRingBuffer.
+
+    Parameters:
+        file_path (str): Path of the binary samples file.
+
+    Returns:
+        tuple: Tuple containing the list of column names and a read-only array with one row per sample.
+    """
+    with open(f"{file_path}.json", "r") as header_file:
+        header = json.load(header_file)
+
+    columns = header["columns"]
+    samples = np.memmap(file_path, dtype=np.dtype(header["dtype"]), mode="r")
+
+    # A sample may be partially written if the profiler was killed
+    num_samples = samples.shape[0] // len(columns)
+    samples = samples[:num_samples * len(columns)].reshape(num_samples, len(columns))
+
+    return columns, samples
+
+
+def load_events(file_path: str) -> list:
+    """
+    Loads the events stored next to a binary samples file written by SampleRingBuffer.
+
+    Parameters:
+        file_path (str): Path of the binary samples file.
+
+    Returns:
+        list: List of dictionaries with the timestamp and the data of each event.
+    """
+    with open(f"{file_path}{EVENTS_EXTENSION}", "r") as events_file:
+        return [json.loads(line) for line in events_file if line.strip()]
+
+
+def load_samples_to_dataframe(file_path: str):
+    """
+    Loads a binary samples file written by SampleRingBuffer into a Pandas DataFrame.
+
+    Parameters:
+        file_path (str): Path of the binary samples file.
+
+    Returns:
+        pd.DataFrame: DataFrame with one column per metric and one row per sample.
+    """
+    # Pandas is only needed for post-processing, keep it out of the profiler process
+    import pandas as pd
+
+    columns, samples = load_samples(file_path=file_path)
+    df = pd.DataFrame(samples, columns=columns)
+
+    if "program_running" in df.columns:
+        df["program_running"] = df["program_running"] == 1
+
+    return df
+
+
+def export_to_csv(file_path: str, csv_file_path: str = None) -> str:
+    """
+    Exports a binary samples file written by SampleRingBuffer to CSV.
+
+    Parameters:
+        file_path (str): Path of the binary samples file.
+        csv_file_path (str): Path of the CSV file. Default is the samples file path with the extension .csv.
+
+    Returns:
+        str: Path of the CSV file.
+    """
+    if csv_file_path is None:
+        csv_file_path = file_path.removesuffix(SAMPLES_EXTENSION) + ".csv"
+
+    df = load_samples_to_dataframe(file_path=file_path)
+    df.to_csv(csv_file_path, index=False)
+    logger.info(f"Exported {len(df)} samples to {csv_file_path}")
+
+    return csv_file_path
+
+
+# -----------------
+# Main
+# -----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export binary samples files of the profiler to CSV.")
+    parser.add_argument("samples_files", nargs="+", help="Paths of the binary samples files.")
+
+    args = parser.parse_args()
+
+    for samples_file in args.samples_files:
+        export_to_csv(file_path=samples_file)
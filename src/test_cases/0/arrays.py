@@ -0,0 +1,29 @@
+"""
+This benchmark replaces all the passwords with "XXXXXXXX" in columns of the users,
+array.array for the numeric ones, to compare the overhead of the records with the
+dictionary case.
+
+Benchmark Steps:
+1. Load user data into columns, array.array for the numeric ones, with a specified number of records.
+2. Replace the column of the passwords with "XXXXXXXX".
+3. Measure and log the execution time for the operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="0/arrays", group=0, variant="arrays", representation="arrays",
+               setup=lambda column_users: dict(column_users))
+def replace_passwords(column_users, recorder):
+    """
+    Replaces all the passwords with "XXXXXXXX" in the columns of the users.
+    """
+    column_users["password"] = ["XXXXXXXX"] * len(column_users["password"])
+
+
+if __name__ == "__main__":
+    run_cli(name="0/arrays")
@@ -0,0 +1,30 @@
+"""
+This benchmark replaces all the passwords with "XXXXXXXX" in a list of namedtuples,
+to compare the overhead of the records with the dictionary case.
+
+Benchmark Steps:
+1. Load user data into a list of namedtuples with a specified number of records.
+2. Replace all the passwords with "XXXXXXXX".
+3. Measure and log the execution time for the operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="0/namedtuples", group=0, variant="namedtuples", representation="namedtuples",
+               setup=lambda namedtuple_users: list(namedtuple_users))
+def replace_passwords(namedtuple_users, recorder):
+    """
+    Replaces all the passwords with "XXXXXXXX" in a list of namedtuples.
+    """
+    # The namedtuples are immutable, so each one is replaced by a copy with the new password
+    for position, user in enumerate(namedtuple_users):
+        namedtuple_users[position] = user._replace(password="XXXXXXXX")
+
+
+if __name__ == "__main__":
+    run_cli(name="0/namedtuples")
@@ -0,0 +1,31 @@
+"""
+This benchmark replaces all the passwords with "XXXXXXXX" in a list of objects
+storing their attributes in __slots__, to compare the overhead of the records with the dictionary case.
+
+Benchmark Steps:
+1. Load user data into a list of __slots__ objects with a specified number of records.
+2. Replace all the passwords with "XXXXXXXX".
+3. Measure and log the execution time for the operation.
+"""
+
+import copy
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="0/slots", group=0, variant="slots", representation="slots",
+               setup=lambda slots_users: [copy.copy(user) for user in slots_users])
+def replace_passwords(slots_users, recorder):
+    """
+    Replaces all the passwords with "XXXXXXXX" in a list of objects storing their attributes in __slots__.
+    """
+    for user in slots_users:
+        user.password = "XXXXXXXX"
+
+
+if __name__ == "__main__":
+    run_cli(name="0/slots")
@@ -0,0 +1,34 @@
+"""
+This benchmark replaces all the passwords with "XXXXXXXX" in a list of tuples
+indexed by a shared column map, to compare the overhead of the records with the dictionary case.
+
+Benchmark Steps:
+1. Load user data into a list of tuples with a specified number of records.
+2. Replace all the passwords with "XXXXXXXX".
+3. Measure and log the execution time for the operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+from src.test_cases.util import USER_COLUMN_INDEX
+
+# Position of the password in the tuples
+PASSWORD = USER_COLUMN_INDEX["password"]
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="0/tuples", group=0, variant="tuples", representation="tuples",
+               setup=lambda tuple_users: list(tuple_users))
+def replace_passwords(tuple_users, recorder):
+    """
+    Replaces all the passwords with "XXXXXXXX" in a list of tuples indexed by a shared column map.
+    """
+    # The tuples are immutable, so each one is replaced by a copy with the new password
+    for position, user in enumerate(tuple_users):
+        tuple_users[position] = user[:PASSWORD] + ("XXXXXXXX",) + user[PASSWORD + 1:]
+
+
+if __name__ == "__main__":
+    run_cli(name="0/tuples")
@@ -0,0 +1,45 @@
+"""
+Calculates the number of women per country and their average age in columns of the
+users, array.array for the numeric ones, to compare the overhead of the records with
+the dictionary case.
+
+Benchmark Steps:
+1. Load user data into columns, array.array for the numeric ones, with a specified number of records.
+2. Filter the female users and group them by country.
+3. Compute the average age of the women per country.
+4. Measure and log the execution time for each operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="1/arrays", group=1, variant="arrays", representation="arrays")
+def average_age_of_women(column_users, recorder):
+    """
+    Counts the women and computes their average age per country in the columns of the users.
+    """
+    # Operation 1: Filtering female users and grouping by country in the columns
+    with recorder.span("filter_group_count"):
+        grouped_female_dict = {}
+        for gender, country, age in zip(column_users["gender"], column_users["country"], column_users["age"]):
+            if gender != "female":
+                continue
+            if country not in grouped_female_dict:
+                grouped_female_dict[country] = {"count": 1, "age_sum": age}
+            else:
+                grouped_female_dict[country]["count"] += 1
+                grouped_female_dict[country]["age_sum"] += age
+
+    # Operation 2: Finding the average age of women per country in the columns
+    with recorder.span("group_mean"):
+        average_age_female_dict = {}
+        for country, data in grouped_female_dict.items():
+            average_age_female_dict[country] = data["age_sum"] / data["count"]
+
+
+if __name__ == "__main__":
+    run_cli(name="1/arrays")
@@ -8,53 +8,27 @@ Benchmark Steps:
 4. Measure and log the execution time for each operation.
 """
 
-import argparse
-import time
-
-from src.util.logger import setup_logging
-from src.util.sockets import Client
-from src.test_cases.util import extract_user_data
-
-# Set up the logging configuration
-logger = setup_logging()
-
-# Init sockets
-is_server = True
-try:
-    socket_client = Client("127.0.0.1", 8888)
-except:
-    is_server = False
-    logger.debug("\nTest running without profiling")
-
-# Use argparse to get num_records from the terminal
-parser = argparse.ArgumentParser(description="Perform a test.")
-parser.add_argument("--num_records", type=int, help="Number of records to process")
-args = parser.parse_args()
-
-# Extract data
-num_records = args.num_records
-df_users = extract_user_data(num_records=num_records, output_type="dataframe")
-logger.info(f"The required information was loaded successfully. Number of records: {num_records}")
-
-# Start program
-if is_server:
-    socket_client.send_message(message="start")
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
 
 # -----------
 # Operation
 # -----------
 
-# Start timer
-start_time = time.time()
+@register_case(name="1/data_frame", group=1, variant="pandas", representation="dataframe")
+def average_age_of_women(df_users, recorder):
+    """
+    Counts the women and computes their average age per country in the DataFrame.
+    """
+    # Operation 1: Filtering female users and grouping by country in DataFrame
+    with recorder.span("filter_group_count"):
+        female_users_df = df_users[df_users["gender"] == "female"]
+        grouped_female_df = female_users_df.groupby("country").size().reset_index(name="female_count")
 
-# Operation 1: Filtering female users and grouping by country in DataFrame
-female_users_df = df_users[df_users["gender"] == "female"]
-grouped_female_df = female_users_df.groupby("country").size().reset_index(name="female_count")
+    # Operation 2: Finding the average age of women per country in DataFrame
+    with recorder.span("group_mean"):
+        average_age_female_df = female_users_df.groupby("country")["age"].mean().reset_index(name="average_age")
 
-# Operation 2: Finding the average age of women per country in DataFrame
-average_age_female_df = female_users_df.groupby("country")["age"].mean().reset_index(name="average_age")
 
-# Stop timer
-end_time = time.time()
-execution_time = end_time - start_time
-logger.info(f"Execution Time: {execution_time} seconds")
+if __name__ == "__main__":
+    run_cli(name="1/data_frame")
@@ -10,62 +10,36 @@ Benchmark Steps:
 4. Measure and log the execution time for each operation.
 """
 
-import argparse
-import time
-
-from src.util.logger import setup_logging
-from src.util.sockets import Client
-from src.test_cases.util import extract_user_data
-
-# Set up the logging configuration
-logger = setup_logging()
-
-# Init sockets
-is_server = True
-try:
-    socket_client = Client("127.0.0.1", 8888)
-except:
-    is_server = False
-    logger.debug("\nTest running without profiling")
-
-# Use argparse to get num_records from the terminal
-parser = argparse.ArgumentParser(description="Perform a test.")
-parser.add_argument("--num_records", type=int, help="Number of records to process")
-args = parser.parse_args()
-
-# Extract data
-num_records = args.num_records
-dict_users = extract_user_data(num_records=num_records, output_type="dictionary")
-logger.info(f"The required information was loaded successfully. Number of records: {num_records}")
-
-# Start program
-if is_server:
-    socket_client.send_message(message="start")
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
 
 # -----------
 # Operation
 # -----------
 
-# Start timer
-start_time = time.time()
-
-# Operation 1: Filtering female users and grouping by country in the list
-filtered_female_list = [user for user in dict_users if user["gender"] == "female"]
-grouped_female_dict = {}
-for user in filtered_female_list:
-    country = user["country"]
-    if country not in grouped_female_dict:
-        grouped_female_dict[country] = {"count": 1, "age_sum": user["age"]}
-    else:
-        grouped_female_dict[country]["count"] += 1
-        grouped_female_dict[country]["age_sum"] += user["age"]
-
-# Operation 2: Finding the average age of women per country in the list
-average_age_female_dict = {}
-for country, data in grouped_female_dict.items():
-    average_age_female_dict[country] = data["age_sum"] / data["count"]
-
-# Stop timer
-end_time = time.time()
-execution_time = end_time - start_time
-logger.info(f"Execution Time: {execution_time} seconds")
+@register_case(name="1/dictionary", group=1, variant="dict", representation="dictionary")
+def average_age_of_women(dict_users, recorder):
+    """
+    Counts the women and computes their average age per country in the list.
+    """
+    # Operation 1: Filtering female users and grouping by country in the list
+    with recorder.span("filter_group_count"):
+        filtered_female_list = [user for user in dict_users if user["gender"] == "female"]
+        grouped_female_dict = {}
+        for user in filtered_female_list:
+            country = user["country"]
+            if country not in grouped_female_dict:
+                grouped_female_dict[country] = {"count": 1, "age_sum": user["age"]}
+            else:
+                grouped_female_dict[country]["count"] += 1
+                grouped_female_dict[country]["age_sum"] += user["age"]
+
+    # Operation 2: Finding the average age of women per country in the list
+    with recorder.span("group_mean"):
+        average_age_female_dict = {}
+        for country, data in grouped_female_dict.items():
+            average_age_female_dict[country] = data["age_sum"] / data["count"]
+
+
+if __name__ == "__main__":
+    run_cli(name="1/dictionary")
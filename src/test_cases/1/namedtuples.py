@@ -0,0 +1,44 @@
+"""
+Calculates the number of women per country and their average age in a list of namedtuples,
+to compare the overhead of the records with the dictionary case.
+
+Benchmark Steps:
+1. Load user data into a list of namedtuples with a specified number of records.
+2. Filter the female users and group them by country.
+3. Compute the average age of the women per country.
+4. Measure and log the execution time for each operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="1/namedtuples", group=1, variant="namedtuples", representation="namedtuples")
+def average_age_of_women(namedtuple_users, recorder):
+    """
+    Counts the women and computes their average age per country in a list of namedtuples.
+    """
+    # Operation 1: Filtering female users and grouping by country in the list
+    with recorder.span("filter_group_count"):
+        filtered_female_list = [user for user in namedtuple_users if user.gender == "female"]
+        grouped_female_dict = {}
+        for user in filtered_female_list:
+            country = user.country
+            if country not in grouped_female_dict:
+                grouped_female_dict[country] = {"count": 1, "age_sum": user.age}
+            else:
+                grouped_female_dict[country]["count"] += 1
+                grouped_female_dict[country]["age_sum"] += user.age
+
+    # Operation 2: Finding the average age of women per country in the list
+    with recorder.span("group_mean"):
+        average_age_female_dict = {}
+        for country, data in grouped_female_dict.items():
+            average_age_female_dict[country] = data["age_sum"] / data["count"]
+
+
+if __name__ == "__main__":
+    run_cli(name="1/namedtuples")
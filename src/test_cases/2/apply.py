@@ -0,0 +1,43 @@
+"""
+Counts the number of users per country applying a function to each row of a Pandas DataFrame
+with apply(axis=1).
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Apply a function to each row reading its country.
+3. Increment the count of the country.
+4. Measure and log the execution time for each operation.
+"""
+
+from collections import defaultdict
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/apply", group=2, variant="apply", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country applying a function to each row of the DataFrame.
+    """
+    # Initialize dictionary to store registration counts for each country
+    counter_countries = defaultdict(int)
+
+    def count_country(row):
+        """
+        Increments the count of the country of a row.
+
+        Parameters:
+            row (pd.Series): The row.
+        """
+        counter_countries[row["country"]] += 1
+
+    # Apply the function to every row, built as a Series
+    df_users.apply(count_country, axis=1)
+
+
+if __name__ == "__main__":
+    run_cli(name="2/apply")
@@ -0,0 +1,39 @@
+"""
+Counts the number of users per country with the codes of a Pandas Categorical
+of the country column counted with np.bincount.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Encode the country column as a Categorical.
+3. Count its codes with np.bincount.
+4. Measure and log the execution time for each operation.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/categorical", group=2, variant="categorical", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country with the codes of a Categorical and np.bincount.
+    """
+    # Operation 1: Encoding the countries as a Categorical
+    with recorder.span("encode"):
+        categorical_countries = pd.Categorical(df_users["country"])
+
+    # Operation 2: Counting the codes of the categories, without the code -1 of the missing countries
+    with recorder.span("count"):
+        codes = categorical_countries.codes
+        counts = np.bincount(codes[codes >= 0], minlength=len(categorical_countries.categories))
+        counter_countries = dict(zip(categorical_countries.categories, counts.tolist()))
+
+
+if __name__ == "__main__":
+    run_cli(name="2/categorical")
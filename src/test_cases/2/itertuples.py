@@ -0,0 +1,35 @@
+"""
+Counts the number of users per country iterating over the rows of a Pandas DataFrame
+as namedtuples with itertuples.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Iterate over the namedtuples of the rows reading their country.
+3. Increment the count of the country.
+4. Measure and log the execution time for each operation.
+"""
+
+from collections import defaultdict
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/itertuples", group=2, variant="itertuples", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country iterating over the rows of the DataFrame with itertuples.
+    """
+    # Initialize dictionary to store registration counts for each country
+    counter_countries = defaultdict(int)
+
+    # Iterate over the rows as namedtuples, without the index
+    for row in df_users.itertuples(index=False):
+        counter_countries[row.country] += 1
+
+
+if __name__ == "__main__":
+    run_cli(name="2/itertuples")
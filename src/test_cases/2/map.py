@@ -0,0 +1,39 @@
+"""
+Counts the number of users per country mapping each country of a Pandas DataFrame
+to a code with Series.map and a dictionary.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Build the dictionary of the code of each country.
+3. Map the country column to the codes with Series.map.
+4. Count the codes with np.bincount.
+5. Measure and log the execution time for each operation.
+"""
+
+import numpy as np
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/map", group=2, variant="map", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country mapping the countries to codes with Series.map and a dictionary.
+    """
+    # Operation 1: Mapping each country to its code with the dictionary
+    with recorder.span("map"):
+        countries = df_users["country"].unique()
+        country_codes = {country: code for code, country in enumerate(countries)}
+        codes = df_users["country"].map(country_codes).to_numpy()
+
+    # Operation 2: Counting the codes
+    with recorder.span("count"):
+        counter_countries = dict(zip(countries, np.bincount(codes, minlength=len(countries)).tolist()))
+
+
+if __name__ == "__main__":
+    run_cli(name="2/map")
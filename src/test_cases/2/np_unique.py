@@ -0,0 +1,30 @@
+"""
+Counts the number of users per country with np.unique over the NumPy array
+of the country column of a Pandas DataFrame.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Count the distinct countries with np.unique and return_counts.
+3. Measure and log the execution time for each operation.
+"""
+
+import numpy as np
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/np_unique", group=2, variant="np_unique", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country with np.unique and return_counts.
+    """
+    # Sort the countries and count the occurrences of each one, without the missing ones that cannot be sorted
+    countries, counts = np.unique(df_users["country"].dropna().to_numpy(), return_counts=True)
+
+
+if __name__ == "__main__":
+    run_cli(name="2/np_unique")
@@ -0,0 +1,35 @@
+"""
+Counts the number of users per country iterating over the NumPy array
+of the country column of a Pandas DataFrame.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Convert the country column to a NumPy array with to_numpy.
+3. Iterate over it and increment the count of each country.
+4. Measure and log the execution time for each operation.
+"""
+
+from collections import defaultdict
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/to_numpy", group=2, variant="to_numpy", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country iterating over the array of the country column.
+    """
+    # Initialize dictionary to store registration counts for each country
+    counter_countries = defaultdict(int)
+
+    # Iterate over the array of the column instead of the rows of the DataFrame
+    for country in df_users["country"].to_numpy():
+        counter_countries[country] += 1
+
+
+if __name__ == "__main__":
+    run_cli(name="2/to_numpy")
@@ -0,0 +1,28 @@
+"""
+Counts the number of users per country with the value_counts of the country column
+of a Pandas DataFrame.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Count the distinct countries with value_counts.
+3. Measure and log the execution time for each operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="2/value_counts", group=2, variant="value_counts", representation="dataframe")
+def count_countries(df_users, recorder):
+    """
+    Counts the users per country with value_counts.
+    """
+    # Count the occurrences of each country, without sorting them by count
+    country_counts = df_users["country"].value_counts(sort=False)
+
+
+if __name__ == "__main__":
+    run_cli(name="2/value_counts")
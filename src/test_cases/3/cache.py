@@ -0,0 +1,56 @@
+"""
+Computes the number of registrations per months in a Pandas suitable way
+parsing each distinct datetime once, since the registration dates
+are highly duplicated.
+
+pd.to_datetime(cache=True) decides whether to cache from the first 500 values only, so it
+parses every row when those are distinct, as with the users cycled from the downloaded ones.
+This case deduplicates the dates explicitly instead.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Factorize the column registered_date into the codes of its distinct dates.
+3. Convert the distinct dates to DateTime with their format and take them back to the rows.
+4. Sum up the value of the nationality and date by using groupby and size.
+5. Measure and log the execution time for each operation.
+"""
+
+import pandas as pd
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+from src.test_cases.util import DATETIME_FORMAT
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="3/cache", group=3, variant="cache", representation="dataframe",
+               setup=lambda df_users: df_users.copy(deep=False))
+def count_registrations_per_month(df_users, recorder):
+    """
+    Counts the registrations per nationality and month, parsing each distinct registration date once.
+    """
+    # Find the distinct dates and the code of the date of each row, -1 for the missing ones
+    with recorder.span("factorize"):
+        codes, unique_dates = pd.factorize(df_users["registered_date"])
+
+    # Convert the distinct dates to datetime
+    with recorder.span("to_datetime"):
+        parsed_dates = pd.to_datetime(unique_dates, format=DATETIME_FORMAT)
+
+    # Take the parsed date of each row, NaT for the missing ones
+    with recorder.span("take"):
+        df_users["registered_date"] = parsed_dates.take(codes, allow_fill=True, fill_value=pd.NaT)
+
+    # Use dt.to_period for year-month grouping
+    with recorder.span("to_period"):
+        df_users["registration_period"] = df_users["registered_date"].dt.to_period("M")
+
+    # Group by nationality and registration_period, then count the occurrences
+    with recorder.span("groupby"):
+        df_country_year_month_registration = df_users.groupby(["nationality", "registration_period"]).size().reset_index(name="count")
+
+
+if __name__ == "__main__":
+    run_cli(name="3/cache")
@@ -0,0 +1,43 @@
+"""
+Computes the number of registrations per months in a Pandas suitable way
+with the format of the datetimes given explicitly, parsing every one of them.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Convert the column registered_date to DateTime with an explicit format, with cache=False to parse every row.
+3. Sum up the value of the nationality and date by using groupby and size.
+4. Measure and log the execution time for each operation.
+"""
+
+import pandas as pd
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+from src.test_cases.util import DATETIME_FORMAT
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="3/explicit_format", group=3, variant="format", representation="dataframe",
+               setup=lambda df_users: df_users.copy(deep=False))
+def count_registrations_per_month(df_users, recorder):
+    """
+    Counts the registrations per nationality and month, parsing the registration dates with an explicit format.
+    """
+    # Convert "registered_date" column to datetime with its format instead of inferring it, parsing every row.
+    # It is the baseline of 3/inferred_format (the format) and 3/cache (the deduplication of the dates).
+    with recorder.span("to_datetime"):
+        df_users["registered_date"] = pd.to_datetime(df_users["registered_date"], format=DATETIME_FORMAT, cache=False)
+
+    # Use dt.to_period for year-month grouping
+    with recorder.span("to_period"):
+        df_users["registration_period"] = df_users["registered_date"].dt.to_period("M")
+
+    # Group by nationality and registration_period, then count the occurrences
+    with recorder.span("groupby"):
+        df_country_year_month_registration = df_users.groupby(["nationality", "registration_period"]).size().reset_index(name="count")
+
+
+if __name__ == "__main__":
+    run_cli(name="3/explicit_format")
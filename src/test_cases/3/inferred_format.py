@@ -0,0 +1,47 @@
+"""
+Computes the number of registrations per months in a Pandas suitable way
+inferring the format of the datetimes and parsing every one of them.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Convert the column registered_date to DateTime inferring its format, with cache=False to parse every row.
+3. Drop the time zone inferred from the "Z" suffix to extract the year and month.
+4. Sum up the value of the nationality and date by using groupby and size.
+5. Measure and log the execution time for each operation.
+"""
+
+import pandas as pd
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="3/inferred_format", group=3, variant="inferred_format", representation="dataframe",
+               setup=lambda df_users: df_users.copy(deep=False))
+def count_registrations_per_month(df_users, recorder):
+    """
+    Counts the registrations per nationality and month, inferring the format of every registration date.
+    """
+    # Convert "registered_date" column to datetime, inferring the format and parsing every row.
+    # It only differs from 3/explicit_format by the inference of the format.
+    with recorder.span("to_datetime"):
+        df_users["registered_date"] = pd.to_datetime(df_users["registered_date"], cache=False)
+
+    # Drop the time zone, which the periods do not keep
+    with recorder.span("tz_convert"):
+        df_users["registered_date"] = df_users["registered_date"].dt.tz_convert(None)
+
+    # Use dt.to_period for year-month grouping
+    with recorder.span("to_period"):
+        df_users["registration_period"] = df_users["registered_date"].dt.to_period("M")
+
+    # Group by nationality and registration_period, then count the occurrences
+    with recorder.span("groupby"):
+        df_country_year_month_registration = df_users.groupby(["nationality", "registration_period"]).size().reset_index(name="count")
+
+
+if __name__ == "__main__":
+    run_cli(name="3/inferred_format")
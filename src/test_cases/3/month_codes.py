@@ -0,0 +1,45 @@
+"""
+Computes the number of registrations per months in a Pandas suitable way
+without parsing the datetimes, slicing their year and month
+and grouping on integer month codes.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Slice the year and the month of the column registered_date and convert them to nullable integers.
+3. Compute the month code of each registration, the months since 1970-01.
+4. Sum up the value of the nationality and month code by using groupby and size.
+5. Measure and log the execution time for each operation.
+"""
+
+import pandas as pd
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="3/month_codes", group=3, variant="string_slicing", representation="dataframe",
+               setup=lambda df_users: df_users.copy(deep=False))
+def count_registrations_per_month(df_users, recorder):
+    """
+    Counts the registrations per nationality and month, slicing the year and month of the registration dates.
+    """
+    # Slice the year and the month of the "YYYY-MM-DDTHH:MM:SS.sssZ" strings, <NA> for the missing dates
+    # as the NaT of pd.to_datetime, so their rows are left out of the groups as well
+    with recorder.span("slice"):
+        years = pd.to_numeric(df_users["registered_date"].str[:4], errors="coerce").astype("Int64")
+        months = pd.to_numeric(df_users["registered_date"].str[5:7], errors="coerce").astype("Int64")
+
+    # Combine them into the months since 1970-01, the codes of datetime64[M]
+    with recorder.span("month_code"):
+        df_users["registration_month"] = (years - 1970) * 12 + months - 1
+
+    # Group by nationality and registration_month, then count the occurrences
+    with recorder.span("groupby"):
+        df_country_year_month_registration = df_users.groupby(["nationality", "registration_month"]).size().reset_index(name="count")
+
+
+if __name__ == "__main__":
+    run_cli(name="3/month_codes")
@@ -0,0 +1,36 @@
+"""
+Computes the number of registrations per months in a Pandas suitable way
+with the datetimes parsed when the cache was built,
+grouping on periods.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Use the column registered_date, already parsed as DateTime, to extract the year and month as periods.
+3. Sum up the value of the nationality and date by using groupby and size.
+4. Measure and log the execution time for each operation.
+"""
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="3/pre_parsed", group=3, variant="pre_parsed", representation="parsed_dataframe",
+               setup=lambda df_users: df_users.copy(deep=False))
+def count_registrations_per_month(df_users, recorder):
+    """
+    Counts the registrations per nationality and month period, with the registration dates already parsed.
+    """
+    # Use dt.to_period for year-month grouping
+    with recorder.span("to_period"):
+        df_users["registration_period"] = df_users["registered_date"].dt.to_period("M")
+
+    # Group by nationality and registration_period, then count the occurrences
+    with recorder.span("groupby"):
+        df_country_year_month_registration = df_users.groupby(["nationality", "registration_period"]).size().reset_index(name="count")
+
+
+if __name__ == "__main__":
+    run_cli(name="3/pre_parsed")
@@ -0,0 +1,42 @@
+"""
+Computes the number of registrations per months in a Pandas suitable way
+with the datetimes parsed when the cache was built,
+grouping on integer month codes instead of periods.
+
+Benchmark Steps:
+1. Load user data into a Pandas DataFrame with a specified number of records.
+2. Use the column registered_date, already parsed as DateTime, to compute the month code of each registration.
+3. Sum up the value of the nationality and month code by using groupby and size.
+4. Measure and log the execution time for each operation.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
+
+# -----------
+# Operation
+# -----------
+
+@register_case(name="3/pre_parsed_codes", group=3, variant="pre_parsed_codes", representation="parsed_dataframe",
+               setup=lambda df_users: df_users.copy(deep=False))
+def count_registrations_per_month(df_users, recorder):
+    """
+    Counts the registrations per nationality and month code, with the registration dates already parsed.
+    """
+    # Truncate the datetimes to their month, counted since 1970-01, <NA> for the NaT left out of the groups
+    with recorder.span("month_code"):
+        registered_dates = df_users["registered_date"].to_numpy()
+        month_codes = pd.array(registered_dates.astype("datetime64[M]").astype(np.int64), dtype="Int64")
+        month_codes[np.isnat(registered_dates)] = pd.NA
+        df_users["registration_month"] = month_codes
+
+    # Group by nationality and registration_month, then count the occurrences
+    with recorder.span("groupby"):
+        df_country_year_month_registration = df_users.groupby(["nationality", "registration_month"]).size().reset_index(name="count")
+
+
+if __name__ == "__main__":
+    run_cli(name="3/pre_parsed_codes")
@@ -0,0 +1,193 @@
+"""
+Datasets of users materialized once for every size of a sweep.
+
+The users of the largest size are built once and written in the columnar format of the cache,
+optionally along with their records. Every smaller size is a prefix of the largest one (the
+downloaded records are cut or replicated in order), so extract_user_data reads the first rows
+of the dataset instead of building and caching a separate entry for each size. The numeric
+columns of a prefix are views of the memory-mapped files.
+
+Materialize the dataset of a sweep with:
+
+    python3 -m src.test_cases.dataset --num_records 100 1000 10000 2000000 --records
+"""
+
+import argparse
+import json
+import os
+import shutil
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from src.test_cases.synthetic import generate_users, parse_synthetic_options
+from src.test_cases.util import dataframe_to_dict, read_json_to_dataframe
+from src.util.cache_data import CACHE_FOLDER, get_cache_key, register_result
+from src.util.logger import setup_logging
+from src.util.serializers import ColumnarSerializer, RecordsSerializer, iter_records
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Folder of the materialized datasets
+DATASETS_FOLDER = os.path.join(CACHE_FOLDER, "datasets")
+
+def get_dataset_key(source: str = "json", perturb_columns: Tuple[str, ...] = (), synthetic_options: Dict = None) -> str:
+    """
+    Computes the key of the dataset of a source, which does not depend on the number of records.
+
+    Parameters:
+        source (str): The source of the users ("json" or "synthetic").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records.
+        synthetic_options (Dict): Options of generate_users.
+
+    Returns:
+        str: The key of the dataset.
+    """
+    if source == "json":
+        return get_cache_key(read_json_to_dataframe, "users_json", num_records=None, perturb_columns=tuple(perturb_columns))
+    elif source == "synthetic":
+        return get_cache_key(generate_users, "users_synthetic", num_records=None, **(synthetic_options or {}))
+    else:
+        raise ValueError("Invalid source. Please choose 'json' or 'synthetic'.")
+
+def _read_meta(key: str) -> Dict:
+    """
+    Reads the description of a materialized dataset.
+
+    Parameters:
+        key (str): The key of the dataset.
+
+    Returns:
+        Dict: The number of records of the dataset and whether its records were written, or None if
+              the dataset was not materialized.
+    """
+    try:
+        with open(os.path.join(DATASETS_FOLDER, f"{key}.json"), "r") as meta_file:
+            return json.load(meta_file)
+    except FileNotFoundError:
+        return None
+
+def materialize_dataset(num_records: int, source: str = "json", perturb_columns: Tuple[str, ...] = (),
+                        synthetic_options: Dict = None, records: bool = False):
+    """
+    Builds the users of the largest size of a sweep once and writes them as a dataset.
+
+    Nothing is done if the dataset already has enough records.
+
+    Parameters:
+        num_records (int): The largest number of records of the sweep.
+        source (str): The source of the users ("json" or "synthetic").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records.
+        synthetic_options (Dict): Options of generate_users.
+        records (bool): Whether to also write the records read by the test cases working on dictionaries.
+    """
+    key = get_dataset_key(source=source, perturb_columns=perturb_columns, synthetic_options=synthetic_options)
+    meta = _read_meta(key=key)
+    if meta is not None and meta["num_records"] >= num_records and (meta["records"] or not records):
+        logger.info(f"The dataset {key} already has {meta['num_records']} records.")
+        return
+
+    if source == "json":
+        df_users = read_json_to_dataframe(num_records=num_records, perturb_columns=tuple(perturb_columns))
+    else:
+        df_users = generate_users(num_records=num_records, **(synthetic_options or {}))
+
+    # Replace the previous dataset, its description is removed first so it is not read meanwhile
+    os.makedirs(DATASETS_FOLDER, exist_ok=True)
+    meta_path = os.path.join(DATASETS_FOLDER, f"{key}.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    columns_path = os.path.join(DATASETS_FOLDER, f"{key}{ColumnarSerializer.extension}")
+    records_path = os.path.join(DATASETS_FOLDER, f"{key}{RecordsSerializer.extension}")
+    shutil.rmtree(columns_path, ignore_errors=True)
+    if os.path.exists(records_path):
+        os.remove(records_path)
+
+    ColumnarSerializer().dump(df_users, columns_path)
+    if records:
+        RecordsSerializer().dump(dataframe_to_dict(df=df_users), records_path)
+
+    with open(meta_path, "w") as meta_file:
+        json.dump({"num_records": len(df_users), "records": records, "source": source}, meta_file, indent=2)
+
+    logger.info(f"Materialized the dataset {key} with {len(df_users)} records.")
+
+def load_dataset_dataframe(num_records: int, source: str = "json", perturb_columns: Tuple[str, ...] = (),
+                           synthetic_options: Dict = None) -> pd.DataFrame:
+    """
+    Reads the first records of a materialized dataset as a DataFrame.
+
+    Parameters:
+        num_records (int): The number of records.
+        source (str): The source of the users ("json" or "synthetic").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records.
+        synthetic_options (Dict): Options of generate_users.
+
+    Returns:
+        pd.DataFrame: The users, or None if no dataset with enough records was materialized.
+    """
+    key = get_dataset_key(source=source, perturb_columns=perturb_columns, synthetic_options=synthetic_options)
+    meta = _read_meta(key=key)
+    if meta is None or meta["num_records"] < num_records:
+        return None
+
+    columns_path = os.path.join(DATASETS_FOLDER, f"{key}{ColumnarSerializer.extension}")
+    logger.info(f"Load {num_records} records from the dataset {columns_path}!")
+    df_users = ColumnarSerializer().load(columns_path, num_rows=num_records)
+
+    # The entries derived from the prefix, such as its dictionary, are keyed by the dataset and size
+    register_result(data=df_users, key=f"{key}_{num_records}")
+    return df_users
+
+def load_dataset_records(num_records: int, source: str = "json", perturb_columns: Tuple[str, ...] = (),
+                         synthetic_options: Dict = None) -> List[Dict]:
+    """
+    Reads the first records of a materialized dataset as dictionaries.
+
+    Only the chunks of records containing the prefix are read.
+
+    Parameters:
+        num_records (int): The number of records.
+        source (str): The source of the users ("json" or "synthetic").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records.
+        synthetic_options (Dict): Options of generate_users.
+
+    Returns:
+        List[Dict]: The records, or None if no dataset with enough records was materialized with its records.
+    """
+    key = get_dataset_key(source=source, perturb_columns=perturb_columns, synthetic_options=synthetic_options)
+    meta = _read_meta(key=key)
+    if meta is None or meta["num_records"] < num_records or not meta["records"]:
+        return None
+
+    records_path = os.path.join(DATASETS_FOLDER, f"{key}{RecordsSerializer.extension}")
+    logger.info(f"Load {num_records} records from the dataset {records_path}!")
+
+    records = []
+    for chunk in iter_records(path=records_path, chunks=True):
+        if len(records) >= num_records:
+            break
+        records.extend(chunk)
+    del records[num_records:]
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize the dataset of the users of a sweep.")
+    parser.add_argument("--num_records", type=int, nargs="+", required=True,
+                        help="Numbers of records of the sweep, the dataset has the largest one.")
+    parser.add_argument("--source", default="json", choices=["json", "synthetic"], help="Source of the user data.")
+    parser.add_argument("--perturb_columns", nargs="*", default=[],
+                        help="String columns made unique in the duplicated records.")
+    parser.add_argument("--synthetic_options", type=parse_synthetic_options, default=None,
+                        help="Options of generate_users for the synthetic source as a JSON object.")
+    parser.add_argument("--records", action="store_true",
+                        help="Also write the records read by the test cases working on dictionaries.")
+
+    args = parser.parse_args()
+
+    materialize_dataset(num_records=max(args.num_records), source=args.source,
+                        perturb_columns=tuple(args.perturb_columns), synthetic_options=args.synthetic_options,
+                        records=args.records)
@@ -0,0 +1,551 @@
+"""
+Server sharing the DataFrames of the users with the processes of the test cases.
+
+The server reads the users of a number of records once and copies each of their columns into
+its own shared memory segment. The test cases attach to the segments by name through the
+server instead of loading their own copy: the numeric columns are read-only views of the
+segments. The string columns are decoded from their shared codes and unique values into object
+arrays of each process, so they are not shared: every test case holds a pointer per row and a
+string per unique value of each of them, although it does not read or parse the users.
+
+The datasets are built in background threads, so the server keeps answering the other
+connections while the users of a new number of records are loaded.
+
+Each connection holds a reference on the datasets it attached to, which is released when it
+detaches or when the connection is closed, so a test case that crashes does not leak its
+datasets. The datasets without references are removed after an idle timeout, and the segments
+left by a server that was killed are removed when the next one starts.
+
+Start the server with:
+
+    python3 -m src.test_cases.dataset_server --idle_timeout 60
+
+and let extract_user_data use it by setting DATASET_SERVER=127.0.0.1:8889 in the environment
+of the test cases (the orchestrator does it with --dataset_server).
+"""
+
+import argparse
+import glob
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.test_cases.dataset import get_dataset_key
+from src.test_cases.util import load_users_dataframe
+from src.util.cache_data import register_result
+from src.util.logger import setup_logging
+from src.util.serializers import decode_strings, encode_strings
+from src.util.sockets import Client, Server
+from src.util.sockets.protocol import DISCONNECTED_MESSAGE
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Address of the dataset server
+DATASET_SERVER_HOST = "127.0.0.1"
+DATASET_SERVER_PORT = 8889
+
+# Environment variable with the address of the dataset server used by extract_user_data ("<host>:<port>")
+DATASET_SERVER_ENV = "DATASET_SERVER"
+
+# Prefix of the names of the shared memory segments, followed by the PID of the server
+SEGMENT_PREFIX = "udset_"
+# Folder of the shared memory segments on Linux
+SHM_FOLDER = "/dev/shm"
+
+# Maximum time to wait for a message while datasets are being built in seconds
+BUILD_POLL_INTERVAL = 0.05
+
+# Connections to the dataset server and segments attached by this process
+_CONNECTIONS = []
+_SEGMENTS = []
+
+class SharedDataset:
+    def __init__(self, key: str, df: pd.DataFrame, segment_prefix: str):
+        """
+        Initializes the SharedDataset class.
+
+        This class copies the columns of a DataFrame into shared memory segments, one per array, and
+        describes them in a layout sent to the processes attaching to the dataset. The numeric columns
+        are copied as they are, the string columns as codes into their unique values (see
+        src.util.serializers.encode_strings) and any other column is pickled.
+
+        Parameters:
+            key (str): The key of the dataset.
+            df (pd.DataFrame): The users.
+            segment_prefix (str): Prefix of the names of the segments.
+        """
+        self.key = key
+        self.references = {}
+        self.released_time = time.monotonic()
+        self._segment_prefix = segment_prefix
+        self._segments = []
+
+        columns = []
+        for column in df.columns:
+            values = df[column].to_numpy()
+            if isinstance(df[column].dtype, np.dtype) and df[column].dtype.kind in "biufcmM":
+                columns.append({"name": column, "kind": "array", "values": self._share_array(values=values)})
+            elif df[column].dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+                codes, offsets, data = encode_strings(values=values)
+                columns.append({"name": column, "kind": "strings", "codes": self._share_array(values=codes),
+                                "offsets": self._share_bytes(data=offsets.tobytes()), "data": self._share_bytes(data=data)})
+            else:
+                data = pickle.dumps(df[column].array, protocol=pickle.HIGHEST_PROTOCOL)
+                columns.append({"name": column, "kind": "pickle", "data": self._share_bytes(data=data)})
+
+        # A RangeIndex is described by its bounds, any other index is pickled
+        if isinstance(df.index, pd.RangeIndex):
+            index = {"kind": "range", "start": df.index.start, "stop": df.index.stop, "step": df.index.step}
+        else:
+            data = pickle.dumps(df.index, protocol=pickle.HIGHEST_PROTOCOL)
+            index = {"kind": "pickle", "data": self._share_bytes(data=data)}
+
+        self.layout = {"key": key, "num_rows": len(df), "index": index, "columns": columns}
+        self.nbytes = sum(segment.size for segment in self._segments)
+
+    def _create_segment(self, size: int) -> SharedMemory:
+        """
+        Creates a shared memory segment of the dataset.
+
+        Parameters:
+            size (int): Size of the segment in bytes.
+
+        Returns:
+            SharedMemory: The segment.
+        """
+        # Empty segments are not allowed
+        segment = SharedMemory(name=f"{self._segment_prefix}{len(self._segments)}", create=True, size=max(size, 1))
+        self._segments.append(segment)
+        return segment
+
+    def _share_array(self, values: np.ndarray) -> Dict:
+        """
+        Copies an array into a new segment.
+
+        Parameters:
+            values (np.ndarray): The array.
+
+        Returns:
+            Dict: The name of the segment, the type and the shape of the array.
+        """
+        segment = self._create_segment(size=values.nbytes)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[...] = values
+        return {"segment": segment.name, "dtype": values.dtype.str, "shape": list(values.shape)}
+
+    def _share_bytes(self, data: bytes) -> Dict:
+        """
+        Copies bytes into a new segment.
+
+        Parameters:
+            data (bytes): The bytes.
+
+        Returns:
+            Dict: The name of the segment and the number of bytes.
+        """
+        segment = self._create_segment(size=len(data))
+        segment.buf[:len(data)] = data
+        return {"segment": segment.name, "size": len(data)}
+
+    def unlink(self):
+        """
+        Removes the segments of the dataset. The processes attached to them keep their mappings.
+        """
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+def _is_running(pid: int) -> bool:
+    """
+    Checks whether a process is running.
+
+    Parameters:
+        pid (int): The PID of the process.
+
+    Returns:
+        bool: True if the process is running, False otherwise.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def remove_stale_segments():
+    """
+    Removes the segments left by the dataset servers that are no longer running.
+    """
+    for path in glob.glob(os.path.join(SHM_FOLDER, f"{SEGMENT_PREFIX}*")):
+        pid = os.path.basename(path)[len(SEGMENT_PREFIX):].split("_")[0]
+        if not pid.isdigit() or _is_running(pid=int(pid)):
+            continue
+
+        logger.warning(f"Removing the segment {path} left by the dataset server {pid}.")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class DatasetServer:
+    def __init__(self, host: str = DATASET_SERVER_HOST, port: int = DATASET_SERVER_PORT, idle_timeout: float = 60):
+        """
+        Initializes the DatasetServer class.
+
+        This class loads the datasets requested by the test cases into shared memory and counts the
+        references of each connection on them. The messages are:
+            - attach: Loads the dataset of num_records, source, perturb_columns and synthetic_options in a
+                      background thread if needed, takes a reference on it and answers its layout
+                      once it is loaded.
+            - detach: Releases a reference of the connection on the dataset of a key.
+            - ping: Answers an acknowledgement, to wait for the server to be ready.
+
+        Parameters:
+            host (str): The IP address of the server.
+            port (int): The port on which the server listens.
+            idle_timeout (float): Time to keep a dataset without references in seconds.
+        """
+        self._server = Server(host, port)
+        self._idle_timeout = idle_timeout
+        self._datasets = {}
+        # Connections waiting for the datasets being built, by key
+        self._pending = {}
+        # Datasets built by the background threads, or the errors of their build
+        self._built = queue.Queue()
+        self._next_dataset = 0
+
+    def _attach(self, connection_id: int, message: Dict) -> Dict:
+        """
+        Takes a reference of a connection on a dataset, or starts building it in a background thread.
+
+        The connections attaching to a dataset being built are answered by _finish_builds.
+
+        Parameters:
+            connection_id (int): ID of the connection.
+            message (Dict): The attach message.
+
+        Returns:
+            Dict: The layout of the dataset, or None if it is being built.
+        """
+        num_records = message["num_records"]
+        options = {"source": message.get("source", "json"), "perturb_columns": tuple(message.get("perturb_columns", ())),
+                   "synthetic_options": message.get("synthetic_options")}
+        key = f"{get_dataset_key(**options)}_{num_records}"
+
+        dataset = self._datasets.get(key)
+        if dataset is None:
+            if key not in self._pending:
+                segment_prefix = f"{SEGMENT_PREFIX}{os.getpid()}_{self._next_dataset}_"
+                self._next_dataset += 1
+                threading.Thread(target=self._build, name=f"build_{key}", daemon=True,
+                                 kwargs={"key": key, "num_records": num_records, "options": options,
+                                         "segment_prefix": segment_prefix}).start()
+                logger.info(f"Building the dataset {key}...")
+
+            self._pending.setdefault(key, []).append(connection_id)
+            return None
+
+        dataset.references[connection_id] = dataset.references.get(connection_id, 0) + 1
+        return dataset.layout
+
+    def _build(self, key: str, num_records: int, options: Dict, segment_prefix: str):
+        """
+        Loads the users of a dataset and copies them into shared memory, in a background thread.
+
+        Parameters:
+            key (str): The key of the dataset.
+            num_records (int): The number of records.
+            options (Dict): The source, perturb_columns and synthetic_options of the users.
+            segment_prefix (str): Prefix of the names of the segments.
+        """
+        try:
+            df_users = load_users_dataframe(num_records=num_records, **options)
+            self._built.put((key, SharedDataset(key=key, df=df_users, segment_prefix=segment_prefix), None))
+        except Exception as excep:
+            self._built.put((key, None, excep))
+
+    def _finish_builds(self):
+        """
+        Answers the connections waiting for the datasets built since the previous call.
+        """
+        while True:
+            try:
+                key, dataset, error = self._built.get_nowait()
+            except queue.Empty:
+                return
+
+            connection_ids = self._pending.pop(key, [])
+            if error is not None:
+                logger.error(f"Could not share the dataset {key}: {error}")
+                for connection_id in connection_ids:
+                    self._server.send(connection_id, {"type": "error", "error": str(error)})
+                continue
+
+            self._datasets[key] = dataset
+            logger.info(f"Shared the dataset {key} in {dataset.nbytes / 1024 ** 2:.1f} MB.")
+            for connection_id in connection_ids:
+                dataset.references[connection_id] = dataset.references.get(connection_id, 0) + 1
+                self._server.send(connection_id, {"type": "dataset", **dataset.layout})
+            # Every waiting connection may have been closed meanwhile
+            dataset.released_time = time.monotonic()
+
+    def _detach(self, connection_id: int, key: str = None):
+        """
+        Releases the references of a connection.
+
+        Parameters:
+            connection_id (int): ID of the connection.
+            key (str): The key of the dataset to release a reference on. If None, releases every reference of
+                       the connection.
+        """
+        for dataset in self._datasets.values():
+            if connection_id not in dataset.references or (key is not None and dataset.key != key):
+                continue
+
+            dataset.references[connection_id] -= 1
+            if key is None or dataset.references[connection_id] == 0:
+                del dataset.references[connection_id]
+            if len(dataset.references) == 0:
+                dataset.released_time = time.monotonic()
+
+    def _remove_idle_datasets(self):
+        """
+        Removes the datasets without references for longer than the idle timeout.
+        """
+        now = time.monotonic()
+        for key, dataset in list(self._datasets.items()):
+            if len(dataset.references) == 0 and now - dataset.released_time >= self._idle_timeout:
+                dataset.unlink()
+                del self._datasets[key]
+                logger.info(f"Removed the idle dataset {key}.")
+
+    def _handle_message(self, connection_id: int, message: Dict):
+        """
+        Handles a message of a connection.
+
+        Parameters:
+            connection_id (int): ID of the connection.
+            message (Dict): The message.
+        """
+        message_type = message.get("type")
+        if message_type == "attach":
+            # A request that cannot be loaded must not stop the server
+            try:
+                layout = self._attach(connection_id=connection_id, message=message)
+                if layout is not None:
+                    self._server.send(connection_id, {"type": "dataset", **layout})
+            except Exception as excep:
+                logger.error(f"Could not share the dataset of {message}: {excep}")
+                self._server.send(connection_id, {"type": "error", "error": str(excep)})
+        elif message_type == "detach":
+            self._detach(connection_id=connection_id, key=message["key"])
+            self._server.send(connection_id, {"type": "ack"})
+        elif message_type == "ping":
+            self._server.send(connection_id, {"type": "ack"})
+        elif message_type == DISCONNECTED_MESSAGE:
+            self._detach(connection_id=connection_id)
+            # A closed connection no longer waits for the datasets being built
+            for connection_ids in self._pending.values():
+                while connection_id in connection_ids:
+                    connection_ids.remove(connection_id)
+
+    def run(self):
+        """
+        Serves the datasets until the server is interrupted.
+        """
+        remove_stale_segments()
+        self._server.start()
+        logger.info(f"Dataset server listening on {self._server.host}:{self._server.port}.")
+
+        try:
+            while True:
+                timeout = BUILD_POLL_INTERVAL if self._pending else 1
+                for _, connection_id, message in self._server.get_messages(timeout=timeout):
+                    self._handle_message(connection_id=connection_id, message=message)
+                self._finish_builds()
+                self._remove_idle_datasets()
+        except KeyboardInterrupt:
+            logger.info("Stopping the dataset server...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stops the server and removes every dataset.
+        """
+        self._server.stop_server()
+        for dataset in self._datasets.values():
+            dataset.unlink()
+        self._datasets = {}
+
+        # The datasets built but not answered yet are removed as well, the ones still being built are
+        # removed by remove_stale_segments once this process exits
+        while not self._built.empty():
+            _, dataset, _ = self._built.get_nowait()
+            if dataset is not None:
+                dataset.unlink()
+
+
+def get_server_address() -> Tuple[str, int]:
+    """
+    Reads the address of the dataset server from the environment.
+
+    Returns:
+        Tuple[str, int]: The host and the port of the server, or None if no server is configured.
+    """
+    address = os.environ.get(DATASET_SERVER_ENV)
+    if not address:
+        return None
+
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+def _attach_segment(name: str) -> SharedMemory:
+    """
+    Attaches to a segment of the dataset server.
+
+    Parameters:
+        name (str): The name of the segment.
+
+    Returns:
+        SharedMemory: The segment.
+    """
+    segment = SharedMemory(name=name)
+    # The resource tracker would remove the segment when this process exits, while the server owns it
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+def _read_bytes(description: Dict) -> bytes:
+    """
+    Copies the bytes of a segment described by SharedDataset._share_bytes.
+
+    Parameters:
+        description (Dict): The description of the segment.
+
+    Returns:
+        bytes: The bytes.
+    """
+    segment = _attach_segment(name=description["segment"])
+    data = bytes(segment.buf[:description["size"]])
+    segment.close()
+    return data
+
+def _attach_array(description: Dict) -> np.ndarray:
+    """
+    Maps an array described by SharedDataset._share_array without copying it.
+
+    Parameters:
+        description (Dict): The description of the array.
+
+    Returns:
+        np.ndarray: The array, read-only since the other processes share it.
+    """
+    segment = _attach_segment(name=description["segment"])
+    # The segment stays mapped as long as this process lives, since the arrays refer to its buffer
+    _SEGMENTS.append(segment)
+
+    values = np.ndarray(description["shape"], dtype=np.dtype(description["dtype"]), buffer=segment.buf)
+    values.flags.writeable = False
+    return values
+
+def attach_dataset(num_records: int, source: str = "json", perturb_columns: Tuple[str, ...] = (),
+                   synthetic_options: Dict = None) -> pd.DataFrame:
+    """
+    Attaches to the users shared by the dataset server configured in the environment.
+
+    The numeric columns are read-only views of the shared segments, so a test case modifying them in
+    place must copy them first. The string columns are decoded into object arrays of this process. The connection to the server holds the reference on the dataset until
+    this process exits or calls detach_datasets.
+
+    Parameters:
+        num_records (int): The number of records.
+        source (str): The source of the users ("json" or "synthetic").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records.
+        synthetic_options (Dict): Options of generate_users.
+
+    Returns:
+        pd.DataFrame: The users, or None if no server is configured or it could not share them.
+    """
+    address = get_server_address()
+    if address is None:
+        return None
+
+    try:
+        client = Client(*address)
+        layout = client.send_message(message={"type": "attach", "num_records": num_records, "source": source,
+                                              "perturb_columns": list(perturb_columns),
+                                              "synthetic_options": synthetic_options})
+    except OSError as excep:
+        logger.warning(f"Could not attach to the dataset server {address[0]}:{address[1]}: {excep}")
+        return None
+
+    if layout["type"] == "error":
+        logger.warning(f"The dataset server could not share the users: {layout['error']}")
+        client.close()
+        return None
+    _CONNECTIONS.append(client)
+
+    if layout["index"]["kind"] == "range":
+        index = pd.RangeIndex(layout["index"]["start"], layout["index"]["stop"], layout["index"]["step"])
+    else:
+        index = pickle.loads(_read_bytes(description=layout["index"]["data"]))
+
+    columns = {}
+    for column in layout["columns"]:
+        if column["kind"] == "array":
+            columns[column["name"]] = _attach_array(description=column["values"])
+        elif column["kind"] == "strings":
+            segment = _attach_segment(name=column["codes"]["segment"])
+            codes = np.ndarray(column["codes"]["shape"], dtype=np.dtype(column["codes"]["dtype"]), buffer=segment.buf)
+            offsets = np.frombuffer(_read_bytes(description=column["offsets"]), dtype=np.int64)
+            columns[column["name"]] = decode_strings(codes=codes, offsets=offsets, data=_read_bytes(description=column["data"]))
+            # The decoded values do not refer to the codes, so their segment can be closed
+            del codes
+            segment.close()
+        else:
+            columns[column["name"]] = pickle.loads(_read_bytes(description=column["data"]))
+
+    # Without copy the DataFrame keeps the shared arrays as its blocks
+    df_users = pd.DataFrame(columns, index=index, copy=False)
+
+    # The entries derived from the users, such as their dictionary, are keyed by the dataset and size
+    register_result(data=df_users, key=layout["key"])
+    logger.info(f"Attached to {num_records} records shared by the dataset server!")
+    return df_users
+
+def detach_datasets():
+    """
+    Releases the references of this process on the datasets of the server.
+
+    The DataFrames already attached stay valid, their segments remain mapped until this process exits.
+    """
+    while _CONNECTIONS:
+        _CONNECTIONS.pop().close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Share the users with the processes of the test cases.")
+    parser.add_argument("--host", default=DATASET_SERVER_HOST, help="IP address of the server.")
+    parser.add_argument("--port", type=int, default=DATASET_SERVER_PORT, help="Port of the server.")
+    parser.add_argument("--idle_timeout", type=float, default=60,
+                        help="Time to keep a dataset without references in seconds.")
+
+    args = parser.parse_args()
+
+    # Stop gracefully on SIGTERM as well, so the segments are removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    DatasetServer(host=args.host, port=args.port, idle_timeout=args.idle_timeout).run()
@@ -0,0 +1,409 @@
+"""
+Comparison of the execution engines of the logical operations of the test cases.
+
+The same operations run on several representations of the users:
+    - pandas: A DataFrame.
+    - records: A list of dictionaries, as the dictionary test cases.
+    - numpy: A NumPy structured array, grouped with np.unique and np.bincount.
+    - columns: A dictionary of lists, one list per column.
+
+The operations are the overwrite of a column (group 0), the count of the women per country
+(group 1), their average age per country (group 1) and the count of the registrations per
+nationality and month (group 3). Every engine works on the columns used by the operations and
+leaves the missing values of the keys out of the groups, as pandas does. The time and the peak
+of the memory allocated by each operation are tabulated per number of records, which shows where
+each representation stops scaling:
+
+    python3 -m src.test_cases.engines --num_records 1000 10000 100000 1000000 --repeat 5 --check
+"""
+
+import argparse
+import math
+import os
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.test_cases.synthetic import parse_synthetic_options
+from src.test_cases.util import extract_user_data
+from src.util.logger import setup_logging
+from src.util.measurement import measure
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Columns used by the operations, the only ones given to the engines
+OPERATION_COLUMNS = ["password", "gender", "country", "age", "nationality", "registered_date"]
+
+# Logical operations, implemented by a method of the same name in every engine
+OPERATIONS = ["overwrite_column", "filter_group_count", "group_mean", "datetime_bucket_count"]
+
+# Value replacing the passwords in overwrite_column
+MASKED_PASSWORD = "XXXXXXXX"
+
+# File where the comparison is written
+ENGINE_COMPARISON_FILE_PATH = "results/engine_comparison.csv"
+
+class Engine:
+    """
+    Representation of the users along with its implementation of the operations.
+
+    Each operation returns its result in the representation of the engine, and to_dict converts it
+    to a dictionary so the results of the engines can be compared.
+    """
+
+    name = None
+
+    def prepare(self, df: pd.DataFrame):
+        """
+        Converts the users to the representation of the engine.
+
+        Parameters:
+            df (pd.DataFrame): The users, with the OPERATION_COLUMNS.
+
+        Returns:
+            The users in the representation of the engine.
+        """
+        raise NotImplementedError
+
+    def overwrite_column(self, data):
+        """
+        Replaces all the passwords with MASKED_PASSWORD.
+        """
+        raise NotImplementedError
+
+    def filter_group_count(self, data):
+        """
+        Counts the women per country.
+        """
+        raise NotImplementedError
+
+    def group_mean(self, data):
+        """
+        Computes the average age of the women per country.
+        """
+        raise NotImplementedError
+
+    def datetime_bucket_count(self, data):
+        """
+        Counts the registrations per nationality and month.
+        """
+        raise NotImplementedError
+
+    def to_dict(self, operation: str, data, result) -> Dict:
+        """
+        Converts the result of an operation to a dictionary.
+
+        Parameters:
+            operation (str): Name of the operation.
+            data: The users the operation ran on.
+            result: The result of the operation.
+
+        Returns:
+            Dict: The result, the number of users per password for overwrite_column, and the value per
+                  country or per (nationality, "YYYY-MM") for the other operations.
+        """
+        raise NotImplementedError
+
+
+class PandasEngine(Engine):
+    name = "pandas"
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.copy()
+
+    def overwrite_column(self, data: pd.DataFrame):
+        data["password"] = MASKED_PASSWORD
+
+    def filter_group_count(self, data: pd.DataFrame) -> pd.Series:
+        return data[data["gender"] == "female"].groupby("country").size()
+
+    def group_mean(self, data: pd.DataFrame) -> pd.Series:
+        return data[data["gender"] == "female"].groupby("country")["age"].mean()
+
+    def datetime_bucket_count(self, data: pd.DataFrame) -> pd.Series:
+        # The dates are in UTC, the time zone is dropped by the periods
+        months = pd.to_datetime(data["registered_date"].str[:-1]).dt.to_period("M")
+        return data.groupby([data["nationality"], months]).size()
+
+    def to_dict(self, operation: str, data: pd.DataFrame, result) -> Dict:
+        if operation == "overwrite_column":
+            return data["password"].value_counts().to_dict()
+        if operation == "datetime_bucket_count":
+            return {(nationality, str(month)): count for (nationality, month), count in result.items()}
+        return result.to_dict()
+
+
+class RecordsEngine(Engine):
+    name = "records"
+
+    def prepare(self, df: pd.DataFrame) -> List[Dict]:
+        # The missing values are None
+        return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+    def overwrite_column(self, data: List[Dict]):
+        for user in data:
+            user["password"] = MASKED_PASSWORD
+
+    def filter_group_count(self, data: List[Dict]) -> Dict:
+        return Counter(user["country"] for user in data if user["gender"] == "female" and user["country"] is not None)
+
+    def group_mean(self, data: List[Dict]) -> Dict:
+        sums = defaultdict(int)
+        counts = defaultdict(int)
+        for user in data:
+            if user["gender"] == "female" and user["country"] is not None:
+                sums[user["country"]] += user["age"]
+                counts[user["country"]] += 1
+        return {country: sums[country] / counts[country] for country in counts}
+
+    def datetime_bucket_count(self, data: List[Dict]) -> Dict:
+        # The dates are ISO 8601 strings, so their first 7 characters are the month
+        return Counter((user["nationality"], user["registered_date"][:7]) for user in data
+                       if user["nationality"] is not None and user["registered_date"] is not None)
+
+    def to_dict(self, operation: str, data: List[Dict], result) -> Dict:
+        if operation == "overwrite_column":
+            return Counter(user["password"] for user in data)
+        return dict(result)
+
+
+class NumpyEngine(Engine):
+    name = "numpy"
+
+    def prepare(self, df: pd.DataFrame) -> np.ndarray:
+        # The strings are stored with a fixed width, the one of the longest value of their column, and
+        # the passwords must fit the masked one. The missing values are empty strings
+        dtypes = []
+        for column in df.columns:
+            if df[column].dtype == object:
+                width = max(int(df[column].str.len().fillna(0).max()), len(MASKED_PASSWORD) if column == "password" else 1)
+                dtypes.append((column, f"U{width}"))
+            else:
+                dtypes.append((column, df[column].dtype))
+
+        data = np.empty(len(df), dtype=dtypes)
+        for column in df.columns:
+            values = df[column].to_numpy()
+            data[column] = np.where(pd.isna(values), "", values) if df[column].dtype == object else values
+        return data
+
+    def overwrite_column(self, data: np.ndarray):
+        data["password"] = MASKED_PASSWORD
+
+    def filter_group_count(self, data: np.ndarray):
+        countries, codes = np.unique(data["country"][(data["gender"] == "female") & (data["country"] != "")],
+                                     return_inverse=True)
+        return countries, np.bincount(codes, minlength=len(countries))
+
+    def group_mean(self, data: np.ndarray):
+        is_female = (data["gender"] == "female") & (data["country"] != "")
+        countries, codes = np.unique(data["country"][is_female], return_inverse=True)
+        sums = np.bincount(codes, weights=data["age"][is_female], minlength=len(countries))
+        return countries, sums / np.bincount(codes, minlength=len(countries))
+
+    def datetime_bucket_count(self, data: np.ndarray):
+        is_present = (data["nationality"] != "") & (data["registered_date"] != "")
+        # The trailing "Z" is cut, since NumPy deprecated parsing the time zones
+        months = data["registered_date"][is_present].astype("U23").astype("datetime64[ms]").astype("datetime64[M]")
+        nationalities, nationality_codes = np.unique(data["nationality"][is_present], return_inverse=True)
+        unique_months, month_codes = np.unique(months, return_inverse=True)
+
+        # Count the pairs of codes at once, keeping the pairs that occur
+        counts = np.bincount(nationality_codes * len(unique_months) + month_codes,
+                             minlength=len(nationalities) * len(unique_months))
+        pairs = np.flatnonzero(counts)
+        return nationalities[pairs // len(unique_months)], unique_months[pairs % len(unique_months)], counts[pairs]
+
+    def to_dict(self, operation: str, data: np.ndarray, result) -> Dict:
+        if operation == "overwrite_column":
+            return {str(value): int(count) for value, count in zip(*np.unique(data["password"], return_counts=True))}
+        if operation == "datetime_bucket_count":
+            return {(str(nationality), str(month)): int(count) for nationality, month, count in zip(*result)}
+        return {str(key): value.item() for key, value in zip(*result)}
+
+
+class ColumnsEngine(Engine):
+    name = "columns"
+
+    def prepare(self, df: pd.DataFrame) -> Dict[str, list]:
+        # The missing values are None
+        return {column: df[column].astype(object).where(df[column].notna(), None).tolist() for column in df.columns}
+
+    def overwrite_column(self, data: Dict[str, list]):
+        data["password"] = [MASKED_PASSWORD] * len(data["password"])
+
+    def filter_group_count(self, data: Dict[str, list]) -> Dict:
+        return Counter(country for gender, country in zip(data["gender"], data["country"])
+                       if gender == "female" and country is not None)
+
+    def group_mean(self, data: Dict[str, list]) -> Dict:
+        sums = defaultdict(int)
+        counts = defaultdict(int)
+        for gender, country, age in zip(data["gender"], data["country"], data["age"]):
+            if gender == "female" and country is not None:
+                sums[country] += age
+                counts[country] += 1
+        return {country: sums[country] / counts[country] for country in counts}
+
+    def datetime_bucket_count(self, data: Dict[str, list]) -> Dict:
+        # The dates are ISO 8601 strings, so their first 7 characters are the month
+        return Counter((nationality, date[:7]) for nationality, date in zip(data["nationality"], data["registered_date"])
+                       if nationality is not None and date is not None)
+
+    def to_dict(self, operation: str, data: Dict[str, list], result) -> Dict:
+        if operation == "overwrite_column":
+            return Counter(data["password"])
+        return dict(result)
+
+
+# Engines by name
+ENGINES = {engine.name: engine for engine in [PandasEngine(), RecordsEngine(), NumpyEngine(), ColumnsEngine()]}
+
+def measure_allocated_memory(func: Callable, *args) -> tuple:
+    """
+    Measures the memory allocated by a call with tracemalloc.
+
+    Parameters:
+        func (Callable): The function.
+        *args: The arguments of the function.
+
+    Returns:
+        tuple: The result of the call, the memory still allocated after it and the peak of the memory
+               allocated during it, both in bytes.
+    """
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        allocated, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, allocated, peak
+
+def _is_same_result(expected: Dict, actual: Dict) -> bool:
+    """
+    Compares the results of two engines, with a tolerance for the averages.
+
+    Parameters:
+        expected (Dict): The result of the reference engine.
+        actual (Dict): The result of the compared engine.
+
+    Returns:
+        bool: True if the results are the same, False otherwise.
+    """
+    return expected.keys() == actual.keys() and all(math.isclose(expected[key], actual[key], rel_tol=1e-9)
+                                                    for key in expected)
+
+def compare_engines(num_records_list: List[int], engines: List[str] = None, operations: List[str] = None,
+                    source: str = "json", synthetic_options: Dict = None, warmup: int = 0, repeat: int = 1,
+                    max_seconds: float = None, check: bool = False) -> pd.DataFrame:
+    """
+    Measures the operations on every engine for each number of records.
+
+    The time of an operation is measured with src.util.measurement.measure, and its peak memory in
+    another call under tracemalloc, which slows it down. An engine whose operation takes longer than
+    max_seconds is not run with the larger numbers of records.
+
+    Parameters:
+        num_records_list (List[int]): Numbers of records.
+        engines (List[str]): Names of the engines. Default is every engine.
+        operations (List[str]): Names of the operations. Default is every operation.
+        source (str): The source of the users ("json" or "synthetic").
+        synthetic_options (Dict): Options of generate_users, for the synthetic source.
+        warmup (int): Number of unmeasured repetitions of each operation run before the measured ones.
+        repeat (int): Number of measured repetitions of each operation.
+        max_seconds (float): Median time of an operation after which its engine stops scaling. If None,
+                             every engine runs with every number of records.
+        check (bool): Whether to check that every engine gives the result of the first one.
+
+    Returns:
+        pd.DataFrame: One row per number of records, engine and operation, with the median time in
+                      seconds, the peak of the allocated memory and the memory of the representation in MB.
+    """
+    engines = [ENGINES[name] for name in (engines or ENGINES)]
+    operations = operations or OPERATIONS
+    stopped_engines = set()
+
+    rows = []
+    for num_records in sorted(num_records_list):
+        df_users = extract_user_data(num_records=num_records, output_type="dataframe", source=source,
+                                     synthetic_options=synthetic_options)[OPERATION_COLUMNS]
+
+        expected = {}
+        for engine in engines:
+            if engine.name in stopped_engines:
+                continue
+
+            data, data_bytes, _ = measure_allocated_memory(engine.prepare, df_users)
+            for operation in operations:
+                func = getattr(engine, operation)
+                result = measure(operation=lambda: func(data), warmup=warmup, repeat=repeat)
+                output, _, peak_bytes = measure_allocated_memory(func, data)
+
+                if check:
+                    actual = engine.to_dict(operation=operation, data=data, result=output)
+                    if not _is_same_result(expected=expected.setdefault(operation, actual), actual=actual):
+                        logger.error(f"The engine {engine.name} gives another result for {operation} with "
+                                     f"{num_records} records.")
+                del output
+
+                logger.info(f"{engine.name} {operation} with {num_records} records: {result.median_ns / 1e9} seconds, "
+                            f"peak of {peak_bytes / 1024 ** 2:.2f} MB")
+                rows.append({"num_records": num_records, "engine": engine.name, "operation": operation,
+                             "median": result.median_ns / 1e9, "peak_mb": peak_bytes / 1024 ** 2,
+                             "data_mb": data_bytes / 1024 ** 2})
+
+                if max_seconds is not None and result.median_ns / 1e9 > max_seconds:
+                    logger.warning(f"The engine {engine.name} took longer than {max_seconds} seconds for {operation}, "
+                                   f"it is not run with more records.")
+                    stopped_engines.add(engine.name)
+            del data
+
+    return pd.DataFrame(rows)
+
+def format_comparison(comparison: pd.DataFrame) -> str:
+    """
+    Formats the comparison as a table with the engines side by side.
+
+    Parameters:
+        comparison (pd.DataFrame): The comparison returned by compare_engines.
+
+    Returns:
+        str: One row per number of records and operation, and the median time and the peak memory of
+             each engine in its column.
+    """
+    cells = comparison.assign(cell=[f"{median:.4g} s / {peak_mb:.1f} MB"
+                                    for median, peak_mb in zip(comparison["median"], comparison["peak_mb"])])
+    table = cells.pivot(index=["num_records", "operation"], columns="engine", values="cell").fillna("-")
+    return table.to_string()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the execution engines of the operations of the test cases.")
+    parser.add_argument("--num_records", type=int, nargs="+", required=True, help="Numbers of records.")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=None, help="Engines to compare.")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=None, help="Operations to run.")
+    parser.add_argument("--source", default="json", choices=["json", "synthetic"], help="Source of the user data.")
+    parser.add_argument("--synthetic_options", type=parse_synthetic_options, default=None,
+                        help="Options of generate_users for the synthetic source as a JSON object.")
+    parser.add_argument("--warmup", type=int, default=0, help="Number of unmeasured repetitions of each operation.")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of measured repetitions of each operation.")
+    parser.add_argument("--max_seconds", type=float, default=None,
+                        help="Median time of an operation after which its engine is not run with more records.")
+    parser.add_argument("--check", action="store_true", help="Check that every engine gives the same results.")
+    parser.add_argument("--output", default=ENGINE_COMPARISON_FILE_PATH, help="CSV file of the comparison.")
+
+    args = parser.parse_args()
+
+    comparison = compare_engines(num_records_list=args.num_records, engines=args.engines, operations=args.operations,
+                                 source=args.source, synthetic_options=args.synthetic_options, warmup=args.warmup,
+                                 repeat=args.repeat, max_seconds=args.max_seconds, check=args.check)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    comparison.to_csv(args.output, index=False)
+    logger.info(f"Comparison of the engines (median time / peak memory), written to {args.output}:\n"
+                f"{format_comparison(comparison=comparison)}")
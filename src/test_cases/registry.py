@@ -0,0 +1,133 @@
+"""
+Registry of the benchmark cases.
+
+A case declares the representation of the users it works on, an optional setup and the
+operation measured, tagged with its group and variant. The modules of src/test_cases/<group>/
+register their cases with register_case, and src.test_cases.runner runs any selection of them
+with the same loading, measurement and reporting to the profiler.
+
+    @register_case(name="0/data_frame", group=0, variant="pandas", representation="dataframe")
+    def replace_passwords(df_users, recorder):
+        df_users["password"] = "XXXXXXXX"
+"""
+
+import importlib
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Folder containing the modules of the cases, each one is named "<group>/<module>"
+TEST_CASES_FOLDER = Path(__file__).resolve().parent
+
+# Representations of the users given to the operations, as returned by extract_user_data
+REPRESENTATIONS = ["dataframe", "dictionary", "both", "parsed_dataframe", "tuples", "slots", "namedtuples", "arrays"]
+
+# Registered cases by name
+CASES: Dict[str, "BenchmarkCase"] = {}
+
+class BenchmarkCase:
+    def __init__(self, name: str, group: int, variant: str, representation: str, operation: Callable,
+                 setup: Callable = None, description: str = None):
+        """
+        Initializes the BenchmarkCase class.
+
+        Parameters:
+            name (str): Name of the case ("<group>/<module>" for the cases of the modules).
+            group (int): Group of the case, the cases of a group compute the same result.
+            variant (str): Way the case computes it, such as "pandas", "dict", "iterative" or "vectorized".
+            representation (str): Representation of the users given to the operation ("dataframe",
+                                  "dictionary", "both" for a tuple of both, "parsed_dataframe" for the
+                                  DataFrame with its datetimes parsed, or one of the compact
+                                  representations of src.test_cases.util.dataframe_to_records).
+            operation (Callable): Operation measured, called with the input of the repetition and the
+                                  SpanRecorder of the run to measure its phases.
+            setup (Callable): Function creating the input of each repetition from the users, it is not
+                              measured. It is needed when the operation modifies its input. If None, every
+                              repetition works on the users themselves.
+            description (str): Description of the case. Default is the docstring of the operation.
+        """
+        if representation not in REPRESENTATIONS:
+            raise ValueError(f"Invalid representation. Please choose one of {', '.join(REPRESENTATIONS)}.")
+
+        self.name = name
+        self.group = group
+        self.variant = variant
+        self.representation = representation
+        self.operation = operation
+        self.setup = setup
+        self.description = description or (operation.__doc__ or "").strip()
+
+    def __repr__(self) -> str:
+        return f"BenchmarkCase({self.name!r}, group={self.group}, variant={self.variant!r})"
+
+
+def register_case(name: str, group: int, variant: str, representation: str, setup: Callable = None,
+                  description: str = None):
+    """
+    Decorator registering a function as the operation of a case.
+
+    A case registered again replaces the previous one, since a module run as __main__ registers its
+    cases before the runner may import it.
+
+    Parameters:
+        name (str): Name of the case.
+        group (int): Group of the case.
+        variant (str): Variant of the case.
+        representation (str): Representation of the users given to the operation.
+        setup (Callable): Function creating the input of each repetition from the users.
+        description (str): Description of the case.
+
+    Returns:
+        Callable: The decorator, which returns the function unchanged.
+    """
+    def decorator(operation):
+        CASES[name] = BenchmarkCase(name=name, group=group, variant=variant, representation=representation,
+                                    operation=operation, setup=setup, description=description)
+        return operation
+
+    return decorator
+
+def load_cases():
+    """
+    Imports the modules of the cases, so they are registered.
+    """
+    for path in sorted(TEST_CASES_FOLDER.glob("*/*.py")):
+        importlib.import_module(f"src.test_cases.{path.parent.name}.{path.stem}")
+
+def get_case(name: str) -> BenchmarkCase:
+    """
+    Retrieves a registered case, loading the modules of the cases if needed.
+
+    Parameters:
+        name (str): Name of the case.
+
+    Returns:
+        BenchmarkCase: The case.
+    """
+    if name not in CASES:
+        load_cases()
+    if name not in CASES:
+        raise KeyError(f"Unknown case {name}. Available cases: {', '.join(sorted(CASES))}.")
+
+    return CASES[name]
+
+def select_cases(names: List[str] = None, groups: List[int] = None, variants: List[str] = None,
+                 representations: List[str] = None) -> List[BenchmarkCase]:
+    """
+    Selects the registered cases matching every given filter.
+
+    Parameters:
+        names (List[str]): Names of the cases. If None, any name.
+        groups (List[int]): Groups of the cases. If None, any group.
+        variants (List[str]): Variants of the cases. If None, any variant.
+        representations (List[str]): Representations of the cases. If None, any representation.
+
+    Returns:
+        List[BenchmarkCase]: The cases sorted by name.
+    """
+    load_cases()
+
+    cases = [get_case(name) for name in names] if names else list(CASES.values())
+    return sorted((case for case in cases
+                   if (groups is None or case.group in groups) and (variants is None or case.variant in variants)
+                   and (representations is None or case.representation in representations)),
+                  key=lambda case: case.name)
@@ -0,0 +1,194 @@
+"""
+Runner of the benchmark cases registered in src.test_cases.registry.
+
+The runner loads the users once for every representation needed by the selected cases, then
+measures each case with the same repetitions, spans and reporting to the profiler. A case
+module runs its own case with run_cli, and any selection of cases runs in a single process
+with:
+
+    python3 -m src.test_cases.runner --groups 0 1 --variants pandas --num_records 10000 --repeat 5
+"""
+
+import argparse
+from typing import Dict, List
+
+from src.test_cases.registry import BenchmarkCase, get_case, select_cases
+from src.test_cases.synthetic import parse_synthetic_options
+from src.test_cases.util import extract_user_data
+from src.util.logger import setup_logging
+from src.util.measurement import MeasurementResult, measure
+from src.util.sockets import Client
+from src.util.spans import SpanRecorder
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Address of the control server of the profiler
+PROFILER_HOST = "127.0.0.1"
+PROFILER_PORT = 8888
+
+def connect_to_profiler() -> Client:
+    """
+    Connects to the profiler if it is running.
+
+    Returns:
+        Client: Client connected to the profiler, or None if the profiler is not running.
+    """
+    try:
+        return Client(PROFILER_HOST, PROFILER_PORT)
+    except OSError:
+        logger.debug("\nTest running without profiling")
+        return None
+
+def run_case(case: BenchmarkCase, users, num_records: int, warmup: int = 0, repeat: int = 1, run_id: str = None,
+             client: Client = None) -> MeasurementResult:
+    """
+    Measures the operation of a case and reports it to the profiler.
+
+    Parameters:
+        case (BenchmarkCase): The case.
+        users: The users in the representation of the case.
+        num_records (int): The number of records of the users.
+        warmup (int): Number of unmeasured repetitions run before the measured ones.
+        repeat (int): Number of measured repetitions.
+        run_id (str): Identifier of the run reported to the profiler.
+        client (Client): Client connected to the profiler. If None, the result is only logged.
+
+    Returns:
+        MeasurementResult: The statistics of the measured repetitions.
+    """
+    # Record the phases of the case and report them to the profiler
+    recorder = SpanRecorder(client=client)
+
+    # Start program
+    if client is not None:
+        client.send_start(run_id=run_id, case=case.name, num_records=num_records)
+
+    def operation(case_input):
+        """
+        Operation measured by the case.
+
+        Parameters:
+            case_input: The input of the repetition, given by the setup of the case.
+        """
+        with recorder.span("operation"):
+            case.operation(case_input, recorder)
+
+    # Without setup, every repetition works on the users themselves
+    setup = (lambda: case.setup(users)) if case.setup is not None else (lambda: users)
+
+    logger.info(f"Running the case {case.name} ({case.variant}) with {num_records} records...")
+    result = measure(operation=operation, setup=setup, warmup=warmup, repeat=repeat)
+    result.log()
+    # Cost of the operation per record, comparable across the numbers of records
+    per_record_ns = result.median_ns / num_records if num_records else None
+    if per_record_ns is not None:
+        logger.info(f"Per-record cost: {per_record_ns:.1f} ns")
+    recorder.log_spans()
+
+    # Report the result to the profiler
+    if client is not None:
+        recorder.flush()
+        client.send_result(execution_time_ns=result.median_ns, per_record_ns=per_record_ns, **result.summary())
+
+    return result
+
+def run_cases(cases: List[BenchmarkCase], num_records: int, warmup: int = 0, repeat: int = 1, source: str = "json",
+              run_id: str = None, synthetic_options: Dict = None) -> Dict[str, MeasurementResult]:
+    """
+    Runs cases in this process on the same users.
+
+    The users are loaded before the first case for every representation of the cases. The profiler
+    attaches to this process at the start of each case, and each case is reported with its own run
+    ID when several cases run.
+
+    Parameters:
+        cases (List[BenchmarkCase]): The cases.
+        num_records (int): The number of records.
+        warmup (int): Number of unmeasured repetitions of each case run before the measured ones.
+        repeat (int): Number of measured repetitions of each case.
+        source (str): The source of the users ("json" or "synthetic").
+        run_id (str): Identifier of the run reported to the profiler.
+        synthetic_options (Dict): Options of generate_users, for the synthetic source.
+
+    Returns:
+        Dict[str, MeasurementResult]: The statistics of each case by name.
+    """
+    # Extract data
+    users = {}
+    for representation in dict.fromkeys(case.representation for case in cases):
+        users[representation] = extract_user_data(num_records=num_records, output_type=representation, source=source,
+                                                   synthetic_options=synthetic_options)
+    logger.info(f"The required information was loaded successfully. Number of records: {num_records}")
+
+    client = connect_to_profiler()
+    results = {}
+    try:
+        for case in cases:
+            case_run_id = run_id
+            if run_id is not None and len(cases) > 1:
+                case_run_id = f"{run_id}_{case.name.replace('/', '_')}"
+
+            results[case.name] = run_case(case=case, users=users[case.representation], num_records=num_records,
+                                          warmup=warmup, repeat=repeat, run_id=case_run_id, client=client)
+    finally:
+        if client is not None:
+            client.close()
+
+    return results
+
+def add_run_arguments(parser: argparse.ArgumentParser, is_num_records_required: bool = True):
+    """
+    Adds the arguments of a run, passed to every case by the orchestrator.
+
+    Parameters:
+        parser (argparse.ArgumentParser): The parser.
+        is_num_records_required (bool): Whether the number of records is required.
+    """
+    parser.add_argument("--num_records", type=int, required=is_num_records_required, help="Number of records to process")
+    parser.add_argument("--run_id", help="Identifier of the run reported to the profiler")
+    parser.add_argument("--warmup", type=int, default=0, help="Number of unmeasured repetitions run before the measured ones")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of measured repetitions")
+    parser.add_argument("--source", default="json", choices=["json", "synthetic"], help="Source of the user data")
+    parser.add_argument("--synthetic_options", type=parse_synthetic_options, default=None,
+                        help="Options of generate_users for the synthetic source as a JSON object, "
+                             "such as '{\"skew\": \"zipf\", \"cardinalities\": {\"city\": 50000}}'")
+
+def run_cli(name: str):
+    """
+    Runs a case with the arguments of the command line, for the modules run with python -m.
+
+    Parameters:
+        name (str): Name of the case.
+    """
+    case = get_case(name=name)
+
+    # Use argparse to get num_records from the terminal
+    parser = argparse.ArgumentParser(description=case.description or "Perform a test.")
+    add_run_arguments(parser=parser)
+    args = parser.parse_args()
+
+    run_cases(cases=[case], num_records=args.num_records, warmup=args.warmup, repeat=args.repeat, source=args.source,
+              run_id=args.run_id, synthetic_options=args.synthetic_options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a selection of cases in a single process.")
+    add_run_arguments(parser=parser, is_num_records_required=False)
+    parser.add_argument("--cases", nargs="+", default=None, help="Names of the cases. Default is every case.")
+    parser.add_argument("--groups", type=int, nargs="+", default=None, help="Groups of the cases.")
+    parser.add_argument("--variants", nargs="+", default=None, help="Variants of the cases.")
+    parser.add_argument("--list", action="store_true", help="List the selected cases without running them.")
+
+    args = parser.parse_args()
+
+    selected_cases = select_cases(names=args.cases, groups=args.groups, variants=args.variants)
+    if args.list:
+        for selected_case in selected_cases:
+            print(f"{selected_case.name}\tgroup {selected_case.group}\t{selected_case.variant}\t"
+                  f"{selected_case.representation}\t{selected_case.description}")
+    elif args.num_records is None:
+        parser.error("the following arguments are required: --num_records")
+    else:
+        run_cases(cases=selected_cases, num_records=args.num_records, warmup=args.warmup, repeat=args.repeat,
+                  source=args.source, run_id=args.run_id, synthetic_options=args.synthetic_options)
@@ -0,0 +1,491 @@
+"""
+Offline generator of synthetic user data with the schema of the downloaded users.
+
+The users are generated column by column with NumPy from a seed, so the same options always
+produce the same DataFrame and tens of millions of rows can be generated without any Python
+work per row. Every column is drawn from its own random generators in blocks of BLOCK_SIZE rows,
+so the users of a smaller number of records are the first rows of a larger one, as the downloaded
+users are. Unlike the downloaded users, the shape of the data can be controlled: the
+cardinality of the key columns, the skew of their distribution, the rate of missing values
+and the length of the generated strings.
+
+Write a JSON file that can replace the downloaded one with:
+
+    python3 -m src.test_cases.synthetic --num_records 5000 --output testing_data/users_data.json
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import zlib
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.util.logger import setup_logging
+
+# Set up the logging configuration
+logger = setup_logging()
+
+# Nationalities of randomuser.me and their countries
+NATIONALITIES = {
+    "AU": "Australia", "BR": "Brazil", "CA": "Canada", "CH": "Switzerland", "DE": "Germany", "DK": "Denmark",
+    "ES": "Spain", "FI": "Finland", "FR": "France", "GB": "United Kingdom", "IE": "Ireland", "IN": "India",
+    "IR": "Iran", "MX": "Mexico", "NL": "Netherlands", "NO": "Norway", "NZ": "New Zealand", "RS": "Serbia",
+    "TR": "Turkey", "UA": "Ukraine", "US": "United States",
+}
+
+# Number of distinct values of the columns drawn from a vocabulary
+DEFAULT_CARDINALITIES = {
+    "nationality": len(NATIONALITIES),
+    "first_name": 2000,
+    "last_name": 2000,
+    "street_name": 2000,
+    "city": 1000,
+    "state": 200,
+    "timezone": 27,
+    "password": 10000,
+}
+
+# Ranges of the generated dates and the date the ages are computed at
+DOB_RANGE = ("1945-01-01", "2004-01-01")
+REGISTERED_RANGE = ("2002-01-01", "2022-01-01")
+REFERENCE_DATE = "2024-01-01"
+# Number of rows drawn from each random generator of a column
+BLOCK_SIZE = 65536
+
+def _get_rng(seed: int, stream: str, block: int = 0) -> np.random.Generator:
+    """
+    Creates the random generator of a block of a stream of random values.
+
+    Parameters:
+        seed (int): The seed of the users.
+        stream (str): The name of the stream, such as the column drawn from it.
+        block (int): The index of the block.
+
+    Returns:
+        np.random.Generator: The random generator.
+    """
+    return np.random.default_rng([seed, zlib.crc32(stream.encode()), block])
+
+def _draw_rows(seed: int, stream: str, num_records: int, draw) -> np.ndarray:
+    """
+    Draws the values of a stream for every row, block by block.
+
+    Each block of BLOCK_SIZE rows is drawn whole from its own random generator and the last one is
+    cut, so the values of the first rows do not depend on the number of rows.
+
+    Parameters:
+        seed (int): The seed of the users.
+        stream (str): The name of the stream.
+        num_records (int): The number of rows.
+        draw: Function drawing the values of a block, given its random generator and number of rows.
+
+    Returns:
+        np.ndarray: The values.
+    """
+    blocks = [draw(_get_rng(seed=seed, stream=stream, block=block), BLOCK_SIZE)[:num_records - start]
+              for block, start in enumerate(range(0, num_records, BLOCK_SIZE))]
+    return np.concatenate(blocks) if blocks else draw(_get_rng(seed=seed, stream=stream), 0)
+
+def _random_words(rng: np.random.Generator, count: int, length: int) -> np.ndarray:
+    """
+    Generates distinct capitalized random words.
+
+    Parameters:
+        rng (np.random.Generator): The random generator.
+        count (int): The number of words.
+        length (int): The number of letters of each word.
+
+    Returns:
+        np.ndarray: Object array of the words.
+    """
+    letters = rng.integers(ord("a"), ord("z") + 1, size=(count, length), dtype=np.uint8)
+    words = np.char.capitalize(letters.view(f"S{length}").ravel().astype(f"U{length}"))
+
+    # Short words may collide, the index keeps them distinct
+    if len(np.unique(words)) < count:
+        words = np.char.add(words, np.arange(count).astype(str))
+
+    return words.astype(object)
+
+def _draw_codes(rng: np.random.Generator, num_records: int, cardinality: int, skew: str,
+                zipf_exponent: float) -> np.ndarray:
+    """
+    Draws the codes of the values of a column in its vocabulary.
+
+    Parameters:
+        rng (np.random.Generator): The random generator.
+        num_records (int): The number of codes.
+        cardinality (int): The size of the vocabulary.
+        skew (str): The distribution of the codes ("uniform" or "zipf").
+        zipf_exponent (float): The exponent of the Zipf distribution, the code k having a
+                               probability proportional to 1 / (k + 1) ** zipf_exponent.
+
+    Returns:
+        np.ndarray: The codes.
+    """
+    if skew == "uniform":
+        return rng.integers(0, cardinality, size=num_records)
+
+    probabilities = 1 / np.arange(1, cardinality + 1) ** zipf_exponent
+    return rng.choice(cardinality, size=num_records, p=probabilities / probabilities.sum())
+
+def _random_dates(rng: np.random.Generator, num_records: int, date_range: tuple) -> np.ndarray:
+    """
+    Draws uniformly distributed dates.
+
+    Parameters:
+        rng (np.random.Generator): The random generator.
+        num_records (int): The number of dates.
+        date_range (tuple): The first and last dates as ISO strings.
+
+    Returns:
+        np.ndarray: The dates as datetime64[ms].
+    """
+    start, end = (np.datetime64(date, "ms").astype(np.int64) for date in date_range)
+    return rng.integers(start, end, size=num_records).astype("datetime64[ms]")
+
+def _join_characters(parts: list, num_strings: int) -> np.ndarray:
+    """
+    Builds strings from their characters, one string per row of the parts.
+
+    Building the strings from their characters avoids formatting each value in Python.
+
+    Parameters:
+        parts (list): The parts of the strings in order, either matrices of character codes with
+                      one row per string, or strings repeated in every string.
+        num_strings (int): The number of strings.
+
+    Returns:
+        np.ndarray: Object array of the strings.
+    """
+    widths = [len(part) if isinstance(part, str) else part.shape[1] for part in parts]
+    characters = np.empty((num_strings, sum(widths)), dtype=np.uint32)
+
+    position = 0
+    for part, width in zip(parts, widths):
+        characters[:, position:position + width] = [ord(character) for character in part] if isinstance(part, str) else part
+        position += width
+
+    return characters.view(f"U{characters.shape[1]}").ravel().astype(object)
+
+@functools.lru_cache(maxsize=None)
+def _get_digits_table(width: int) -> np.ndarray:
+    """
+    Builds the table of the character codes of the zero-padded decimal digits of 0 to 10 ** width - 1.
+
+    Parameters:
+        width (int): The number of digits.
+
+    Returns:
+        np.ndarray: The character codes, one row per integer.
+    """
+    values = np.arange(10 ** width)
+    return (values[:, None] // 10 ** np.arange(width - 1, -1, -1) % 10 + ord("0")).astype(np.uint32)
+
+def _to_digits(values: np.ndarray, width: int) -> np.ndarray:
+    """
+    Computes the character codes of the zero-padded decimal digits of integers.
+
+    The digits are looked up by groups of up to 4 in a table instead of being computed.
+
+    Parameters:
+        values (np.ndarray): The non-negative integers.
+        width (int): The number of digits.
+
+    Returns:
+        np.ndarray: The character codes, one row per integer.
+    """
+    if width <= 4:
+        return _get_digits_table(width).take(values, axis=0)
+    return np.hstack([_to_digits(values // 10 ** 4, width=width - 4), _to_digits(values % 10 ** 4, width=4)])
+
+def _random_phones(integers, stream: str, num_records: int) -> np.ndarray:
+    """
+    Generates random phone numbers such as "545-5521067".
+
+    Parameters:
+        integers: Function drawing an integer between low (inclusive) and high (exclusive) for every
+                  row, given the name of its stream, low and high.
+        stream (str): The name of the column, prefixing the streams of the parts of the numbers.
+        num_records (int): The number of phone numbers.
+
+    Returns:
+        np.ndarray: Object array of the phone numbers.
+    """
+    return _join_characters(parts=[_to_digits(integers(f"{stream}_area", 100, 1000), width=3), "-",
+                                   _to_digits(integers(f"{stream}_prefix", 0, 10 ** 3), width=3),
+                                   _to_digits(integers(f"{stream}_line", 0, 10 ** 4), width=4)],
+                            num_strings=num_records)
+
+def _random_coordinates(integers, stream: str, limit: int) -> np.ndarray:
+    """
+    Generates random coordinates with 4 decimals as strings, such as "-37.3041".
+
+    Parameters:
+        integers: Function drawing an integer between low (inclusive) and high (exclusive) for every
+                  row, given the name of its stream, low and high.
+        stream (str): The name of the column, prefixing the streams of the parts of the coordinates.
+        limit (int): The coordinates are between -limit and limit.
+
+    Returns:
+        np.ndarray: Object array of the coordinates.
+    """
+    # The integer and decimal parts are taken from vocabularies and joined
+    integer_parts = np.array([f"-{degrees}" for degrees in range(limit - 1, -1, -1)] +
+                             [str(degrees) for degrees in range(limit)], dtype=object)
+    decimal_parts = np.array([f".{decimals:04d}" for decimals in range(10000)], dtype=object)
+    return (integer_parts.take(integers(f"{stream}_degrees", 0, 2 * limit)) +
+            decimal_parts.take(integers(f"{stream}_decimals", 0, 10000)))
+
+def _to_iso_strings(dates: np.ndarray) -> np.ndarray:
+    """
+    Formats dates as randomuser.me does, such as "1993-07-20T09:44:18.674Z".
+
+    Parameters:
+        dates (np.ndarray): The dates as datetime64[ms].
+
+    Returns:
+        np.ndarray: Object array of the formatted dates.
+    """
+    # The fields are formatted with integer arithmetic, which is much faster than datetime_as_string
+    months = dates.astype("datetime64[M]")
+    days = dates.astype("datetime64[D]")
+    milliseconds = (dates - days).astype(np.int64)
+
+    return _join_characters(parts=[
+        _to_digits(months.astype("datetime64[Y]").astype(np.int64) + 1970, width=4), "-",
+        _to_digits(months.astype(np.int64) % 12 + 1, width=2), "-",
+        _to_digits((days - months).astype(np.int64) + 1, width=2), "T",
+        _to_digits(milliseconds // 3600000, width=2), ":",
+        _to_digits(milliseconds // 60000 % 60, width=2), ":",
+        _to_digits(milliseconds // 1000 % 60, width=2), ".",
+        _to_digits(milliseconds % 1000, width=3), "Z",
+    ], num_strings=len(dates))
+
+def _to_ages(dates: np.ndarray) -> np.ndarray:
+    """
+    Computes the number of full years between dates and REFERENCE_DATE.
+
+    Parameters:
+        dates (np.ndarray): The dates as datetime64[ms].
+
+    Returns:
+        np.ndarray: The ages as int64.
+    """
+    return ((np.datetime64(REFERENCE_DATE, "ms") - dates) / np.timedelta64(1, "D") // 365.2425).astype(np.int64)
+
+def parse_synthetic_options(text: str) -> Dict:
+    """
+    Parses the options of generate_users given on the command line as a JSON object, such as
+    '{"skew": "zipf", "cardinalities": {"city": 50000}}'.
+
+    Parameters:
+        text (str): The JSON object.
+
+    Returns:
+        Dict: The options, checked to be keyword arguments of generate_users.
+    """
+    try:
+        options = json.loads(text)
+    except json.JSONDecodeError as excep:
+        raise argparse.ArgumentTypeError(f"The synthetic options are not valid JSON: {excep}")
+    if not isinstance(options, dict):
+        raise argparse.ArgumentTypeError("The synthetic options must be a JSON object.")
+
+    option_names = [name for name in inspect.signature(generate_users).parameters if name != "num_records"]
+    unknown_options = sorted(set(options) - set(option_names))
+    if unknown_options:
+        raise argparse.ArgumentTypeError(f"Unknown synthetic options {', '.join(unknown_options)}. "
+                                         f"Please choose among {', '.join(option_names)}.")
+
+    unknown_columns = sorted(set(options.get("cardinalities") or {}) - set(DEFAULT_CARDINALITIES))
+    if unknown_columns:
+        raise argparse.ArgumentTypeError(f"Unknown cardinalities {', '.join(unknown_columns)}. "
+                                         f"Please choose among {', '.join(DEFAULT_CARDINALITIES)}.")
+
+    return options
+
+def generate_users(num_records: int, seed: int = 0, cardinalities: Dict[str, int] = None, skew: str = "uniform",
+                   zipf_exponent: float = 1.1, null_rate: float = 0.0, string_length: int = 8) -> pd.DataFrame:
+    """
+    Generates synthetic users with the columns and dtypes of src.test_cases.util.read_json_to_dataframe.
+
+    Parameters:
+        num_records (int): The number of users.
+        seed (int): The seed of the random generator.
+        cardinalities (Dict[str, int]): Number of distinct values of the columns drawn from a vocabulary,
+                                        overriding DEFAULT_CARDINALITIES. The country follows the nationality,
+                                        and the other columns raise a ValueError.
+        skew (str): Distribution of the values drawn from a vocabulary ("uniform" or "zipf").
+        zipf_exponent (float): Exponent of the Zipf distribution.
+        null_rate (float): Fraction of missing values in each string column.
+        string_length (int): Number of letters of the generated names, places and passwords.
+
+    Returns:
+        pd.DataFrame: The synthetic users.
+    """
+    if skew not in ("uniform", "zipf"):
+        raise ValueError("Invalid skew. Please choose 'uniform' or 'zipf'.")
+
+    # The other columns do not have a vocabulary, and the country follows the nationality
+    unknown_columns = sorted(set(cardinalities or {}) - set(DEFAULT_CARDINALITIES))
+    if unknown_columns:
+        raise ValueError(f"Invalid cardinalities {', '.join(unknown_columns)}. "
+                         f"Please choose among {', '.join(DEFAULT_CARDINALITIES)}.")
+
+    cardinalities = {**DEFAULT_CARDINALITIES, **(cardinalities or {})}
+
+    def rows(stream: str, draw) -> np.ndarray:
+        return _draw_rows(seed=seed, stream=stream, num_records=num_records, draw=draw)
+
+    def integers(stream: str, low: int, high: int) -> np.ndarray:
+        return rows(stream, lambda rng, size: rng.integers(low, high, size=size))
+
+    def draw(column: str) -> np.ndarray:
+        return rows(column, lambda rng, size: _draw_codes(rng=rng, num_records=size, cardinality=cardinalities[column],
+                                                          skew=skew, zipf_exponent=zipf_exponent))
+
+    # The vocabularies do not depend on the number of records
+    def words(column: str) -> np.ndarray:
+        return _random_words(rng=_get_rng(seed=seed, stream=f"{column}_words"), count=cardinalities[column],
+                             length=string_length)
+
+    # Nationalities beyond the ones of randomuser.me get synthetic codes and countries
+    num_nationalities = cardinalities["nationality"]
+    nationalities = np.array(list(NATIONALITIES)[:num_nationalities] +
+                             [f"X{code}" for code in range(len(NATIONALITIES), num_nationalities)], dtype=object)
+    countries = np.array(list(NATIONALITIES.values())[:num_nationalities] +
+                         [f"Country {code}" for code in range(len(NATIONALITIES), num_nationalities)], dtype=object)
+    nationality_codes = draw("nationality")
+
+    is_female = rows("gender", lambda rng, size: rng.random(size) < 0.5)
+    title_codes = integers("title", 0, 3)
+    titles = np.where(is_female, np.array(["Mrs", "Ms", "Miss"], dtype=object)[title_codes], "Mr")
+
+    first_names = words("first_name")
+    last_names = words("last_name")
+    first_name_codes = draw("first_name")
+    last_name_codes = draw("last_name")
+
+    # The offsets go from -12:00 to +14:00 with one hour steps
+    num_timezones = cardinalities["timezone"]
+    timezone_hours = np.arange(num_timezones) % 27 - 12
+    timezone_offsets = np.array([f"{hours:+d}:00" for hours in timezone_hours], dtype=object)
+    timezone_descriptions = np.array([f"Timezone {code}" for code in range(num_timezones)], dtype=object)
+    timezone_codes = draw("timezone")
+
+    # Emails and usernames are assembled from the vocabularies, so they repeat as the real ones may
+    lower_first_names = np.array([name.lower() for name in first_names], dtype=object)
+    lower_last_names = np.array([name.lower() for name in last_names], dtype=object)
+    numbers = np.array([f"{number:03d}" for number in range(1000)], dtype=object)
+
+    # The pictures of randomuser.me are numbered from 0 to 99 for each gender
+    picture_codes = integers("picture", 0, 100) + 100 * is_female
+    picture_names = [f"{gender}/{number}.jpg" for gender in ("men", "women") for number in range(100)]
+
+    def pictures(folder: str) -> np.ndarray:
+        urls = np.array([f"https://randomuser.me/api/portraits/{folder}{name}" for name in picture_names], dtype=object)
+        return urls.take(picture_codes)
+
+    # Postcodes are numbers or strings depending on the country, as in randomuser.me
+    postcode_values = integers("postcode", 10000, 100000)
+    postcodes = postcode_values.astype(object)
+    is_string_postcode = nationality_codes % 2 == 1
+    postcodes[is_string_postcode] = _join_characters(parts=[_to_digits(postcode_values[is_string_postcode], width=5)],
+                                                     num_strings=int(is_string_postcode.sum()))
+
+    dob_dates = rows("dob", lambda rng, size: _random_dates(rng=rng, num_records=size, date_range=DOB_RANGE))
+    registered_dates = rows("registered_date", lambda rng, size: _random_dates(rng=rng, num_records=size,
+                                                                                 date_range=REGISTERED_RANGE))
+
+    columns = {
+        "gender": np.where(is_female, "female", "male").astype(object),
+        "title": titles,
+        "first_name": first_names.take(first_name_codes),
+        "last_name": last_names.take(last_name_codes),
+        "street_number": integers("street_number", 1, 10000),
+        "street_name": (words("street_name") + " Street").take(draw("street_name")),
+        "city": words("city").take(draw("city")),
+        "state": words("state").take(draw("state")),
+        "country": countries.take(nationality_codes),
+        "postcode": postcodes,
+        "latitude": _random_coordinates(integers=integers, stream="latitude", limit=90),
+        "longitude": _random_coordinates(integers=integers, stream="longitude", limit=180),
+        "timezone_offset": timezone_offsets.take(timezone_codes),
+        "timezone_description": timezone_descriptions.take(timezone_codes),
+        "email": lower_first_names.take(first_name_codes) + "." + lower_last_names.take(last_name_codes) + "@example.com",
+        "username": lower_first_names.take(first_name_codes) + numbers.take(integers("username", 0, 1000)),
+        "password": np.array([word.lower() for word in words("password")], dtype=object).take(draw("password")),
+        "dob": _to_iso_strings(dob_dates),
+        "age": _to_ages(dob_dates),
+        "registered_date": _to_iso_strings(registered_dates),
+        "registered_age": _to_ages(registered_dates),
+        "phone": _random_phones(integers=integers, stream="phone", num_records=num_records),
+        "cell": _random_phones(integers=integers, stream="cell", num_records=num_records),
+        "picture_large": pictures(folder=""),
+        "picture_medium": pictures(folder="med/"),
+        "picture_thumbnail": pictures(folder="thumb/"),
+        "nationality": nationalities.take(nationality_codes),
+    }
+
+    # Replace a fraction of the values of the string columns by missing values
+    if null_rate > 0:
+        for column, values in columns.items():
+            if values.dtype == object:
+                values[rows(f"{column}_nulls", lambda rng, size: rng.random(size) < null_rate)] = None
+
+    df = pd.DataFrame(columns, copy=False)
+
+    logger.info(f"Generated {num_records} synthetic records.")
+    return df
+
+def to_nested_records(df: pd.DataFrame) -> list:
+    """
+    Converts a DataFrame of users back to the nested records of randomuser.me.
+
+    Parameters:
+        df (pd.DataFrame): The users, with the columns of src.test_cases.util.USER_SCHEMA.
+
+    Returns:
+        list: The nested records.
+    """
+    from src.test_cases.util import USER_SCHEMA
+
+    records = []
+    for flat_record in df.to_dict("records"):
+        record = {}
+        for column, path in USER_SCHEMA:
+            parent = record
+            for key in path[:-1]:
+                parent = parent.setdefault(key, {})
+            parent[path[-1]] = flat_record[column]
+        records.append(record)
+
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic users.")
+    parser.add_argument("--num_records", type=int, default=5000, help="Number of users.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    parser.add_argument("--skew", default="uniform", choices=["uniform", "zipf"], help="Distribution of the key columns.")
+    parser.add_argument("--zipf_exponent", type=float, default=1.1, help="Exponent of the Zipf distribution.")
+    parser.add_argument("--null_rate", type=float, default=0.0, help="Fraction of missing values in each string column.")
+    parser.add_argument("--string_length", type=int, default=8,
+                        help="Number of letters of the generated names, places and passwords.")
+    parser.add_argument("--cardinalities", type=json.loads, default=None,
+                        help="Number of distinct values of the columns as a JSON object, such as '{\"city\": 50000}'.")
+    parser.add_argument("--output", default="testing_data/users_data.json", help="Path of the JSON file to write.")
+
+    args = parser.parse_args()
+
+    df_users = generate_users(num_records=args.num_records, seed=args.seed, cardinalities=args.cardinalities, skew=args.skew,
+                              zipf_exponent=args.zipf_exponent, null_rate=args.null_rate, string_length=args.string_length)
+    with open(args.output, "w") as json_file:
+        json.dump(to_nested_records(df=df_users), json_file, indent=2)
+
+    logger.info(f"Wrote {args.num_records} synthetic user records to {args.output}.")
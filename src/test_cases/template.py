@@ -1,47 +1,29 @@
-import argparse
-import time
+"""
+Template of a test case, copy it to src/test_cases/<group>/<module>.py.
 
-from src.util.logger import setup_logging
-from src.util.sockets import Client
-from src.test_cases.util import extract_user_data
+Benchmark Steps:
+1. Load user data in the representation declared by the case with a specified number of records.
+2. Run the operation.
+3. Measure and log the execution time for the operation.
+"""
 
-# Set up the logging configuration
-logger = setup_logging()
-
-# Init sockets
-is_server = True
-try:
-    socket_client = Client("127.0.0.1", 8888)
-except:
-    is_server = False
-    logger.debug("\nTest running without profiling")
-
-# Use argparse to get num_records from the terminal
-parser = argparse.ArgumentParser(description="Perform a test.")
-parser.add_argument("--num_records", type=int, required=True, help="Number of records to process")
-args = parser.parse_args()
-
-# Extract data
-num_records = args.num_records
-_, _ = extract_user_data(num_records=num_records, output_type="both")
-logger.info(f"The required information was loaded successfully. Number of records: {num_records}")
-
-# Start program
-if is_server:
-    socket_client.send_message(message="start")
+from src.test_cases.registry import register_case
+from src.test_cases.runner import run_cli
 
 # -----------
 # Operation
 # -----------
 
-# Start timer
-start_time = time.time()
-
-
-# Code
+# Pass setup=lambda users: ... to give each repetition a fresh input if the operation modifies it
+@register_case(name="template", group=0, variant="pandas", representation="both")
+def operation(users, recorder):
+    """
+    Operation measured by the test.
+    """
+    df_users, dict_users = users
+    # Code, use nested spans to measure each phase: with recorder.span("phase_name"): ...
+    pass
 
 
-# Stop timer
-end_time = time.time()
-execution_time = end_time - start_time
-logger.info(f"Execution Time: {execution_time} seconds")
+if __name__ == "__main__":
+    run_cli(name="template")
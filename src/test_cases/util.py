@@ -1,22 +1,161 @@
 import json
-from itertools import cycle, islice
-from typing import Dict, Tuple
+from array import array
+from collections import namedtuple
+from dataclasses import make_dataclass
+from itertools import starmap
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from src.test_cases.synthetic import generate_users
 from src.util.cache_data import cache_data
 from src.util.logger import setup_logging
 
 # Set up the logging configuration
 logger = setup_logging()
 
-def read_json_to_dataframe(file_path="testing_data/users_data.json", num_records=None):
+# Columns of the user DataFrame and the path of each one in the nested JSON records
+USER_SCHEMA = [
+    ("gender", ("gender",)),
+    ("title", ("name", "title")),
+    ("first_name", ("name", "first")),
+    ("last_name", ("name", "last")),
+    ("street_number", ("location", "street", "number")),
+    ("street_name", ("location", "street", "name")),
+    ("city", ("location", "city")),
+    ("state", ("location", "state")),
+    ("country", ("location", "country")),
+    ("postcode", ("location", "postcode")),
+    ("latitude", ("location", "coordinates", "latitude")),
+    ("longitude", ("location", "coordinates", "longitude")),
+    ("timezone_offset", ("location", "timezone", "offset")),
+    ("timezone_description", ("location", "timezone", "description")),
+    ("email", ("email",)),
+    ("username", ("login", "username")),
+    ("password", ("login", "password")),
+    ("dob", ("dob", "date")),
+    ("age", ("dob", "age")),
+    ("registered_date", ("registered", "date")),
+    ("registered_age", ("registered", "age")),
+    ("phone", ("phone",)),
+    ("cell", ("cell",)),
+    ("picture_large", ("picture", "large")),
+    ("picture_medium", ("picture", "medium")),
+    ("picture_thumbnail", ("picture", "thumbnail")),
+    ("nationality", ("nat",)),
+]
+
+# Columns of the user DataFrame and their position in the tuples of dataframe_to_records
+USER_COLUMNS = [column for column, _ in USER_SCHEMA]
+USER_COLUMN_INDEX = MappingProxyType({column: position for position, column in enumerate(USER_COLUMNS)})
+
+# Immutable record of a user, a tuple with the columns as named fields
+UserTuple = namedtuple("UserTuple", USER_COLUMNS)
+
+# Mutable record of a user with the columns as attributes, stored in __slots__ instead of a __dict__
+UserRecord = make_dataclass("UserRecord", USER_COLUMNS, slots=True)
+UserRecord.__module__ = __name__
+
+# Compact representations of the users built by dataframe_to_records
+RECORD_TYPES = ["tuples", "slots", "namedtuples", "arrays"]
+
+# Type codes of the array module for the numeric columns of the "arrays" representation
+ARRAY_TYPECODES = {np.dtype(np.int32): "i", np.dtype(np.int64): "q", np.dtype(np.float32): "f", np.dtype(np.float64): "d"}
+
+# Columns of the user DataFrame holding ISO 8601 datetimes in UTC, such as "2010-01-01T11:22:33.444Z"
+DATETIME_COLUMNS = ["dob", "registered_date"]
+# Format of the datetimes of the DATETIME_COLUMNS
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# Value of the missing nested objects, shared to avoid creating an empty dict per lookup
+EMPTY_OBJECT = MappingProxyType({})
+
+def flatten_records(records: List[Dict], schema: List[Tuple[str, Tuple[str, ...]]] = USER_SCHEMA) -> Dict[str, List]:
+    """
+    Flattens nested records into columns following a schema.
+
+    The records are processed one column at a time. Each nested object is extracted once into
+    a list shared by all the columns below it (e.g. "location" for the 9 location columns), so
+    each field of each record is looked up a single time and no per-record dict is created.
+
+    Parameters:
+        records (List[Dict]): The nested records.
+        schema (List[Tuple[str, Tuple[str, ...]]]): Name and path of each column.
+
+    Returns:
+        Dict[str, List]: Values of each column, in the order of the schema.
+    """
+    # Lists of the nested objects by path, the records being the root
+    objects = {(): records}
+
+    columns = {}
+    for column, path in schema:
+        # Extract the nested objects on the path of the column that were not extracted yet
+        for depth in range(1, len(path)):
+            if path[:depth] not in objects:
+                key = path[depth - 1]
+                objects[path[:depth]] = [parent.get(key, EMPTY_OBJECT) for parent in objects[path[:depth - 1]]]
+
+        key = path[-1]
+        columns[column] = [parent.get(key) for parent in objects[path[:-1]]]
+
+    return columns
+
+def replicate_rows(df: pd.DataFrame, num_records: int, perturb_columns: Tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Scales a DataFrame up to a number of rows by repeating its rows in order.
+
+    The rows are replicated with a single take on a tiled index array, so the cost does not depend
+    on Python work per row. The copies of the rows can have a suffix "_<copy>" added to some string
+    columns, so the duplicates do not lower the cardinality of keys such as the username. The suffix
+    is added before the "@" of the values containing one, so emails remain valid. The first copy
+    is left unchanged.
+
+    Parameters:
+        df (pd.DataFrame): The base DataFrame.
+        num_records (int): The number of rows of the result.
+        perturb_columns (Tuple[str, ...]): String columns whose copies get the suffix.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the replicated rows and a new RangeIndex.
+    """
+    num_base_records = len(df)
+    positions = np.arange(num_records) % num_base_records
+    df_replicated = df.take(positions)
+    df_replicated.index = pd.RangeIndex(num_records)
+
+    if len(perturb_columns) > 0:
+        copies = np.arange(num_records) // num_base_records
+        suffixes = np.array([""] + [f"_{copy}" for copy in range(1, int(copies[-1]) + 1)], dtype=object)
+
+        for column in perturb_columns:
+            # Split the base values once around the "@", then assemble the perturbed values by index
+            base_values = df[column].to_numpy()
+            is_missing = pd.isna(base_values)
+            parts = [("", "", "") if missing else value.partition("@") for value, missing in zip(base_values, is_missing)]
+            local_parts = np.array([local_part for local_part, _, _ in parts], dtype=object)
+            domain_parts = np.array([at + domain for _, at, domain in parts], dtype=object)
+
+            values = local_parts.take(positions) + suffixes.take(copies) + domain_parts.take(positions)
+            values[is_missing.take(positions)] = None
+            df_replicated[column] = values
+
+    return df_replicated
+
+def read_json_to_dataframe(file_path="testing_data/users_data.json", num_records=None, perturb_columns=()):
     """
     Reads a specific JSON file structure and stores its content in a Pandas DataFrame.
 
+    The records of the file are parsed and flattened once. Larger numbers of records are reached
+    by replicating the rows of the flattened DataFrame (see replicate_rows).
+
     Parameters:
         file_path (str): The path to the JSON file. Default is "src/test_cases/users_data.json".
         num_records (int): The number of records to retrieve. If None, retrieves all records.
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records,
+                                           such as ("username", "email").
 
     Returns:
         pd.DataFrame: The Pandas DataFrame containing the data from the specific JSON file structure.
@@ -28,51 +167,16 @@ def read_json_to_dataframe(file_path="testing_data/users_data.json", num_records
             # Extract the data from the JSON structure
             records = json.load(json_file)
 
-        # If num_records is specified, adjust the records accordingly
-        if num_records is not None:
-            # If num_records is less than the total number of records, cut the list
-            if num_records < len(records):
-                records = records[:num_records]
-            # If num_records is more than the total number of records, add duplicates
-            elif num_records > len(records):
-                records = list(islice(cycle(records), num_records))
-
-        # Flatten the nested structure for each record
-        flat_records = []
-        for record in records:
-            flat_record = {
-                "gender": record.get("gender"),
-                "title": record.get("name", {}).get("title"),
-                "first_name": record.get("name", {}).get("first"),
-                "last_name": record.get("name", {}).get("last"),
-                "street_number": record.get("location", {}).get("street", {}).get("number"),
-                "street_name": record.get("location", {}).get("street", {}).get("name"),
-                "city": record.get("location", {}).get("city"),
-                "state": record.get("location", {}).get("state"),
-                "country": record.get("location", {}).get("country"),
-                "postcode": record.get("location", {}).get("postcode"),
-                "latitude": record.get("location", {}).get("coordinates", {}).get("latitude"),
-                "longitude": record.get("location", {}).get("coordinates", {}).get("longitude"),
-                "timezone_offset": record.get("location", {}).get("timezone", {}).get("offset"),
-                "timezone_description": record.get("location", {}).get("timezone", {}).get("description"),
-                "email": record.get("email"),
-                "username": record.get("login", {}).get("username"),
-                "password": record.get("login", {}).get("password"),
-                "dob": record.get("dob", {}).get("date"),
-                "age": record.get("dob", {}).get("age"),
-                "registered_date": record.get("registered", {}).get("date"),
-                "registered_age": record.get("registered", {}).get("age"),
-                "phone": record.get("phone"),
-                "cell": record.get("cell"),
-                "picture_large": record.get("picture", {}).get("large"),
-                "picture_medium": record.get("picture", {}).get("medium"),
-                "picture_thumbnail": record.get("picture", {}).get("thumbnail"),
-                "nationality": record.get("nat"),
-            }
-            flat_records.append(flat_record)
-
-        # Convert the flat records to a Pandas DataFrame
-        df = pd.DataFrame(flat_records)
+        # If num_records is less than the total number of records, cut the list
+        if num_records is not None and num_records < len(records):
+            records = records[:num_records]
+
+        # Flatten the nested structure column by column and build the DataFrame from the columns
+        df = pd.DataFrame(flatten_records(records=records))
+
+        # If num_records is more than the total number of records, add duplicates
+        if num_records is not None and num_records > len(df) > 0:
+            df = replicate_rows(df=df, num_records=num_records, perturb_columns=tuple(perturb_columns))
 
         logger.info(f"Read {len(df)} records from {file_path}.")
         return df
@@ -93,24 +197,132 @@ def dataframe_to_dict(df: pd.DataFrame) -> Dict:
     """
     return df.to_dict("records")
 
-from typing import Union
+def dataframe_to_records(df: pd.DataFrame, record_type: str) -> Union[List, Dict]:
+    """
+    Converts a Pandas DataFrame of users to a compact representation, without a dictionary per record.
 
-def extract_user_data(num_records: int, output_type: str) -> Union[pd.DataFrame, Dict]:
+    Parameters:
+        df (pd.DataFrame): The users, with the USER_COLUMNS.
+        record_type (str): The representation:
+            - "tuples": A list of tuples, whose values are indexed by USER_COLUMN_INDEX.
+            - "slots": A list of UserRecord objects.
+            - "namedtuples": A list of UserTuple.
+            - "arrays": A dictionary of columns, array.array for the numeric ones and lists for the others.
+
+    Returns:
+        Union[List, Dict]: The users in the representation.
+    """
+    if record_type == "arrays":
+        columns = {}
+        for column in df.columns:
+            typecode = ARRAY_TYPECODES.get(df[column].dtype)
+            if typecode is None:
+                columns[column] = df[column].tolist()
+            else:
+                columns[column] = array(typecode, np.ascontiguousarray(df[column].to_numpy()).tobytes())
+        return columns
+
+    if list(df.columns) != USER_COLUMNS:
+        raise ValueError("The records can only be built from the USER_COLUMNS in their order.")
+
+    rows = zip(*(df[column].tolist() for column in df.columns))
+    if record_type == "tuples":
+        return list(rows)
+    elif record_type == "slots":
+        return list(starmap(UserRecord, rows))
+    elif record_type == "namedtuples":
+        return list(map(UserTuple._make, rows))
+    else:
+        raise ValueError(f"Invalid record_type. Please choose one of {', '.join(RECORD_TYPES)}.")
+
+def parse_datetime_columns(df: pd.DataFrame, columns: List[str] = DATETIME_COLUMNS) -> pd.DataFrame:
+    """
+    Parses the datetime columns of a Pandas DataFrame of users into datetime64[ns], so the parsing is
+    paid once when the cache is built instead of in every operation.
+
+    Parameters:
+        df (pd.DataFrame): The users.
+        columns (List[str]): The columns with ISO 8601 datetimes in UTC.
+
+    Returns:
+        pd.DataFrame: A copy of the users with the columns parsed as naive datetimes in UTC.
+    """
+    df_parsed = df.copy()
+    for column in columns:
+        df_parsed[column] = pd.to_datetime(df[column], format=DATETIME_FORMAT)
+
+    return df_parsed
+
+def load_users_dataframe(num_records: int, source: str = "json", perturb_columns: Tuple[str, ...] = (),
+                         synthetic_options: Dict = None) -> pd.DataFrame:
+    """
+    Reads the users into a DataFrame, from the materialized dataset when it has enough records
+    (see src.test_cases.dataset) or from the cache.
+
+    Parameters:
+        num_records (int): The number of records to be processed.
+        source (str): The source of the users ("json" or "synthetic").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records
+                                           when num_records exceeds the downloaded records.
+        synthetic_options (Dict): Options of generate_users, such as the skew or the null rate.
+
+    Returns:
+        pd.DataFrame: The users.
+    """
+    # The dataset module is imported here because it depends on this module. It also validates the source.
+    from src.test_cases.dataset import load_dataset_dataframe
+    df_users = load_dataset_dataframe(num_records=num_records, source=source, perturb_columns=tuple(perturb_columns),
+                                      synthetic_options=synthetic_options)
+    if df_users is not None:
+        return df_users
+
+    if source == "json":
+        return cache_data(func=read_json_to_dataframe, file_name=f"users_dataframe_{num_records}", cache=True,
+                          num_records=num_records, perturb_columns=tuple(perturb_columns))
+    else:
+        return cache_data(func=generate_users, file_name=f"users_synthetic_{num_records}", cache=True,
+                          num_records=num_records, **(synthetic_options or {}))
+
+def extract_user_data(num_records: int, output_type: str, perturb_columns: Tuple[str, ...] = (), source: str = "json",
+                      synthetic_options: Dict = None) -> Union[pd.DataFrame, Dict]:
     """
     Processes user data by reading it from a JSON file into a DataFrame,
     caching the DataFrame, and converting it to a dictionary, caching the result.
 
+    The users can also be generated offline by src.test_cases.synthetic.generate_users instead
+    of being read from the downloaded JSON file.
+
     Parameters:
         num_records (int): The number of records to be processed.
-        output_type (str): The desired output type ("dataframe", "dictionary", or "both").
+        output_type (str): The desired output type ("dataframe", "dictionary", or "both"), "parsed_dataframe"
+                           for the DataFrame with the DATETIME_COLUMNS parsed, or one of the compact
+                           representations of dataframe_to_records ("tuples", "slots", "namedtuples" or
+                           "arrays").
+        perturb_columns (Tuple[str, ...]): String columns made unique in the duplicated records
+                                           when num_records exceeds the downloaded records.
+        source (str): The source of the users ("json" or "synthetic").
+        synthetic_options (Dict): Options of generate_users, such as the skew or the null rate.
 
     Returns:
-        Union[pd.DataFrame, dict]: Either a DataFrame, a dictionary, or both based on the specified output_type.
+        Union[pd.DataFrame, dict]: Either a DataFrame, a dictionary, both or the compact representation based
+                                   on the specified output_type.
     """
-    # Assuming cache_data, read_json_to_dataframe, and dataframe_to_dict are defined elsewhere
+    # The dataset materialized for a sweep is used when it has enough records (see src.test_cases.dataset),
+    # and the dataset server when one is running (see src.test_cases.dataset_server). They are imported
+    # here because they depend on this module.
+    from src.test_cases.dataset import load_dataset_records
+    from src.test_cases.dataset_server import attach_dataset
+    dataset_options = {"source": source, "perturb_columns": tuple(perturb_columns), "synthetic_options": synthetic_options}
+
+    if output_type == "dictionary":
+        dict_users = load_dataset_records(num_records=num_records, **dataset_options)
+        if dict_users is not None:
+            return dict_users
 
-    # Reading user data into a DataFrame and caching it
-    df_users: pd.DataFrame = cache_data(func=read_json_to_dataframe, file_name=f"users_dataframe_{num_records}", cache=True, num_records=num_records)
+    # Attaching to the DataFrame shared by the dataset server, or reading it and caching it
+    df_users: pd.DataFrame = attach_dataset(num_records=num_records, **dataset_options)
+    if df_users is None:
+        df_users = load_users_dataframe(num_records=num_records, **dataset_options)
 
     if output_type == "dataframe":
         return df_users
@@ -123,5 +335,18 @@ def extract_user_data(num_records: int, output_type: str) -> Union[pd.DataFrame,
         # Converting the DataFrame to a dictionary and caching the result
         dict_users: Dict = cache_data(func=dataframe_to_dict, file_name=f"users_dictionary_{num_records}", cache=True, df=df_users)
         return df_users, dict_users
+    elif output_type == "parsed_dataframe":
+        # Parsing the datetimes of the DataFrame and caching the result
+        df_parsed: pd.DataFrame = cache_data(func=parse_datetime_columns, file_name=f"users_parsed_dataframe_{num_records}",
+                                             cache=True, df=df_users)
+        del df_users
+        return df_parsed
+    elif output_type in RECORD_TYPES:
+        # Converting the DataFrame to compact records and caching the result
+        records = cache_data(func=dataframe_to_records, file_name=f"users_{output_type}_{num_records}", cache=True,
+                             df=df_users, record_type=output_type)
+        del df_users
+        return records
     else:
-        raise ValueError("Invalid output_type. Please choose 'dataframe', 'dictionary', or 'both'.")
+        raise ValueError("Invalid output_type. Please choose 'dataframe', 'dictionary', 'both', 'parsed_dataframe', "
+                         f"or one of {', '.join(RECORD_TYPES)}.")
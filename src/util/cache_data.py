@@ -1,9 +1,18 @@
+import contextlib
+import fcntl
+import hashlib
+import inspect
+import json
 import os
 import pickle
+import shutil
 import threading
+import time
+import weakref
 from typing import Callable
 
 from src.util.logger import setup_logging
+from src.util.serializers import SERIALIZERS, Serializer, select_serializer
 
 # Set up the logging configuration
 logger = setup_logging()
@@ -12,14 +21,292 @@ logger = setup_logging()
 CACHE_FOLDER = "cache_data"
 CACHE_LOCK = threading.Lock()
 
-def cache_data(func: Callable, file_name: str, cache: bool, *args, **kwargs):
+# Index of the cached entries with their size and last access
+CACHE_INDEX_FILE = "index.json"
+
+# Folder of the lock files coordinating the processes sharing the cache
+CACHE_LOCKS_FOLDER = os.path.join(CACHE_FOLDER, "locks")
+
+# Maximum size of the cached entries in bytes, the least recently used entries are evicted beyond it
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 8 * 1024 ** 3))
+
+# Cache keys of the objects returned by cache_data, so the objects derived from them are keyed
+# by the key of their origin instead of by their content. Maps id(object) to (weak reference, key).
+_RESULT_KEYS = {}
+
+def register_result(data, key: str):
+    """
+    Remembers the cache key of an object returned by cache_data, or of an object loaded from a
+    cached dataset, so the entries derived from it are keyed by this key.
+
+    Only the objects supporting weak references (e.g. DataFrames) can be registered, so the
+    registry does not keep them alive.
+
+    :param data: The object returned by cache_data or loaded from the cache.
+    :param key: The cache key of the object.
+    """
+    object_id = id(data)
+
+    def forget(reference):
+        # The id may have been reused by a newer result in the meantime
+        if _RESULT_KEYS.get(object_id, (None,))[0] is reference:
+            del _RESULT_KEYS[object_id]
+
+    try:
+        _RESULT_KEYS[object_id] = (weakref.ref(data, forget), key)
+    except TypeError:
+        pass
+
+def _fingerprint_value(value) -> str:
+    """
+    Computes a fingerprint of an argument of the cached function.
+
+    Paths of existing files are fingerprinted with their size and modification time, objects
+    returned by cache_data with their cache key, and any other object with its pickled content.
+
+    :param value: The argument.
+
+    :return: The fingerprint of the argument.
+    """
+    # Objects computed by cache_data are identified by the key they were cached with
+    registered = _RESULT_KEYS.get(id(value))
+    if registered is not None and registered[0]() is value:
+        return f"cached:{registered[1]}"
+
+    # Input files are identified by their path, size and modification time
+    if isinstance(value, (str, os.PathLike)) and os.path.isfile(value):
+        file_stat = os.stat(value)
+        return f"file:{os.path.abspath(value)}:{file_stat.st_size}:{file_stat.st_mtime_ns}"
+
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+
+    return "pickle:" + hashlib.sha256(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+def _get_function_code(func: Callable) -> str:
+    """
+    Retrieves the code of a function, so a change of its implementation changes its cache keys.
+
+    The whole module of the function is taken, since its result also depends on the helpers and
+    constants of the module it calls, such as the schema of the records.
+
+    :param func: The function.
+
+    :return: The source of the module of the function, the source of the function if the module has
+             none, or a representation of its bytecode if no source is available.
+    """
+    module = inspect.getmodule(func)
+    for source_object in (module, func):
+        try:
+            return inspect.getsource(source_object)
+        except (OSError, TypeError):
+            continue
+
+    code = func.__code__
+    return repr((code.co_code, code.co_consts, code.co_names))
+
+def get_cache_key(func: Callable, file_name: str, *args, **kwargs) -> str:
+    """
+    Computes the cache key of a function call.
+
+    The key is derived from the qualified name of the function, the code of its module and its arguments,
+    bound to its signature with the defaults applied, so equivalent calls share the same key and
+    a change of the function, its arguments or its input files leads to a different key.
+
+    :param func: The function.
+    :param file_name: Readable prefix of the key.
+    :param *args: Arguments for the function.
+    :param **kwargs: Keyword arguments for the function.
+
+    :return: The cache key, the prefix followed by a hash.
+    """
+    bound_arguments = inspect.signature(func).bind(*args, **kwargs)
+    bound_arguments.apply_defaults()
+
+    digest = hashlib.sha256()
+    digest.update(f"{func.__module__}.{func.__qualname__}\n".encode("utf-8"))
+    digest.update(_get_function_code(func).encode("utf-8"))
+    for name, value in bound_arguments.arguments.items():
+        digest.update(f"\n{name}={_fingerprint_value(value)}".encode("utf-8"))
+
+    return f"{file_name}_{digest.hexdigest()[:16]}"
+
+@contextlib.contextmanager
+def _file_lock(name: str, shared: bool = False, blocking: bool = True):
+    """
+    Holds an advisory lock (fcntl.flock) on a lock file shared by all the processes using the cache.
+
+    :param name: The name of the lock, such as a cache key.
+    :param shared: Whether to take a shared lock instead of an exclusive one.
+    :param blocking: Whether to wait for the lock. Otherwise, the lock is not taken if it is held.
+
+    :return: Context manager yielding whether the lock was taken.
+    """
+    os.makedirs(CACHE_LOCKS_FOLDER, exist_ok=True)
+    with open(os.path.join(CACHE_LOCKS_FOLDER, f"{name}.lock"), "ab") as lock_file:
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+
+        try:
+            fcntl.flock(lock_file.fileno(), operation)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _load_index() -> dict:
+    """
+    Reads the index of the cache.
+
+    :return: Dictionary mapping each cache key to its file, size and last access.
+    """
+    index_path = os.path.join(CACHE_FOLDER, CACHE_INDEX_FILE)
+    try:
+        with open(index_path, "r") as index_file:
+            return json.load(index_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_index(index: dict):
+    """
+    Writes the index of the cache, replacing the previous one atomically.
+
+    :param index: Dictionary mapping each cache key to its file, size and last access.
+    """
+    index_path = os.path.join(CACHE_FOLDER, CACHE_INDEX_FILE)
+    temporary_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as index_file:
+        json.dump(index, index_file, indent=2)
+    os.replace(temporary_path, index_path)
+
+def _evict_entries(index: dict, max_bytes: int, keep_key: str):
+    """
+    Removes the least recently used entries until the cache fits in the byte budget.
+
+    The entries being loaded or written by a process are locked and skipped.
+
+    :param index: Index of the cache, updated in place.
+    :param max_bytes: Maximum size of the cached entries in bytes.
+    :param keep_key: Key of an entry that must not be evicted, such as the one just written.
+    """
+    total_bytes = sum(entry["size"] for entry in index.values())
+    for key, entry in sorted(index.items(), key=lambda item: item[1]["last_access"]):
+        if total_bytes <= max_bytes:
+            break
+        if key == keep_key:
+            continue
+
+        with _file_lock(name=key, blocking=False) as is_locked:
+            if not is_locked:
+                continue
+            _remove_entry(os.path.join(CACHE_FOLDER, entry["file"]))
+        total_bytes -= entry["size"]
+        del index[key]
+        logger.info(f"Evicted cache entry {key} ({entry['size']} bytes)")
+
+def _get_entry_size(path: str) -> int:
+    """
+    Computes the size of a cached entry, which may be a file or a folder.
+
+    :param path: The path of the entry.
+
+    :return: The size of the entry in bytes.
+    """
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(folder, file_name))
+               for folder, _, file_names in os.walk(path) for file_name in file_names)
+
+def _remove_entry(path: str):
+    """
+    Removes a cached entry, which may be a file or a folder.
+
+    :param path: The path of the entry.
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _find_entry(key: str):
+    """
+    Looks for the cached entry of a key in the formats of the serializers.
+
+    :param key: The cache key.
+
+    :return: The serializer and the file name of the entry, or (None, None) if it is not cached.
+    """
+    for serializer in SERIALIZERS:
+        cache_file_name = f"{key}{serializer.extension}"
+        if os.path.exists(os.path.join(CACHE_FOLDER, cache_file_name)):
+            return serializer, cache_file_name
+    return None, None
+
+def _load_entry(key: str):
+    """
+    Loads the cached entry of a key if it exists.
+
+    :param key: The cache key.
+
+    :return: The data and True if the entry exists, (None, False) otherwise.
+    """
+    entry_serializer, cache_file_name = _find_entry(key=key)
+    if entry_serializer is None:
+        return None, False
+
+    # If the entry exists, load the data from it with the serializer that wrote it
+    cache_file_path = os.path.join(CACHE_FOLDER, cache_file_name)
+    logger.info(f"Load cache from {cache_file_path}!")
+    data = entry_serializer.load(cache_file_path)
+    _update_index(key=key, cache_file_name=cache_file_name)
+    return data, True
+
+def _update_index(key: str, cache_file_name: str, max_bytes: int = None):
+    """
+    Records an access to a cached entry in the index, evicting other entries if needed.
+
+    :param key: The cache key of the entry.
+    :param cache_file_name: The name of the file of the entry in the cache folder.
+    :param max_bytes: Maximum size of the cached entries in bytes, no eviction if None.
+    """
+    # The index is shared by the threads of this process and by the other processes
+    with CACHE_LOCK, _file_lock(name="index"):
+        index = _load_index()
+        index[key] = {
+            "file": cache_file_name,
+            "size": _get_entry_size(os.path.join(CACHE_FOLDER, cache_file_name)),
+            "last_access": time.time(),
+        }
+        if max_bytes is not None:
+            _evict_entries(index=index, max_bytes=max_bytes, keep_key=key)
+        _save_index(index)
+
+def cache_data(func: Callable, file_name: str, cache: bool, *args, serializer: Serializer = None, **kwargs):
     """
     Caches the result of a function call in a file.
 
+    The file is named after a key derived from the function and its arguments (see get_cache_key),
+    so a change of the function or of its input files does not load a stale result. The cached
+    entries are tracked in an index and the least recently used ones are evicted when their total
+    size exceeds CACHE_MAX_BYTES. The entries are written by the first serializer supporting the
+    data (see src.util.serializers), so DataFrames are written in a memory-mapped columnar format.
+
+    The entries are populated with single-flight semantics across processes: the first process
+    missing an entry takes an exclusive lock on its key, computes it and publishes it atomically,
+    while the other processes wait on the lock and then load the published entry.
+
     :param func: The function that you want to cache the result of.
-    :param file_name: The name of the file where the cached data will be stored (without extension).
+    :param file_name: The name of the file where the cached data will be stored (without extension),
+                      used as a readable prefix of the cache key.
     :param cache: A boolean flag that indicates whether caching should be enabled or not.
     :param *args: Arguments for the callback.
+    :param serializer: The serializer used to write the data, one of SERIALIZERS so the entry is found when
+                       loading it. Default is the first one supporting the data.
     :param **kwargs: Keyword arguments for the callback.
 
     :return: The data from the function.
@@ -37,24 +324,31 @@ def cache_data(func: Callable, file_name: str, cache: bool, *args, **kwargs):
             except Exception as excep:
                 logger.error(f"Error when creating folder: {excep}")
 
-        # Add the cache folder path and the .pickle extension to the file_name
-        cache_file_path = os.path.join(CACHE_FOLDER, f"{file_name}.pickle")
-
-        # Check if the file already exists
-        file_exists = os.path.isfile(cache_file_path)
-        if file_exists:
-            # If the file exists, load the data from it using pickle
-            with open(cache_file_path, "rb") as cache_file:
-                logger.info(f"Load cache from {cache_file_path}!")
-                computed_data = pickle.load(cache_file)
-        else:
-            # Call the function to compute the data
-            computed_data = func(*args, **kwargs)
-
-            # Write the computed data to the cache file using pickle
-            with open(cache_file_path, "wb") as cache_file:
-                logger.info(f"Write cache to {cache_file_path}")
-                pickle.dump(computed_data, cache_file)
+        # Look for the entry of the key of the call in the cache folder, the shared lock
+        # keeps it from being evicted while it is loaded
+        key = get_cache_key(func, file_name, *args, **kwargs)
+        with _file_lock(name=key, shared=True):
+            computed_data, is_cached = _load_entry(key=key)
+
+        if not is_cached:
+            # Only one process computes a missing entry, the others wait and load it afterwards
+            with _file_lock(name=key):
+                computed_data, is_cached = _load_entry(key=key)
+
+                if not is_cached:
+                    # Call the function to compute the data
+                    computed_data = func(*args, **kwargs)
+
+                    # Write the computed data to the cache with the serializer supporting it
+                    entry_serializer = serializer or select_serializer(computed_data)
+                    cache_file_name = f"{key}{entry_serializer.extension}"
+                    cache_file_path = os.path.join(CACHE_FOLDER, cache_file_name)
+                    logger.info(f"Write cache to {cache_file_path}")
+                    entry_serializer.dump(computed_data, cache_file_path)
+                    _update_index(key=key, cache_file_name=cache_file_name, max_bytes=CACHE_MAX_BYTES)
+
+        # Derived entries computed from this result are keyed by this key
+        register_result(data=computed_data, key=key)
     else:
         # Call the function to compute the data
         computed_data = func(*args, **kwargs)
@@ -0,0 +1,140 @@
+import gc
+import time
+from typing import Callable
+
+import numpy as np
+
+from src.util.logger import setup_logging
+
+# Set up the logging configuration
+logger = setup_logging()
+
+class MeasurementResult:
+    def __init__(self, wall_ns: list, cpu_ns: list, outlier_factor: float = 1.5, confidence: float = 0.95,
+                 num_bootstrap: int = 10000, seed: int = 0):
+        """
+        Initializes the MeasurementResult class.
+
+        This class computes the statistics of the repetitions of an operation. The repetitions whose
+        wall-clock time falls outside the Tukey fences (outlier_factor times the IQR beyond the quartiles)
+        are rejected as outliers before computing the median and its bootstrap confidence interval.
+
+        Parameters:
+            wall_ns (list): Wall-clock time of each repetition in nanoseconds.
+            cpu_ns (list): CPU time of the process in each repetition in nanoseconds.
+            outlier_factor (float): Factor of the IQR defining the fences for outlier rejection.
+            confidence (float): Confidence level of the interval of the median.
+            num_bootstrap (int): Number of bootstrap resamples.
+            seed (int): Seed of the bootstrap resampling.
+        """
+        self.wall_ns = np.asarray(wall_ns, dtype=np.int64)
+        self.cpu_ns = np.asarray(cpu_ns, dtype=np.int64)
+        self.confidence = confidence
+
+        # Reject the outliers with the Tukey fences
+        q1, q3 = np.percentile(self.wall_ns, [25, 75])
+        iqr = q3 - q1
+        self.is_outlier = (self.wall_ns < q1 - outlier_factor * iqr) | (self.wall_ns > q3 + outlier_factor * iqr)
+        kept_ns = self.wall_ns[~self.is_outlier]
+
+        self.min_ns = int(self.wall_ns.min())
+        self.q1_ns, self.median_ns, self.q3_ns = (float(value) for value in np.percentile(kept_ns, [25, 50, 75]))
+        self.iqr_ns = self.q3_ns - self.q1_ns
+        self.cpu_median_ns = float(np.median(self.cpu_ns[~self.is_outlier]))
+
+        # Bootstrap confidence interval of the median
+        rng = np.random.default_rng(seed)
+        resamples = rng.choice(kept_ns, size=(num_bootstrap, len(kept_ns)), replace=True)
+        medians = np.median(resamples, axis=1)
+        alpha = (1 - confidence) / 2
+        self.ci_low_ns, self.ci_high_ns = (float(value) for value in np.percentile(medians, [100 * alpha, 100 * (1 - alpha)]))
+
+    @property
+    def num_outliers(self) -> int:
+        """
+        Number of repetitions rejected as outliers.
+        """
+        return int(self.is_outlier.sum())
+
+    def summary(self) -> dict:
+        """
+        Summarizes the statistics of the repetitions.
+
+        Returns:
+            dict: Dictionary with the statistics in seconds and the number of repetitions and outliers.
+        """
+        return {
+            "repeat": len(self.wall_ns),
+            "outliers": self.num_outliers,
+            "min": self.min_ns / 1e9,
+            "median": self.median_ns / 1e9,
+            "iqr": self.iqr_ns / 1e9,
+            "ci_low": self.ci_low_ns / 1e9,
+            "ci_high": self.ci_high_ns / 1e9,
+            "cpu_median": self.cpu_median_ns / 1e9,
+        }
+
+    def log(self):
+        """
+        Logs the statistics of the repetitions.
+        """
+        summary = self.summary()
+        logger.info(f"Execution Time: {summary['median']} seconds (median of {summary['repeat']} repetitions, "
+                    f"{summary['outliers']} outliers rejected)")
+        logger.info(f"Min: {summary['min']} seconds, IQR: {summary['iqr']} seconds, "
+                    f"{self.confidence:.0%} CI: [{summary['ci_low']}, {summary['ci_high']}] seconds, "
+                    f"CPU median: {summary['cpu_median']} seconds")
+
+
+def measure(operation: Callable, setup: Callable = None, warmup: int = 0, repeat: int = 1, disable_gc: bool = True,
+            **result_options) -> MeasurementResult:
+    """
+    Measures the repetitions of an operation.
+
+    Each repetition, warmup included, gets a fresh input from setup. The garbage collector runs
+    before the timed region and is disabled inside it, so collections triggered by previous
+    repetitions are not attributed to the operation.
+
+    Parameters:
+        operation (Callable): Operation to measure. It receives the output of setup if setup is given.
+        setup (Callable): Function creating the input of each repetition, it is not measured.
+        warmup (int): Number of repetitions run before the measured ones and discarded.
+        repeat (int): Number of measured repetitions.
+        disable_gc (bool): Whether to disable the garbage collector in the timed region.
+        **result_options: Options of MeasurementResult, such as the confidence level.
+
+    Returns:
+        MeasurementResult: The statistics of the measured repetitions.
+    """
+    if repeat < 1:
+        raise ValueError("At least one repetition must be measured.")
+
+    wall_ns = []
+    cpu_ns = []
+    is_gc_enabled = gc.isenabled()
+
+    for repetition in range(warmup + repeat):
+        args = (setup(),) if setup is not None else ()
+
+        gc.collect()
+        if disable_gc:
+            gc.disable()
+
+        try:
+            cpu_start_ns = time.process_time_ns()
+            start_ns = time.perf_counter_ns()
+            operation(*args)
+            end_ns = time.perf_counter_ns()
+            cpu_end_ns = time.process_time_ns()
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+
+        # Release the input of the repetition before the next one
+        del args
+
+        if repetition >= warmup:
+            wall_ns.append(end_ns - start_ns)
+            cpu_ns.append(cpu_end_ns - cpu_start_ns)
+
+    return MeasurementResult(wall_ns=wall_ns, cpu_ns=cpu_ns, **result_options)
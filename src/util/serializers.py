@@ -0,0 +1,472 @@
+import json
+import mmap
+import os
+import pickle
+import shutil
+import struct
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Name of the file describing the columns of a columnar DataFrame
+COLUMNAR_META_FILE = "meta.json"
+
+# Magic numbers at the start of the files written by PickleSerializer and RecordsSerializer
+PICKLE_MAGIC = b"PKL5OOB\0"
+RECORDS_MAGIC = b"RECORDS\0"
+
+# Length of each frame as an unsigned 64 bits little endian integer
+FRAME_HEADER = struct.Struct("<Q")
+
+# Alignment of the out-of-band buffers in the pickle files, so the arrays loaded from them are aligned
+BUFFER_ALIGNMENT = 64
+
+def _write_atomically(path: str, write):
+    """
+    Writes a file to a temporary path renamed at the end, so a partially written file is never loaded.
+
+    Parameters:
+        path (str): Path of the file.
+        write (Callable): Function writing the content to the binary file object it receives.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as temporary_file:
+            write(temporary_file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+class Serializer:
+    """
+    Format of the entries of the cache.
+
+    Attributes:
+        name (str): Name of the format, recorded in the index of the cache.
+        extension (str): Extension of the entries written in this format.
+    """
+
+    name = None
+    extension = None
+
+    def supports(self, data) -> bool:
+        """
+        Checks whether the data can be written in this format.
+
+        Parameters:
+            data: The data.
+
+        Returns:
+            bool: True if the data can be written in this format, False otherwise.
+        """
+        raise NotImplementedError
+
+    def dump(self, data, path: str):
+        """
+        Writes the data to a path.
+
+        Parameters:
+            data: The data.
+            path (str): Path of the entry.
+        """
+        raise NotImplementedError
+
+    def load(self, path: str):
+        """
+        Reads the data from a path.
+
+        Parameters:
+            path (str): Path of the entry.
+
+        Returns:
+            The data.
+        """
+        raise NotImplementedError
+
+
+class PickleSerializer(Serializer):
+    """
+    Writes any picklable object to a single pickle file.
+
+    The object is pickled with protocol 5, and the buffers supporting out-of-band pickling, such
+    as the ones of NumPy arrays and of the numeric blocks of DataFrames, are written after the
+    pickle stream instead of being copied into it. When loading, the file is memory-mapped and
+    the arrays are rebuilt on top of the mapping without copying their data.
+
+    File layout: PICKLE_MAGIC, the framed pickle stream, the number of buffers, then each
+    buffer framed and aligned to BUFFER_ALIGNMENT bytes.
+    """
+
+    name = "pickle"
+    extension = ".pickle"
+
+    def supports(self, data) -> bool:
+        return True
+
+    @staticmethod
+    def _write(data, cache_file):
+        """
+        Writes the data to a binary file object in the layout described above.
+
+        Parameters:
+            data: The data.
+            cache_file: The binary file object.
+        """
+        buffers = []
+
+        # The pickle stream is written directly to the file, its length is filled in afterwards
+        cache_file.write(PICKLE_MAGIC)
+        length_position = cache_file.tell()
+        cache_file.write(FRAME_HEADER.pack(0))
+        pickle.Pickler(cache_file, protocol=5, buffer_callback=buffers.append).dump(data)
+        end_position = cache_file.tell()
+        cache_file.seek(length_position)
+        cache_file.write(FRAME_HEADER.pack(end_position - length_position - FRAME_HEADER.size))
+        cache_file.seek(end_position)
+
+        cache_file.write(FRAME_HEADER.pack(len(buffers)))
+        for buffer in buffers:
+            raw_buffer = buffer.raw()
+            cache_file.write(FRAME_HEADER.pack(raw_buffer.nbytes))
+            cache_file.write(b"\0" * (-cache_file.tell() % BUFFER_ALIGNMENT))
+            cache_file.write(raw_buffer)
+
+    def dump(self, data, path: str):
+        _write_atomically(path=path, write=lambda cache_file: self._write(data=data, cache_file=cache_file))
+
+    def load(self, path: str):
+        with open(path, "rb") as cache_file:
+            # Files written by a plain pickle.dump are still loaded
+            if cache_file.read(len(PICKLE_MAGIC)) != PICKLE_MAGIC:
+                cache_file.seek(0)
+                return pickle.load(cache_file)
+
+            # The copy-on-write mapping lets the arrays be modified without modifying the file
+            mapping = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        view = memoryview(mapping)
+        position = len(PICKLE_MAGIC)
+        (pickle_length,) = FRAME_HEADER.unpack_from(view, position)
+        pickle_stream = view[position + FRAME_HEADER.size:position + FRAME_HEADER.size + pickle_length]
+        position += FRAME_HEADER.size + pickle_length
+
+        (num_buffers,) = FRAME_HEADER.unpack_from(view, position)
+        position += FRAME_HEADER.size
+        buffers = []
+        for _ in range(num_buffers):
+            (buffer_length,) = FRAME_HEADER.unpack_from(view, position)
+            position += FRAME_HEADER.size
+            position += -position % BUFFER_ALIGNMENT
+            buffers.append(view[position:position + buffer_length])
+            position += buffer_length
+
+        return pickle.loads(pickle_stream, buffers=buffers)
+
+
+def iter_records(path: str, chunks: bool = False) -> Iterator:
+    """
+    Reads the records of a file written by RecordsSerializer one chunk at a time.
+
+    Only one chunk is held in memory besides the records kept by the consumer.
+
+    Parameters:
+        path (str): Path of the file.
+        chunks (bool): Whether to yield lists of records instead of single records.
+
+    Returns:
+        Iterator: Iterator over the records, or over the chunks of records.
+    """
+    with open(path, "rb") as records_file:
+        if records_file.read(len(RECORDS_MAGIC)) != RECORDS_MAGIC:
+            raise ValueError(f"{path} was not written by RecordsSerializer.")
+
+        while True:
+            header = records_file.read(FRAME_HEADER.size)
+            if len(header) == 0:
+                break
+            (chunk_length,) = FRAME_HEADER.unpack(header)
+            chunk = pickle.loads(records_file.read(chunk_length))
+
+            if chunks:
+                yield chunk
+            else:
+                yield from chunk
+
+
+class RecordsSerializer(Serializer):
+    """
+    Writes a list of records, such as the dictionaries of DataFrame.to_dict("records"), as a
+    sequence of framed pickled chunks.
+
+    Writing one chunk at a time bounds the memory used by the pickled bytes to a chunk instead
+    of the whole list, and the records can be read back one chunk at a time with iter_records.
+
+    File layout: RECORDS_MAGIC, then each chunk framed.
+    """
+
+    name = "records"
+    extension = ".records"
+
+    def __init__(self, chunk_size: int = 10000):
+        """
+        Initializes the RecordsSerializer class.
+
+        Parameters:
+            chunk_size (int): Number of records of each chunk.
+        """
+        self._chunk_size = chunk_size
+
+    def supports(self, data) -> bool:
+        return isinstance(data, list)
+
+    def _write(self, data: list, records_file):
+        """
+        Writes the records to a binary file object in the layout described above.
+
+        Parameters:
+            data (list): The records.
+            records_file: The binary file object.
+        """
+        records_file.write(RECORDS_MAGIC)
+        for start in range(0, len(data), self._chunk_size):
+            chunk = pickle.dumps(data[start:start + self._chunk_size], protocol=5)
+            records_file.write(FRAME_HEADER.pack(len(chunk)))
+            records_file.write(chunk)
+
+    def dump(self, data: list, path: str):
+        _write_atomically(path=path, write=lambda records_file: self._write(data=data, records_file=records_file))
+
+    def load(self, path: str) -> list:
+        records = []
+        for chunk in iter_records(path=path, chunks=True):
+            records.extend(chunk)
+        return records
+
+
+def encode_strings(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bytes]:
+    """
+    Encodes a string column as codes into a dictionary of its unique values.
+
+    Parameters:
+        values (np.ndarray): Values of the column, strings and missing values.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, bytes]: The int32 codes of the values (-1 for the missing values),
+                                              the int64 offsets of the unique values and their UTF-8 bytes.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    encoded = [value.encode("utf-8") for value in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+    return codes.astype(np.int32, copy=False), offsets, b"".join(encoded)
+
+def decode_strings(codes: np.ndarray, offsets: np.ndarray, data: bytes, string_dtype: str = "object"):
+    """
+    Decodes a string column encoded by encode_strings.
+
+    Only the unique values are decoded, the values of the rows are taken from them.
+
+    Parameters:
+        codes (np.ndarray): The codes of the values.
+        offsets (np.ndarray): The offsets of the unique values in data.
+        data (bytes): The UTF-8 bytes of the unique values.
+        string_dtype (str): Type of the values, "object" for an object array or "category" for a Categorical.
+
+    Returns:
+        The values of the column, an object array or a Categorical depending on string_dtype.
+    """
+    uniques = np.array([data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])] + [None],
+                       dtype=object)
+
+    if string_dtype == "category":
+        return pd.Categorical.from_codes(codes, categories=uniques[:-1])
+
+    # The missing values have the code -1, which takes the trailing None
+    return uniques.take(codes)
+
+
+class ColumnarSerializer(Serializer):
+    """
+    Writes a DataFrame as a folder with one file per column.
+
+    Numeric, boolean and datetime columns are written as .npy files and loaded as memory-mapped
+    arrays, so loading them does not read them until they are used. String columns are written
+    as int32 codes (.npy, memory-mapped as well) into a dictionary of their unique values, which
+    is stored as an offsets array and a UTF-8 data buffer. Any other column is pickled.
+
+    The string columns are restored with the object dtype by default, taking the unique values
+    by their codes, so all the rows with the same value share a single string object. The strings
+    are not rebuilt, but taking them still reads every code and allocates a pointer per row, so
+    loading them takes time and memory proportional to the number of rows. Only when restored as
+    categoricals, which keep the memory-mapped codes, does loading not depend on the number of rows
+    until the columns are used.
+    """
+
+    name = "columnar"
+    extension = ".columns"
+
+    def __init__(self, string_dtype: str = "object", mmap_mode: str = "c"):
+        """
+        Initializes the ColumnarSerializer class.
+
+        Parameters:
+            string_dtype (str): Dtype of the restored string columns ("object" or "category").
+            mmap_mode (str): Memory mapping mode of the arrays (see numpy.load). The default
+                             copy-on-write mode lets the DataFrame be modified in memory without
+                             modifying the cached files.
+        """
+        if string_dtype not in ("object", "category"):
+            raise ValueError("Invalid string_dtype. Please choose 'object' or 'category'.")
+
+        self._string_dtype = string_dtype
+        self._mmap_mode = mmap_mode
+
+    def supports(self, data) -> bool:
+        return (isinstance(data, pd.DataFrame) and data.columns.is_unique
+                and all(isinstance(column, str) for column in data.columns))
+
+    @staticmethod
+    def _is_string_column(values: np.ndarray) -> bool:
+        """
+        Checks whether an object column only contains strings and missing values.
+
+        Parameters:
+            values (np.ndarray): Values of the column.
+
+        Returns:
+            bool: True if the column only contains strings and missing values, False otherwise.
+        """
+        return pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty")
+
+    def _dump_strings(self, values: np.ndarray, column_path: str):
+        """
+        Writes a string column as codes into a dictionary of its unique values.
+
+        Parameters:
+            values (np.ndarray): Values of the column.
+            column_path (str): Path of the column files without extension.
+        """
+        codes, offsets, data = encode_strings(values=values)
+
+        np.save(f"{column_path}.codes.npy", codes)
+        np.save(f"{column_path}.offsets.npy", offsets)
+        with open(f"{column_path}.data", "wb") as data_file:
+            data_file.write(data)
+
+    def _load_strings(self, column_path: str, num_rows: int = None):
+        """
+        Reads a string column written by _dump_strings.
+
+        Parameters:
+            column_path (str): Path of the column files without extension.
+            num_rows (int): Number of rows to read from the start of the column. If None, reads all the rows.
+
+        Returns:
+            The values of the column, an object array or a Categorical depending on string_dtype.
+        """
+        codes = np.load(f"{column_path}.codes.npy", mmap_mode=self._mmap_mode)[:num_rows]
+        offsets = np.load(f"{column_path}.offsets.npy")
+        with open(f"{column_path}.data", "rb") as data_file:
+            data = data_file.read()
+
+        return decode_strings(codes=codes, offsets=offsets, data=data, string_dtype=self._string_dtype)
+
+    def dump(self, data: pd.DataFrame, path: str):
+        # Write to a temporary folder renamed at the end, so a partial entry is never loaded
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        os.makedirs(temporary_path)
+
+        try:
+            columns = []
+            for position, column in enumerate(data.columns):
+                values = data[column].to_numpy()
+                column_path = os.path.join(temporary_path, str(position))
+
+                if isinstance(data[column].dtype, np.dtype) and data[column].dtype.kind in "biufcmM":
+                    kind = "array"
+                    np.save(f"{column_path}.npy", values)
+                elif data[column].dtype == object and self._is_string_column(values):
+                    kind = "strings"
+                    self._dump_strings(values=values, column_path=column_path)
+                else:
+                    kind = "pickle"
+                    with open(f"{column_path}.pickle", "wb") as column_file:
+                        pickle.dump(data[column].array, column_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+                columns.append({"name": column, "kind": kind})
+
+            # A RangeIndex is described by its bounds, any other index is pickled
+            if isinstance(data.index, pd.RangeIndex):
+                index = {"kind": "range", "start": data.index.start, "stop": data.index.stop, "step": data.index.step}
+            else:
+                index = {"kind": "pickle"}
+                with open(os.path.join(temporary_path, "index.pickle"), "wb") as index_file:
+                    pickle.dump(data.index, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+            with open(os.path.join(temporary_path, COLUMNAR_META_FILE), "w") as meta_file:
+                json.dump({"columns": columns, "index": index}, meta_file, indent=2)
+
+            os.rename(temporary_path, path)
+        except BaseException:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+            raise
+
+    def load(self, path: str, num_rows: int = None) -> pd.DataFrame:
+        """
+        Reads a DataFrame written by dump.
+
+        Parameters:
+            path (str): Path of the entry.
+            num_rows (int): Number of rows to read from the start of the DataFrame. If None, reads all the
+                            rows. The numeric columns of the prefix are views of the memory-mapped files,
+                            and the string columns only take the values of the prefix.
+
+        Returns:
+            pd.DataFrame: The DataFrame.
+        """
+        with open(os.path.join(path, COLUMNAR_META_FILE), "r") as meta_file:
+            meta = json.load(meta_file)
+
+        if meta["index"]["kind"] == "range":
+            index = pd.RangeIndex(meta["index"]["start"], meta["index"]["stop"], meta["index"]["step"])[:num_rows]
+        else:
+            with open(os.path.join(path, "index.pickle"), "rb") as index_file:
+                index = pickle.load(index_file)[:num_rows]
+
+        columns = {}
+        for position, column in enumerate(meta["columns"]):
+            column_path = os.path.join(path, str(position))
+            if column["kind"] == "array":
+                columns[column["name"]] = np.load(f"{column_path}.npy", mmap_mode=self._mmap_mode)[:num_rows]
+            elif column["kind"] == "strings":
+                columns[column["name"]] = self._load_strings(column_path=column_path, num_rows=num_rows)
+            else:
+                with open(f"{column_path}.pickle", "rb") as column_file:
+                    columns[column["name"]] = pickle.load(column_file)[:num_rows]
+
+        # Without copy the DataFrame keeps the memory-mapped arrays as its blocks
+        return pd.DataFrame(columns, index=index, copy=False)
+
+
+# Serializers tried in order to write an entry, the first one supporting the data is used
+SERIALIZERS = [ColumnarSerializer(), RecordsSerializer(), PickleSerializer()]
+
+def select_serializer(data) -> Serializer:
+    """
+    Selects the serializer used to write some data.
+
+    Parameters:
+        data: The data.
+
+    Returns:
+        Serializer: The first serializer of SERIALIZERS supporting the data.
+    """
+    for serializer in SERIALIZERS:
+        if serializer.supports(data):
+            return serializer
+    raise TypeError(f"No serializer supports the type {type(data).__name__}.")
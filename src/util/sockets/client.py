@@ -1,10 +1,17 @@
+import os
 import socket
+import time
+
+from src.util.sockets.protocol import MessageDecoder, encode_message
 
 class Client:
     def __init__(self, host, port):
         """
         Initializes the Client object.
 
+        The connection stays open, so several messages can be sent through it. The messages are
+        framed as length-prefixed JSON (see src.util.sockets.protocol).
+
         Parameters:
             host (str): The IP address of the server.
             port (int): The port on which the client will connect to the server.
@@ -13,19 +20,85 @@ class Client:
         self.port = port
         self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.client_socket.connect((self.host, self.port))
+        self._decoder = MessageDecoder()
+        self._responses = []
 
     def send_message(self, message):
         """
-        Sends a message to the server and receives a response.
+        Sends a message to the server and waits for its response.
 
         Parameters:
-            message (str): The message to be sent to the server.
+            message (dict): The message to be sent to the server, with its type in the "type" key.
+
+        Returns:
+            dict: The response of the server.
         """
         # Send message to the server
-        self.client_socket.send(message.encode('utf-8'))
+        self.client_socket.sendall(encode_message(message))
 
         # Receive response from the server
-        _ = self.client_socket.recv(1024).decode('utf-8')
+        while len(self._responses) == 0:
+            data = self.client_socket.recv(1024)
+            if not data:
+                raise ConnectionError("The server closed the connection.")
+            self._responses += self._decoder.feed(data)
+
+        return self._responses.pop(0)
+
+    def send_start(self, run_id=None, case=None, num_records=None):
+        """
+        Sends the start message to the server along with the PID of this process.
+
+        The PID lets the server track this process directly instead of looking it up in the process table.
 
-        # Close the connection
+        Parameters:
+            run_id (str): Optional identifier of the run.
+            case (str): Optional name of the test case.
+            num_records (int): Optional number of records processed by the test case.
+
+        Raises:
+            RuntimeError: If the server could not attach to this process.
+        """
+        response = self.send_message(message={
+            "type": "start",
+            "pid": os.getpid(),
+            "run_id": run_id,
+            "case": case,
+            "num_records": num_records,
+            "t_ns": time.perf_counter_ns()
+        })
+
+        if response.get("type") == "error":
+            raise RuntimeError(f"The server did not attach to this process: {response.get('error')}")
+
+    def send_phase(self, name, start_ns, end_ns, **metrics):
+        """
+        Sends the boundaries of a phase of the test case.
+
+        The boundaries are taken with time.perf_counter_ns, which uses the same monotonic clock in
+        every process, so the server can place them on its own timeline.
+
+        Parameters:
+            name (str): Name of the phase.
+            start_ns (int): Start of the phase in nanoseconds.
+            end_ns (int): End of the phase in nanoseconds.
+            **metrics: Additional metrics of the phase, such as its CPU time.
+        """
+        self.send_message(message={"type": "phase", "name": name, "start_ns": start_ns, "end_ns": end_ns, **metrics})
+
+    def send_result(self, execution_time_ns, **statistics):
+        """
+        Sends the result of the test case.
+
+        Parameters:
+            execution_time_ns (int): Execution time of the operation in nanoseconds.
+            **statistics: Additional statistics of the repetitions of the operation, such as the
+                          ones of src.util.measurement.MeasurementResult.summary.
+        """
+        self.send_message(message={"type": "result", "execution_time_ns": execution_time_ns, **statistics})
+
+    def close(self):
+        """
+        Closes the connection.
+        """
         self.client_socket.close()
@@ -0,0 +1,56 @@
+import json
+import struct
+
+# Header of each frame: length of the JSON payload as an unsigned 32 bits big endian integer
+HEADER = struct.Struct("!I")
+
+# Types of the messages generated by the server when a client connects or disconnects
+CONNECTED_MESSAGE = "connect"
+DISCONNECTED_MESSAGE = "disconnect"
+
+def encode_message(message: dict) -> bytes:
+    """
+    Encodes a message as a length-prefixed JSON frame.
+
+    Parameters:
+        message (dict): The message, it must be serializable to JSON and have a "type" key.
+
+    Returns:
+        bytes: The frame of the message.
+    """
+    payload = json.dumps(message).encode("utf-8")
+    return HEADER.pack(len(payload)) + payload
+
+
+class MessageDecoder:
+    def __init__(self):
+        """
+        Initializes the MessageDecoder object.
+
+        This class splits a stream of bytes into the messages encoded with encode_message.
+        """
+        self._buffer = b""
+
+    def feed(self, data: bytes) -> list:
+        """
+        Adds received data to the decoder.
+
+        Parameters:
+            data (bytes): Data received from the stream.
+
+        Returns:
+            list: List of the messages completed by the data.
+        """
+        self._buffer += data
+
+        messages = []
+        while len(self._buffer) >= HEADER.size:
+            (length,) = HEADER.unpack_from(self._buffer)
+            end = HEADER.size + length
+            if len(self._buffer) < end:
+                break
+
+            messages.append(json.loads(self._buffer[HEADER.size:end].decode("utf-8")))
+            self._buffer = self._buffer[end:]
+
+        return messages
@@ -1,12 +1,22 @@
+import queue
+import selectors
 import socket
 import struct
+import threading
 import time
 
+from src.util.sockets.protocol import CONNECTED_MESSAGE, DISCONNECTED_MESSAGE, MessageDecoder, encode_message
+
 class Server:
     def __init__(self, host, port):
         """
         Initializes the Server object.
 
+        The server handles its connections from a background thread with a selector, so it never
+        blocks the caller. Each connection may send several messages framed as length-prefixed JSON
+        (see src.util.sockets.protocol), which are queued with the time they were received and
+        retrieved with get_messages.
+
         Parameters:
             host (str): The IP address of the server.
             port (int): The port on which the server will listen for connections.
@@ -17,6 +27,23 @@ class Server:
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
         self.bind_socket()
+        self.server_socket.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.server_socket, selectors.EVENT_READ)
+
+        # Socket pair used to wake the server thread up when there are responses to send
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+
+        self._connections = {}
+        self._decoders = {}
+        self._next_connection_id = 0
+        self._messages = queue.Queue()
+        self._responses = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="control_server", daemon=True)
 
     def bind_socket(self):
         """Binds the server socket to the specified host and port with retry."""
@@ -33,30 +60,162 @@ class Server:
 
         self.server_socket.listen(5)
 
+    def start(self):
+        """Starts handling the connections in the background."""
+        self._thread.start()
+
     def stop_server(self):
         """Stops the server."""
+        if self._stop_event.is_set():
+            return
+
+        self._stop_event.set()
+        self._wakeup_writer.send(b"\0")
+        if self._thread.is_alive():
+            self._thread.join()
+
+        for connection_id in list(self._connections):
+            self._close_connection(connection_id=connection_id, is_notified=False)
+
+        self._selector.close()
         self.server_socket.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+    def get_messages(self, timeout=None):
+        """
+        Retrieves the messages received since the previous call.
+
+        Parameters:
+            timeout (float): Maximum time to wait for a message in seconds. If None, does not block.
+
+        Returns:
+            list: List of tuples containing the time the message was received (time.perf_counter),
+                  the ID of the connection and the message. A message of type CONNECTED_MESSAGE is
+                  queued when a connection is accepted and DISCONNECTED_MESSAGE when it is closed.
+        """
+        messages = []
+        if timeout is not None:
+            try:
+                messages.append(self._messages.get(timeout=timeout))
+            except queue.Empty:
+                return messages
+
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def send(self, connection_id, message):
+        """
+        Sends a message to a client. It can be called from any thread.
 
-    def wait_for_message(self, expected_message):
+        Parameters:
+            connection_id (int): ID of the connection of the client.
+            message (dict): The message to be sent.
         """
-        Waits for a specific message from the client and sends a response.
+        self._responses.put((connection_id, message))
+        self._wakeup_writer.send(b"\0")
+
+    def _run(self):
+        """Handles the connections until the server is stopped."""
+        while not self._stop_event.is_set():
+            for key, _ in self._selector.select(timeout=0.5):
+                if key.fileobj is self.server_socket:
+                    self._accept_connection()
+                elif key.fileobj is self._wakeup_reader:
+                    self._send_responses()
+                else:
+                    self._receive(connection_id=key.data)
+
+    def _accept_connection(self):
+        """Accepts a pending connection."""
+        try:
+            client_socket, _ = self.server_socket.accept()
+        except BlockingIOError:
+            return
+
+        client_socket.setblocking(False)
+        connection_id = self._next_connection_id
+        self._next_connection_id += 1
+
+        self._connections[connection_id] = client_socket
+        self._decoders[connection_id] = MessageDecoder()
+        self._selector.register(client_socket, selectors.EVENT_READ, data=connection_id)
+        self._messages.put((time.perf_counter(), connection_id, {"type": CONNECTED_MESSAGE}))
+
+    def _receive(self, connection_id):
+        """
+        Receives the available data of a connection and queues its complete messages.
 
         Parameters:
-            expected_message (str): The expected message from the client.
+            connection_id (int): ID of the connection.
         """
-        client_socket, _ = self.server_socket.accept()
+        client_socket = self._connections.get(connection_id)
+        if client_socket is None:
+            return
+
+        try:
+            data = client_socket.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
 
-        # Receive message from the client
-        received_message = client_socket.recv(1024).decode('utf-8')
+        if not data:
+            self._close_connection(connection_id=connection_id)
+            return
 
-        # Check if the received message matches the expected message
-        if received_message == expected_message:
-            response = "Message received successfully."
-        else:
-            response = "Unexpected message."
+        timestamp = time.perf_counter()
+        try:
+            messages = self._decoders[connection_id].feed(data)
+        except ValueError:
+            # The client does not speak the protocol
+            self._close_connection(connection_id=connection_id)
+            return
 
-        # Send a response back to the client
-        client_socket.send(response.encode('utf-8'))
+        for message in messages:
+            self._messages.put((timestamp, connection_id, message))
 
-        # Close the connection
+    def _send_responses(self):
+        """Sends the queued responses."""
+        try:
+            while self._wakeup_reader.recv(1024):
+                pass
+        except BlockingIOError:
+            pass
+
+        while True:
+            try:
+                connection_id, message = self._responses.get_nowait()
+            except queue.Empty:
+                return
+
+            client_socket = self._connections.get(connection_id)
+            if client_socket is None:
+                continue
+
+            # The responses are small, so the socket is switched to blocking mode to send them at once
+            try:
+                client_socket.setblocking(True)
+                client_socket.sendall(encode_message(message))
+                client_socket.setblocking(False)
+            except OSError:
+                self._close_connection(connection_id=connection_id)
+
+    def _close_connection(self, connection_id, is_notified=True):
+        """
+        Closes a connection.
+
+        Parameters:
+            connection_id (int): ID of the connection.
+            is_notified (bool): Whether to queue DISCONNECTED_MESSAGE for the connection.
+        """
+        client_socket = self._connections.pop(connection_id)
+        self._decoders.pop(connection_id)
+        self._selector.unregister(client_socket)
         client_socket.close()
+
+        if is_notified:
+            self._messages.put((time.perf_counter(), connection_id, {"type": DISCONNECTED_MESSAGE}))
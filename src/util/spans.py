@@ -0,0 +1,176 @@
+import functools
+import os
+import time
+
+import psutil
+
+from src.util.logger import setup_logging
+
+# Set up the logging configuration
+logger = setup_logging()
+
+class Span:
+    """
+    Named phase of a test case measured by a SpanRecorder.
+
+    Attributes:
+        name (str): Name of the span.
+        path (str): Names of the enclosing spans and of this span separated by "/".
+        depth (int): Number of enclosing spans.
+        start_ns (int): Start of the span (time.perf_counter_ns).
+        end_ns (int): End of the span (time.perf_counter_ns).
+        cpu_ns (int): CPU time of the process spent in the span (time.process_time_ns).
+        rss_delta (int): Change of the resident set size of the process during the span in bytes.
+    """
+
+    __slots__ = ("_recorder", "name", "path", "depth", "start_ns", "end_ns", "cpu_ns", "rss_delta", "_cpu_start_ns", "_rss_start")
+
+    def __init__(self, recorder, name: str):
+        """
+        Initializes the Span class.
+
+        Parameters:
+            recorder (SpanRecorder): Recorder the span belongs to.
+            name (str): Name of the span.
+        """
+        self._recorder = recorder
+        self.name = name
+        self.path = name
+        self.depth = 0
+        self.start_ns = self.end_ns = self.cpu_ns = self.rss_delta = None
+
+    @property
+    def wall_ns(self) -> int:
+        """
+        Wall-clock duration of the span in nanoseconds.
+        """
+        return self.end_ns - self.start_ns
+
+    def __enter__(self):
+        self._recorder._enter(self)
+        self._rss_start = self._recorder._get_rss()
+        self._cpu_start_ns = time.process_time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end_ns = time.perf_counter_ns()
+        self.cpu_ns = time.process_time_ns() - self._cpu_start_ns
+        self.rss_delta = self._recorder._get_rss() - self._rss_start
+        self._recorder._exit(self)
+        return False
+
+
+class SpanRecorder:
+    def __init__(self, client=None):
+        """
+        Initializes the SpanRecorder class.
+
+        This class records nested named phases of a test case with their wall-clock time, CPU time
+        and RSS delta. The spans are kept in memory while they are measured and sent to the profiler
+        afterwards with flush, so reporting them does not perturb the measured code. Their boundaries
+        are taken with time.perf_counter_ns, which the profiler shares, so they are placed at their
+        actual time on its timeline.
+
+        Parameters:
+            client (Client): Client connected to the profiler. If None, the spans are only recorded.
+        """
+        self._client = client
+        self._stack = []
+        self._num_flushed = 0
+        self.spans = []
+
+        # The RSS is read from procfs when possible, which is much cheaper than going through psutil
+        try:
+            self._statm_file = os.open("/proc/self/statm", os.O_RDONLY)
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            self._statm_file = None
+            self._process = psutil.Process()
+
+    def _get_rss(self) -> int:
+        """
+        Retrieves the resident set size of this process.
+
+        Returns:
+            int: Resident set size in bytes.
+        """
+        if self._statm_file is not None:
+            return int(os.pread(self._statm_file, 128, 0).split()[1]) * self._page_size
+        return self._process.memory_info().rss
+
+    def _enter(self, span: Span):
+        """
+        Registers a span being entered.
+
+        Parameters:
+            span (Span): The span.
+        """
+        if len(self._stack) > 0:
+            span.path = f"{self._stack[-1].path}/{span.name}"
+            span.depth = len(self._stack)
+        self._stack.append(span)
+
+    def _exit(self, span: Span):
+        """
+        Registers a span being exited.
+
+        Parameters:
+            span (Span): The span.
+        """
+        self._stack.pop()
+        self.spans.append(span)
+
+    def span(self, name: str) -> Span:
+        """
+        Creates a span to be used as a context manager.
+
+        Parameters:
+            name (str): Name of the span.
+
+        Returns:
+            Span: The span.
+        """
+        return Span(recorder=self, name=name)
+
+    def trace(self, name: str = None):
+        """
+        Decorator measuring each call of a function as a span.
+
+        Parameters:
+            name (str): Name of the span. Default is the name of the function.
+
+        Returns:
+            Callable: The decorator.
+        """
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name=span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def log_spans(self):
+        """
+        Logs the spans recorded so far in the order they started.
+        """
+        for span in sorted(self.spans, key=lambda span: span.start_ns):
+            logger.info(f"{'  ' * span.depth}{span.name}: {span.wall_ns / 1e9} seconds "
+                        f"(CPU: {span.cpu_ns / 1e9} seconds, RSS delta: {span.rss_delta / (1024 ** 2):.2f} MB)")
+
+    def flush(self):
+        """
+        Sends the spans recorded since the previous flush to the profiler as phases.
+        """
+        if self._client is None:
+            return
+
+        for span in self.spans[self._num_flushed:]:
+            self._client.send_phase(name=span.path, start_ns=span.start_ns, end_ns=span.end_ns,
+                                    cpu_ns=span.cpu_ns, rss_delta=span.rss_delta)
+        self._num_flushed = len(self.spans)